@@ -4,10 +4,20 @@ import html
 import re
 from datetime import datetime
 
-# 분리된 모듈 임포트
+# 분리된 모듈 임포트 (startup을 먼저 켜서 이후 모듈 import 시간을 측정)
+import startup
+startup.install()
 import config
 import utils
-from ui import inject_css, H1, H2, H3, render_pest_only, render_swot_only, _clean_citations, _take2
+import cache
+import runtime
+import aoai_client
+import result_store
+import rate_limit
+import singleflight
+import metrics
+import structured
+from ui import inject_css, H1, H2, H3, render_pest_only, render_swot_only, render_pest_swot_stream, _clean_citations, _take2
 
 def _rerun():
     if hasattr(st, "rerun"):
@@ -19,13 +29,14 @@ def _rerun():
 def _clear_analysis_state():
     for k in ("news_results", "pest_swot_json", "combined_json", "pdf_sig"):
         st.session_state.pop(k, None)
-    st.cache_data.clear()
-    st.cache_resource.clear()
+    # 전역 clear 대신 이 세션만 쓰던 캐시 항목만 제거 (다른 사용자 캐시·Blob 클라이언트 유지)
+    return cache.store.invalidate_session(runtime.session_id())
 
 # --- 페이지 설정 및 초기화 ---
 st.set_page_config(page_title="AX Biz Insight", page_icon="💼", layout="wide")
 inject_css()
 config.initialize_session_state()
+aoai_client.warm_up()  # 프로세스당 1회, 백그라운드로 AOAI 연결 미리 열기
 
 # ---------------------- 대제목 ----------------------
 from ui import H1, H2  # 이미 임포트 되어 있으면 생략
@@ -44,6 +55,34 @@ with st.expander("환경 변수 상태 보기", expanded=False):
     c2.metric("AZURE_OPENAI_ENDPOINT", "OK" if config.AOAI_ENDPOINT else "MISSING")
     c3.metric("AZURE_OPENAI_DEPLOYMENT", "OK" if config.AOAI_DEPLOY else "MISSING")
     st.caption("내부 문서 기능을 쓰려면 AZURE_STORAGE_CONN / AZURE_SEARCH_* 값을 설정하세요.")
+    cs = utils.llm_cache.stats()
+    if cs:
+        st.caption(f"LLM 디스크 캐시: hit {cs['hits']} · miss {cs['misses']} · {cs['entries']}건 ({cs['bytes'] // 1024} KB)")
+    sr = startup.report(config.STARTUP_BUDGET_SEC, top=5)
+    st.caption(
+        f"콜드 스타트: 모듈 import {sr['import_total_sec']}s / 예산 {config.STARTUP_BUDGET_SEC}s"
+        + (" ⚠️ 초과" if sr.get("over_budget") else "")
+        + " · " + ", ".join(f"{r['module']} {r['cumulative_ms']}ms" for r in sr["imports"])
+        + "".join(f" · {k} 생성 {v}ms" for k, v in sr["clients"].items())
+    )
+    rl = rate_limit.stats()
+    if rl:
+        st.caption(f"AOAI 속도 제한: 동시 한도 {rl['limit']} · 실행 {rl['active']} · 대기 {rl['waiting']} · "
+                   f"429 {rl['throttled']}회 · 최대 대기 {rl['max_wait_sec']}s")
+    sf = singleflight.stats()
+    coalesced = sum(g["coalesced"] for g in sf.values())
+    if coalesced:
+        st.caption("동일 요청 합치기: " + " · ".join(f"{ns} {g['coalesced']}건" for ns, g in sf.items() if g["coalesced"])
+                   + f" (총 {coalesced}건 절약)")
+    lm = st.session_state.get("last_metrics") or {}
+    if lm:
+        st.caption("최근 동작 단계별 지표 (시간/바이트/캐시/재시도/토큰)")
+        st.json(lm, expanded=False)
+    st.download_button("📈 Prometheus 지표 내려받기", metrics.prometheus_text(), file_name="metrics.prom",
+                       mime="text/plain", key="btn_metrics_prom")
+    dd = utils.news_dedupe_stats()
+    if dd["dropped"]:
+        st.caption(f"뉴스 근사 중복 묶음: {dd['dropped']}/{dd['input']}건 제외 · 약 {dd['tokens_saved']} 토큰 절감")
 
 # ---------------------- 📄 내부 문서(PDF) 업로드 안내 (업로드 UI 제거) ----------------------
 
@@ -62,8 +101,7 @@ colA, colB, colC = st.columns(3)
 with colA:
     company_choice = st.selectbox(
         "회사 선택",
-        ["선택 안 함 (기술·도메인만)", "KT DS", "삼성SDS", "LG CNS", "SK C&C", "현대오토에버",
-         "카카오엔터프라이즈", "네이버클라우드", "기타(직접입력)"],
+        ["선택 안 함 (기술·도메인만)", *config.COMPANY_PRESETS, "기타(직접입력)"],
         index=1, key="sel_company"
     )
     if company_choice == "기타(직접입력)":
@@ -73,11 +111,9 @@ with colA:
     else:
         company = company_choice
 with colB:
-    techs = st.multiselect("관심 기술",
-        ["AI", "RAG", "LangGraph", "Azure OpenAI", "Process Mining", "Cloud Native", "Azure AI Search", "MLOps", "Data Fabric"],
-        default=["AI"], key="ms_techs")
+    techs = st.multiselect("관심 기술", config.TECH_CHOICES, default=["AI"], key="ms_techs")
 with colC:
-    domains = st.multiselect("도메인", ["금융", "제조", "리테일", "공공", "통신", "교육", "의료"], default=["금융"], key="ms_domains")
+    domains = st.multiselect("도메인", config.DOMAIN_CHOICES, default=["금융"], key="ms_domains")
 
 suggested_query = " ".join([s for s in [company or "", " ".join(techs), " ".join(domains)] if s]).strip()
 st.session_state["q_input"] = suggested_query  # 선택값 바뀔 때마다 자동 반영
@@ -87,7 +123,7 @@ opt_row1 = st.columns([1, 1, 1])
 with opt_row1[0]:
     freshness = st.selectbox("신선도", ["Day", "Week", "Month"], index=1, key="sel_freshness")
 with opt_row1[1]:
-    k = st.slider("뉴스 개수", 1, 3, 2, key="sld_news_count")
+    k = st.slider("뉴스 개수", 1, 3, 2, key="sld_news_count", help="공급자별 개수 (병합 후 중복 제거)")
 with opt_row1[2]:
     strict_and = st.checkbox("모든 키워드 반드시 포함(AND)", value=False, key="chk_and",
         help="체크 시 '단어1 AND 단어2 AND ...' 형태 (NewsAPI 전용)")
@@ -107,29 +143,39 @@ if click_search:
     if not q_now:
         st.warning("검색어를 입력하세요.")
     else:
+        # 기본 검색어 그대로면 야간 사전 계산 결과(뉴스 + PEST·SWOT)를 바로 사용
+        pre = None
+        if q_now == suggested_query and not strict_and:
+            pre = result_store.lookup(company, techs, domains, freshness, k)
         try:
-            if config.NAVER_ID and config.NAVER_SECRET:
-                st.session_state["news_results"] = utils.fetch_news_naver(q_now, k)
-            elif config.NEWS_KEY:
-                st.session_state["news_results"] = utils.fetch_news_ko(q_now, k, freshness, use_and=strict_and)
+            if pre:
+                payload, created = pre
+                news, provider_status = payload.get("news") or [], {}
+                st.session_state["pest_swot_json"] = payload.get("text")
+                st.session_state["pest_swot_sig"] = utils.selection_signature(company, techs, domains, news)
+                st.info(f"사전 계산 결과 사용 ({datetime.fromtimestamp(created):%m-%d %H:%M} 기준) — "
+                        "PEST·SWOT은 아래 탭에 바로 표시됩니다.")
             else:
-                st.error("NewsAPI 또는 Naver API 키가 설정되지 않았습니다.")
+                with st.spinner("뉴스 공급자 병렬 조회 중..."), metrics.collect("news_search") as mc:
+                    news, provider_status = utils.fetch_news_all(q_now, k, freshness, use_and=strict_and)
+                runtime.save_metrics(mc)
+            st.session_state["news_results"] = news
+            degraded = {p: v for p, v in provider_status.items() if v != "ok"}
+            if degraded:
+                st.info("일부 공급자 결과 제외: " + ", ".join(f"{p}({v})" for p, v in degraded.items()))
 
             st.success(f"뉴스 {len(st.session_state['news_results'])}건 수집 완료 ✅" if st.session_state["news_results"] else "결과가 없습니다.")
         except Exception as e:
             st.error(f"에러: {e}")
 
+pending_messages = None   # 스트리밍 생성은 아래 탭 영역에서 진행 (탭이 점진적으로 채워짐)
+analyze_status = st.empty()
 if analyze:
     news_items = st.session_state.get("news_results", [])
     if not news_items:
         st.warning("먼저 '뉴스 검색'을 실행하세요.")
     else:
-        try:
-            answer_json_text = utils.run_aoai(utils.build_messages_news(company, techs, domains, news_items))
-            st.session_state["pest_swot_json"] = answer_json_text
-            st.success("분석 완료 ✅ (아래 탭에서 확인)")
-        except Exception as e:
-            st.error(f"분석 중 오류: {e}")
+        pending_messages = utils.build_messages_news(company, techs, domains, news_items)
 
 # ---------------------- 📰 수집된 뉴스 ----------------------
 H2("📰 수집된 뉴스")
@@ -155,6 +201,32 @@ _default_swot = {"S": [], "W": [], "O": [], "T": []}
 
 tab_pest, tab_swot, tab_action = st.tabs(["PEST Detail", "SWOT Detail", "대응전략"])
 
+if pending_messages:
+    with tab_pest:
+        ph_pest = st.empty()
+    with tab_swot:
+        ph_swot = st.empty()
+    with tab_action:
+        ph_action = st.empty()
+    try:
+        with metrics.collect("pest_swot") as mc, metrics.stage("pest_swot", company=company):
+            answer_json_text = render_pest_swot_stream(
+                utils.run_aoai_stream(pending_messages, response_format=structured.response_format("pest_swot")),
+                ph_pest, ph_swot, ph_action
+            )
+            # 비었거나 틀린 필드만 재요청 (대부분 틀렸을 때만 전체 재생성)
+            with st.spinner("누락된 항목 보완 중..."):
+                _, answer_json_text = utils.complete_json("pest_swot", pending_messages, answer_json_text)
+        st.session_state["pest_swot_json"] = answer_json_text
+        st.session_state["pest_swot_sig"] = utils.selection_signature(company, techs, domains, news_items)
+        analyze_status.success("분석 완료 ✅ (아래 탭에서 확인)")
+    except Exception as e:
+        analyze_status.error(f"분석 중 오류: {e}")
+    runtime.save_metrics(mc)
+    # 스트리밍 미리보기는 지우고 아래에서 최종 결과로 다시 그림
+    for ph in (ph_pest, ph_swot, ph_action):
+        ph.empty()
+
 with tab_pest:
     data = (utils.parse_json_from_session("pest_swot_json") or {})
     render_pest_only((data.get("PEST") or _default_pest))
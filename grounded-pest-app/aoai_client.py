@@ -0,0 +1,104 @@
+# aoai_client.py
+"""
+AzureOpenAI 클라이언트 레지스트리.
+- (endpoint, api_version, key)별로 프로세스 전체에서 클라이언트 1개를 공유 (스레드 안전)
+- httpx 커넥션 풀/타임아웃은 config.AOAI_* 로 조정
+- warm_up(): 앱 시작 시 백그라운드로 연결(TCP/TLS)을 미리 열어 첫 호출 지연 제거
+- openai/httpx SDK는 첫 get_client() 때 import (캐시 결과만 그리는 페이지는 로드하지 않음)
+"""
+import hashlib
+import logging
+import threading
+import time
+
+import config
+import startup
+
+log = logging.getLogger(__name__)
+
+_clients = {}
+_lock = threading.Lock()
+_warm = {"started": False, "done": False, "elapsed_ms": None, "error": None}
+
+
+def _registry_key(endpoint: str, api_version: str, api_key: str):
+    # 키 원문 대신 해시를 레지스트리 키로 사용
+    digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    return ((endpoint or "").rstrip("/"), api_version or "", digest)
+
+
+def _new_http_client():
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config.AOAI_POOL_SIZE,
+            max_keepalive_connections=config.AOAI_POOL_SIZE,
+            keepalive_expiry=config.AOAI_KEEPALIVE_SEC,
+        ),
+        timeout=httpx.Timeout(config.AOAI_TIMEOUT, connect=config.AOAI_CONNECT_TIMEOUT),
+    )
+
+
+def get_client(endpoint: str = None, api_version: str = None, api_key: str = None):
+    """공용 AzureOpenAI 클라이언트 (인자 생략 시 config 값 사용)"""
+    endpoint = endpoint or config.AOAI_ENDPOINT
+    api_version = api_version or config.AOAI_VER
+    api_key = api_key or config.AOAI_KEY
+    key = _registry_key(endpoint, api_version, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                t0 = time.perf_counter()
+                from openai import AzureOpenAI
+                client = AzureOpenAI(
+                    api_key=api_key,
+                    api_version=api_version,
+                    azure_endpoint=endpoint,
+                    http_client=_new_http_client(),
+                    max_retries=0,      # 재시도/백오프는 rate_limit.py가 담당 (이중 재시도 방지)
+                )
+                startup.record("aoai_client", time.perf_counter() - t0)
+                _clients[key] = client
+    return client
+
+
+def warm_up(background: bool = True):
+    """프로세스당 1회, 가벼운 요청으로 커넥션을 미리 연다. 실패해도 무시(연결 자체는 열림)."""
+    if not config.AOAI_WARMUP or not (config.AOAI_ENDPOINT and config.AOAI_KEY):
+        return
+    with _lock:
+        if _warm["started"]:
+            return
+        _warm["started"] = True
+
+    def _run():
+        t0 = time.perf_counter()
+        try:
+            get_client().models.list()
+        except Exception as e:
+            # 404/권한 오류여도 TLS 연결은 풀에 남으므로 목적 달성
+            _warm["error"] = type(e).__name__
+        _warm["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        _warm["done"] = True
+        log.info("AOAI warm-up %.1f ms (%s)", _warm["elapsed_ms"], _warm["error"] or "ok")
+
+    if background:
+        threading.Thread(target=_run, name="aoai-warmup", daemon=True).start()
+    else:
+        _run()
+
+
+def warm_up_status() -> dict:
+    return dict(_warm)
+
+
+def close_all():
+    with _lock:
+        for c in _clients.values():
+            try:
+                c.close()
+            except Exception:
+                pass
+        _clients.clear()
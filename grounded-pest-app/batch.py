@@ -0,0 +1,82 @@
+# batch.py
+"""
+여러 회사 × 기술 × 도메인 조합의 PEST·SWOT 일괄 생성.
+셀 실행은 pipeline.run_grid(뉴스 조회 → build_messages_news → run_aoai)에 맡기고 완료 순서대로 돌려줍니다.
+공용 풀 크기(BATCH_CONCURRENCY)가 프로세스 전체 동시 실행 상한이며,
+사전 계산 결과(result_store)와 뉴스/LLM 캐시를 그대로 재사용합니다.
+"""
+from dataclasses import dataclass, field
+
+import config
+import pipeline
+
+
+@dataclass
+class Cell:
+    company: str
+    techs: tuple = ()
+    domains: tuple = ()
+    status: str = "queued"          # queued | done | failed
+    news_count: int = 0
+    data: dict = field(default_factory=dict)
+    error: str = ""
+    cached: bool = False            # 사전 계산/LLM 캐시에서 가져왔는지
+    elapsed: float = 0.0
+
+    @property
+    def key(self) -> tuple:
+        return (self.company, self.techs, self.domains)
+
+    @property
+    def query(self) -> str:
+        return " ".join(s for s in [self.company, " ".join(self.techs), " ".join(self.domains)] if s).strip()
+
+    @property
+    def label(self) -> str:
+        return " / ".join(s for s in [self.company, ", ".join(self.techs), ", ".join(self.domains)] if s)
+
+
+def expand_grid(companies, techs, domains, *, split: bool = False) -> list:
+    """
+    split=False: 회사별 1셀 (선택한 기술·도메인 전체를 한 질의로)
+    split=True : 회사 × 기술 × 도메인 조합마다 1셀
+    """
+    companies = [c for c in dict.fromkeys(companies or []) if c]
+    techs, domains = list(dict.fromkeys(techs or [])), list(dict.fromkeys(domains or []))
+    if not split:
+        return [Cell(c, tuple(techs), tuple(domains)) for c in companies]
+    return [
+        Cell(c, (t,) if t else (), (d,) if d else ())
+        for c in companies for t in (techs or [""]) for d in (domains or [""])
+    ]
+
+
+def run_batch(cells, *, cnt: int = 2, freshness: str = "Week"):
+    """셀을 공용 풀(pipeline.run_grid)에 제출하고 완료되는 순서대로 채운 Cell을 yield"""
+    by_key = {c.key: c for c in cells[:config.BATCH_MAX_CELLS]}
+    combos = [(c.company, list(c.techs), list(c.domains)) for c in by_key.values()]
+    for res in pipeline.run_grid(combos, cnt=cnt, freshness=freshness):
+        cell = by_key[(res.company, tuple(res.techs), tuple(res.domains))]
+        cell.news_count, cell.data, cell.elapsed = len(res.news), res.data, res.elapsed
+        cell.cached = res.source != "live"
+        cell.status, cell.error = ("done", "") if res.ok else ("failed", res.error)
+        yield cell
+
+
+def _first(items) -> str:
+    for x in items or []:
+        s = (x.get("text") if isinstance(x, dict) else str(x or "")).strip()
+        if s:
+            return s
+    return ""
+
+
+def matrix_row(cell: Cell) -> dict:
+    """비교 표 한 행 — PEST/SWOT 각 축의 첫 항목만"""
+    pest, swot = cell.data.get("PEST") or {}, cell.data.get("SWOT") or {}
+    row = {"회사": cell.company, "기술": ", ".join(cell.techs), "도메인": ", ".join(cell.domains)}
+    row.update({f"PEST·{k}": _first(pest.get(k)) for k in "PEST"})
+    row.update({f"SWOT·{k}": _first(swot.get(k)) for k in "SWOT"})
+    row["대응전략"] = (cell.data.get("one_liner") or "").strip()
+    row["상태"] = ("캐시" if cell.cached else "완료") if cell.status == "done" else (cell.error or cell.status)
+    return row
@@ -0,0 +1,350 @@
+# bench/load.py
+"""
+다중 세션 부하 테스트 — 레플리카 1개가 몇 명의 동시 사용자까지 버티는지(포화 지점) 찾기.
+  python -m bench.load --profile realistic --sessions 1,2,4,8,16 --step-sec 60
+  python -m bench.load --mix page_news_pest=3,page_keyword_search=2,upload_job=1 --slo-p95-ms 20000
+세션마다 스레드 1개가 흐름(bench.scenarios의 시나리오)을 가중치대로 골라 반복 실행하며, 단계마다 세션 수를 늘립니다.
+모든 세션이 한 프로세스에서 같은 풀/캐시/GIL을 공유하므로 Streamlit 서버 레플리카 1개와 같은 조건입니다.
+단계별로 흐름별 p50/p95, 처리량, 스레드 풀 포화도, 이벤트 루프 지연, 세션당 메모리를 재고 포화 곡선을 출력합니다.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from bench.run import add_stub_args, percentile, prepare
+
+DEFAULT_MIX = "page_news_pest=3,page_keyword_search=2,page_combined_insight=1,upload_job=1"
+
+# 감시할 앱 스레드 풀 (모듈, 속성)
+POOLS = {
+    "news": ("utils", "_news_pool"),
+    "search": ("utils", "_search_pool"),
+    "summary_map": ("utils", "_map_pool"),
+    "pipeline": ("pipeline", "_pool"),
+    "jobs": ("jobs", "_pool"),
+}
+
+
+def _rss_mb() -> float:
+    """현재 RSS (Linux /proc, 그 외에는 최대 RSS로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        from bench.run import _rss_mb as max_rss
+        return max_rss()
+
+
+# ===================== 관측기 =====================
+class LagProbe:
+    """
+    별도 스레드의 asyncio 루프에서 interval마다 깨어나 늦어진 시간을 기록.
+    Streamlit 서버 루프(tornado)도 같은 GIL을 나눠 쓰므로, 블로킹/CPU 경합으로 인한 응답 지연의 대리 지표.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self._lags = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            with self._lock:
+                self._lags.append(max(0.0, loop.time() - t0 - self.interval) * 1000)
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._tick()), name="lag-probe", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def drain(self) -> list:
+        with self._lock:
+            out, self._lags = self._lags, []
+        return out
+
+
+class PoolSampler:
+    """앱 ThreadPoolExecutor들의 대기열 길이/사용 중 스레드와 AOAI 제한기 상태를 주기적으로 표본 추출"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)      # 이름 -> [(busy, queued, max_workers)]
+        self._thread = None
+        self._pools = {}
+        for name, (mod, attr) in POOLS.items():
+            pool = getattr(sys.modules.get(mod), attr, None)
+            if pool is not None:
+                self._pools[name] = pool
+
+    @staticmethod
+    def _read(pool):
+        # ThreadPoolExecutor 내부 상태 — 공개 API가 없어 근사치로 읽음
+        threads = len(getattr(pool, "_threads", ()) or ())
+        idle_sem = getattr(pool, "_idle_semaphore", None)
+        idle = getattr(idle_sem, "_value", 0) if idle_sem is not None else 0
+        queued = pool._work_queue.qsize() if hasattr(pool, "_work_queue") else 0
+        return max(0, threads - idle), queued, pool._max_workers
+
+    def _loop(self):
+        import rate_limit
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                for name, pool in self._pools.items():
+                    self._samples[name].append(self._read(pool))
+                rl = rate_limit.stats()
+                if rl:
+                    self._samples["aoai_limiter"].append((rl["active"], rl["waiting"], rl["limit"]))
+                self._samples["threads"].append((threading.active_count(), 0, 0))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="pool-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def drain(self) -> dict:
+        """풀별 {busy_avg, busy_max, utilization, queue_max, saturated_pct} (saturated = 전부 사용 중 + 대기열 있음)"""
+        with self._lock:
+            samples, self._samples = self._samples, defaultdict(list)
+        out = {}
+        for name, rows in samples.items():
+            if not rows:
+                continue
+            if name == "threads":
+                out[name] = {"max": max(r[0] for r in rows)}
+                continue
+            cap = max(r[2] for r in rows) or 1
+            out[name] = {
+                "busy_avg": round(sum(r[0] for r in rows) / len(rows), 2),
+                "busy_max": max(r[0] for r in rows),
+                "capacity": cap,
+                "utilization": round(sum(r[0] for r in rows) / len(rows) / cap, 2),
+                "queue_max": max(r[1] for r in rows),
+                "saturated_pct": round(100 * sum(1 for r in rows if r[0] >= r[2] and r[1] > 0) / len(rows), 1),
+            }
+        return out
+
+
+# ===================== 부하 단계 =====================
+def parse_mix(text: str) -> list:
+    """'흐름=가중치,...' → [(이름, 가중치)]"""
+    out = []
+    for part in (text or "").split(","):
+        if not part.strip():
+            continue
+        name, _, w = part.partition("=")
+        out.append((name.strip(), float(w or 1)))
+    return out
+
+
+class Step:
+    def __init__(self, sessions: int):
+        self.sessions = sessions
+        self.lat = defaultdict(list)           # 흐름 -> [ms]
+        self.errors = defaultdict(list)        # 흐름 -> [메시지]
+        self._lock = threading.Lock()
+        self.wall = 0.0
+
+    def record(self, flow: str, ms: float = None, error: str = None):
+        with self._lock:
+            if error is None:
+                self.lat[flow].append(ms)
+            else:
+                self.errors[flow].append(error)
+
+
+def run_step(sessions: int, flows: dict, weights: list, *, duration: float, think: float,
+             reuse: float, counter, seed: int) -> Step:
+    """sessions개 세션이 duration초 동안 흐름을 반복 (진행 중인 흐름은 끝까지 기다림)"""
+    step = Step(sessions)
+    deadline = time.monotonic() + duration
+    names = [n for n, _ in weights]
+    probs = [w for _, w in weights]
+
+    def _session(sid):
+        rng = random.Random(seed * 1000 + sid)
+        time.sleep(rng.uniform(0, min(think, duration / 4)))      # 동시 시작 몰림 방지
+        while time.monotonic() < deadline:
+            flow = rng.choices(names, probs)[0]
+            i = 0 if rng.random() < reuse else next(counter)      # 0 = 인기 입력(캐시 공유)
+            t0 = time.perf_counter()
+            try:
+                flows[flow](i)
+                step.record(flow, (time.perf_counter() - t0) * 1000)
+            except Exception as e:
+                step.record(flow, error=f"{type(e).__name__}: {e}"[:200])
+            if think:
+                time.sleep(rng.expovariate(1.0 / think))
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=_session, args=(s,), name=f"session-{s}", daemon=True) for s in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    step.wall = time.perf_counter() - t0
+    return step
+
+
+def summarize(step: Step, lags: list, pools: dict, rss_base: float, rss_now: float) -> dict:
+    all_lat = [ms for v in step.lat.values() for ms in v]
+    n_err = sum(len(v) for v in step.errors.values())
+    return {
+        "sessions": step.sessions,
+        "flows": len(all_lat),
+        "errors": n_err,
+        "error_rate": round(n_err / (len(all_lat) + n_err), 3) if (all_lat or n_err) else 0.0,
+        "flows_per_sec": round(len(all_lat) / step.wall, 3) if step.wall else 0.0,
+        "p50_ms": round(percentile(all_lat, 50), 1),
+        "p95_ms": round(percentile(all_lat, 95), 1),
+        "pages": {
+            flow: {"n": len(v), "p50_ms": round(percentile(v, 50), 1), "p95_ms": round(percentile(v, 95), 1),
+                   "errors": len(step.errors.get(flow, []))}
+            for flow, v in sorted(step.lat.items())
+        },
+        "first_errors": {f: e[0] for f, e in step.errors.items() if e},
+        "loop_lag_ms": {"p50": round(percentile(lags, 50), 1), "p95": round(percentile(lags, 95), 1),
+                        "max": round(max(lags), 1) if lags else 0.0},
+        "pools": pools,
+        "rss_mb": round(rss_now, 1),
+        "mb_per_session": round(max(0.0, rss_now - rss_base) / step.sessions, 2),
+    }
+
+
+def knee(curve: list, *, slo_p95_ms: float, min_gain: float = 0.1) -> dict:
+    """
+    포화 지점: p95가 SLO를 넘거나 오류가 생기거나, 세션을 늘려도 처리량이 min_gain 미만으로만 느는 첫 단계.
+    반환: {"sessions": 마지막 정상 단계 세션 수, "reason": ...}
+    """
+    prev = None
+    for row in curve:
+        if slo_p95_ms and row["p95_ms"] > slo_p95_ms:
+            return {"sessions": prev["sessions"] if prev else 0, "reason": f"p95 {row['p95_ms']:.0f}ms > SLO @ {row['sessions']}"}
+        if row["error_rate"] > 0.01:
+            return {"sessions": prev["sessions"] if prev else 0, "reason": f"오류율 {row['error_rate']:.1%} @ {row['sessions']}"}
+        if prev and prev["flows_per_sec"] and row["flows_per_sec"] < prev["flows_per_sec"] * (1 + min_gain):
+            return {"sessions": prev["sessions"], "reason": f"처리량 정체 ({prev['flows_per_sec']} → {row['flows_per_sec']}/s) @ {row['sessions']}"}
+        prev = row
+    return {"sessions": prev["sessions"] if prev else 0, "reason": "측정 범위 내 포화 없음"}
+
+
+def render_curve(curve: list) -> str:
+    """세션 수별 처리량/p95 막대 그래프 (텍스트)"""
+    if not curve:
+        return ""
+    top_tp = max(r["flows_per_sec"] for r in curve) or 1
+    top_p95 = max(r["p95_ms"] for r in curve) or 1
+    lines = [f"{'sessions':>8}  {'flows/s':>8}  {'':<20}  {'p95 ms':>9}  {'':<20}  {'lag p95':>7}  {'MB/sess':>7}"]
+    for r in curve:
+        tp = "█" * round(20 * r["flows_per_sec"] / top_tp)
+        lat = "▒" * round(20 * r["p95_ms"] / top_p95)
+        lines.append(f"{r['sessions']:>8}  {r['flows_per_sec']:>8}  {tp:<20}  {r['p95_ms']:>9}  {lat:<20}  "
+                     f"{r['loop_lag_ms']['p95']:>7}  {r['mb_per_session']:>7}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="다중 세션 부하 테스트 (포화 곡선)")
+    add_stub_args(ap)
+    ap.add_argument("--sessions", default="1,2,4,8,16", help="단계별 동시 세션 수 (쉼표 구분)")
+    ap.add_argument("--step-sec", type=float, default=30.0, help="단계당 부하 시간(초)")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="흐름=가중치 목록 (bench.scenarios 이름)")
+    ap.add_argument("--think-ms", type=float, default=1000.0, help="흐름 사이 평균 대기(지수 분포)")
+    ap.add_argument("--reuse", type=float, default=0.2, help="인기 입력(캐시 공유)을 다시 쓰는 비율")
+    ap.add_argument("--slo-p95-ms", type=float, default=0.0, help="p95 목표 — 넘으면 포화로 판정 (0 = 미사용)")
+    ap.add_argument("--json", metavar="PATH", help="단계별 결과 JSON 저장 (- 는 stdout)")
+    ap.add_argument("--csv", metavar="PATH", help="포화 곡선 CSV 저장")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    levels = sorted({int(x) for x in args.sessions.split(",") if x.strip()})
+    stub = prepare(args.profile, args.overrides, index_run_sec=args.index_run_sec, seed=args.seed)
+    from bench import scenarios     # 환경을 맞춘 뒤에야 앱 모듈 import
+
+    weights = parse_mix(args.mix)
+    flows = {sc.name: scenarios.bind(sc) for sc in scenarios.select([n for n, _ in weights])}
+    for name, op in list(flows.items()):   # 준비 실행 (import/연결 생성이 첫 단계에 섞이지 않게)
+        print(f"▶ 준비: {name}", file=sys.stderr)
+        try:
+            op(0)
+        except Exception as e:
+            print(f"  ! {name} 제외 — 준비 실행 실패: {type(e).__name__}: {e}", file=sys.stderr)
+            del flows[name]
+    weights = [(n, w) for n, w in weights if n in flows]
+    if not weights:
+        stub.stop()
+        return 1
+
+    counter = itertools.count(1)        # 단계를 넘어 계속 증가 → 입력(캐시 키)이 겹치지 않음
+    probe, sampler = LagProbe().start(), PoolSampler().start()
+    rss_base = _rss_mb()
+    curve = []
+    try:
+        for n in levels:
+            print(f"▶ {n} 세션 × {args.step_sec:g}초", file=sys.stderr)
+            probe.drain(), sampler.drain()
+            step = run_step(n, flows, weights, duration=args.step_sec, think=args.think_ms / 1000.0,
+                            reuse=args.reuse, counter=counter, seed=args.seed)
+            row = summarize(step, probe.drain(), sampler.drain(), rss_base, _rss_mb())
+            curve.append(row)
+            print(f"  {row['flows']}건 · {row['flows_per_sec']}/s · p95 {row['p95_ms']}ms · "
+                  f"오류 {row['errors']} · lag p95 {row['loop_lag_ms']['p95']}ms", file=sys.stderr)
+    finally:
+        probe.stop()
+        sampler.stop()
+        stub_stats = stub.stats()
+        stub.stop()
+
+    result = knee(curve, slo_p95_ms=args.slo_p95_ms)
+    print()
+    print(render_curve(curve))
+    print(f"\n포화 지점: {result['sessions']} 세션 — {result['reason']}")
+    for row in curve:
+        hot = [f"{k} {v['utilization']:.0%}(큐 {v['queue_max']})" for k, v in row["pools"].items()
+               if "utilization" in v and (v["saturated_pct"] or v["utilization"] >= 0.8)]
+        if hot:
+            print(f"  {row['sessions']} 세션 포화 풀: " + ", ".join(hot))
+
+    report = {"profile": args.profile, "overrides": args.overrides, "mix": dict(weights),
+              "step_sec": args.step_sec, "think_ms": args.think_ms, "curve": curve, "knee": result,
+              "stubs": stub_stats}
+    if args.json == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8") as f:
+            f.write("sessions,flows,errors,flows_per_sec,p50_ms,p95_ms,loop_lag_p95_ms,rss_mb,mb_per_session\n")
+            for r in curve:
+                f.write(f"{r['sessions']},{r['flows']},{r['errors']},{r['flows_per_sec']},{r['p50_ms']},"
+                        f"{r['p95_ms']},{r['loop_lag_ms']['p95']},{r['rss_mb']},{r['mb_per_session']}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
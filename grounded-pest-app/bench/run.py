@@ -0,0 +1,237 @@
+# bench/run.py
+"""
+오프라인 벤치마크 실행기.
+  python -m bench.run                              # fast 프로필, 전체 시나리오
+  python -m bench.run --profile realistic -s news_search,pest_swot -n 30 -c 4
+  python -m bench.run --set aoai.latency_ms=1500 --set "*.error_rate=0.05"
+  python -m bench.run --save-baseline               # 현재 결과를 baselines.json에 기록
+스텁 서버를 띄우고 환경 변수를 스텁으로 돌린 뒤 앱 모듈을 import → 시나리오별 p50/p95/처리량/메모리 측정,
+저장된 기준값(프로필·모드별)보다 느려지면 종료 코드 1. grounded-pest-app 디렉터리에서 실행하세요.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.stubs import PROFILES, StubServer, make_profile
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# 앱 설정 기본값 — 매 반복이 스텁까지 내려가도록 디스크 캐시/사전 계산 결과/제한기를 끔 (환경 변수가 우선)
+BENCH_ENV = {
+    "AOAI_CACHE_ENABLED": "false",
+    "RESULT_STORE_ENABLED": "false",
+    "AOAI_WARMUP": "false",
+    "AOAI_RPM": "0",
+    "AOAI_TPM": "0",
+    "RETRIEVAL_BACKEND": "azure",
+}
+
+
+def percentile(values, q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)"""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * q / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def _rss_mb() -> float:
+    # Linux는 KB, macOS는 바이트 단위
+    ru = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(ru / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def prepare(profile: str, overrides=None, *, index_run_sec: float = 1.0, seed=None) -> StubServer:
+    """스텁 서버 시작 + 앱 환경 변수를 스텁으로 설정. 앱 모듈(config 등) import 전에 호출해야 함."""
+    stub = StubServer(make_profile(profile, overrides), index_run_sec=index_run_sec, seed=seed).start()
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    os.environ.update(stub.env())
+    for k, v in dict(BENCH_ENV, BM25_INDEX_PATH=os.path.join(tmp, "bm25.idx")).items():
+        os.environ.setdefault(k, v)
+    return stub
+
+
+def add_stub_args(ap: argparse.ArgumentParser):
+    """스텁 관련 공용 인자 (run.py / load.py)"""
+    ap.add_argument("--profile", default="fast", choices=sorted(PROFILES), help="스텁 지연/오류/크기 프리셋")
+    ap.add_argument("--set", dest="overrides", action="append", default=[], metavar="SVC.FIELD=VALUE",
+                    help="프로필 덮어쓰기 (예: aoai.latency_ms=1500, *.error_rate=0.05)")
+    ap.add_argument("--index-run-sec", type=float, default=1.0, help="스텁 인덱서 1회 실행 시간")
+    ap.add_argument("--seed", type=int, default=1234)
+
+
+# ===================== 측정 =====================
+def measure(sc, *, iterations: int, concurrency: int, warm: bool) -> dict:
+    from bench import scenarios as scn      # main()이 스텁 환경을 넣은 뒤에만 호출됨
+
+    op = scn.bind(sc)
+    scn.cold()
+    op(0)                                   # 준비 실행 (import/연결/클라이언트 생성 제외)
+    if not warm:
+        scn.cold()
+
+    lat, errors = [], []
+
+    def _one(i):
+        t0 = time.perf_counter()
+        try:
+            op(0 if warm else i)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        lat.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        list(pool.map(_one, range(1, iterations + 1)))
+    wall = time.perf_counter() - t0
+
+    # 메모리는 별도 1회 실행으로 (tracemalloc 오버헤드가 지연 측정에 섞이지 않게)
+    if not warm:
+        scn.cold()
+    tracemalloc.start()
+    try:
+        op(0 if warm else iterations + 1)
+    except Exception:
+        pass                                # 지연 측정에서 이미 집계됨
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "kind": sc.kind,
+        "n": len(lat),
+        "errors": len(errors),
+        "p50_ms": round(percentile(lat, 50), 1),
+        "p95_ms": round(percentile(lat, 95), 1),
+        "max_ms": round(max(lat), 1) if lat else 0.0,
+        "ops_per_sec": round(len(lat) / wall, 2) if wall else 0.0,
+        "peak_kb": round(peak / 1024),
+        "first_error": errors[0][:200] if errors else "",
+    }
+
+
+# ===================== 기준값 =====================
+def load_baselines(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def compare(results: dict, base: dict, *, tolerance: float, slack_ms: float) -> list:
+    """기준값 대비 회귀 목록 [(시나리오, 항목, 기준, 현재)]"""
+    out = []
+    for name, r in results.items():
+        b = base.get(name)
+        if not b:
+            continue
+        if r["p95_ms"] > b["p95_ms"] * (1 + tolerance) + slack_ms:
+            out.append((name, "p95_ms", b["p95_ms"], r["p95_ms"]))
+        if r["p50_ms"] > b["p50_ms"] * (1 + tolerance) + slack_ms:
+            out.append((name, "p50_ms", b["p50_ms"], r["p50_ms"]))
+        if b.get("ops_per_sec") and r["ops_per_sec"] < b["ops_per_sec"] * (1 - tolerance):
+            out.append((name, "ops_per_sec", b["ops_per_sec"], r["ops_per_sec"]))
+        if r["peak_kb"] > b.get("peak_kb", 0) * (1 + tolerance) + 512:
+            out.append((name, "peak_kb", b.get("peak_kb"), r["peak_kb"]))
+        if r["errors"] > b.get("errors", 0):
+            out.append((name, "errors", b.get("errors", 0), r["errors"]))
+    return out
+
+
+def _table(results: dict) -> str:
+    cols = ("n", "errors", "p50_ms", "p95_ms", "max_ms", "ops_per_sec", "peak_kb")
+    width = max([len(k) for k in results] + [8])
+    lines = [f"{'scenario':<{width}}  " + "  ".join(f"{c:>11}" for c in cols)]
+    for name, r in results.items():
+        lines.append(f"{name:<{width}}  " + "  ".join(f"{r[c]:>11}" for c in cols))
+        if r["first_error"]:
+            lines.append(f"{'':<{width}}  ! {r['first_error']}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="외부 서비스 스텁 기반 오프라인 벤치마크")
+    add_stub_args(ap)
+    ap.add_argument("-s", "--scenarios", default="", help="쉼표 구분 시나리오 (기본: 전체)")
+    ap.add_argument("--no-pages", action="store_true", help="AppTest 페이지 시나리오 제외")
+    ap.add_argument("-n", "--iterations", type=int, default=10, help="시나리오별 측정 횟수")
+    ap.add_argument("-c", "--concurrency", type=int, default=1, help="동시 실행 수")
+    ap.add_argument("--warm", action="store_true", help="같은 입력 반복 (캐시 hit 경로 측정)")
+    ap.add_argument("--baseline", default=BASELINE_PATH, help="기준값 파일")
+    ap.add_argument("--save-baseline", action="store_true", help="결과를 기준값으로 기록 (비교 생략)")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="허용 악화 비율")
+    ap.add_argument("--slack-ms", type=float, default=20.0, help="지연 비교 시 더해 주는 절대 여유(ms)")
+    ap.add_argument("--json", metavar="PATH", help="결과 JSON 저장 (- 는 stdout)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    stub = prepare(args.profile, args.overrides, index_run_sec=args.index_run_sec, seed=args.seed)
+    from bench import scenarios     # 환경을 맞춘 뒤에야 앱 모듈 import
+
+    names = [x.strip() for x in args.scenarios.split(",") if x.strip()]
+    selected = scenarios.select(names, None if names else (["core"] if args.no_pages else None))
+    mode = f"{args.profile}:{'warm' if args.warm else 'cold'}:c{args.concurrency}"
+    if args.overrides:
+        mode += ":" + ",".join(sorted(args.overrides))
+
+    results = {}
+    try:
+        for sc in selected:
+            print(f"▶ {sc.name} — {sc.desc}", file=sys.stderr)
+            try:
+                results[sc.name] = measure(sc, iterations=args.iterations, concurrency=max(1, args.concurrency),
+                                           warm=args.warm)
+            except Exception as e:      # setup/준비 실행 실패 — 다른 시나리오는 계속
+                results[sc.name] = {"kind": sc.kind, "n": 0, "errors": args.iterations, "p50_ms": 0.0,
+                                    "p95_ms": 0.0, "max_ms": 0.0, "ops_per_sec": 0.0, "peak_kb": 0,
+                                    "first_error": f"{type(e).__name__}: {e}"[:200]}
+    finally:
+        stub_stats = stub.stats()
+        stub.stop()
+
+    report = {"mode": mode, "results": results, "stubs": stub_stats, "rss_max_mb": _rss_mb()}
+    print(f"\n[{mode}] 최대 RSS {report['rss_max_mb']} MB")
+    print(_table(results))
+
+    rc = 0
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        baselines[mode] = {k: {f: v for f, v in r.items() if f != "first_error"} for k, r in results.items()}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n기준값 저장: {args.baseline} [{mode}]")
+    elif mode in baselines:
+        regressions = compare(results, baselines[mode], tolerance=args.tolerance, slack_ms=args.slack_ms)
+        report["regressions"] = [dict(zip(("scenario", "metric", "baseline", "current"), r)) for r in regressions]
+        if regressions:
+            rc = 1
+            print(f"\n회귀 {len(regressions)}건 (허용 {args.tolerance:.0%} + {args.slack_ms:g}ms):")
+            for name, metric, b, cur in regressions:
+                print(f"  {name}.{metric}: {b} → {cur}")
+        else:
+            print(f"\n기준값 대비 회귀 없음 [{mode}]")
+    else:
+        print(f"\n기준값 없음 [{mode}] — --save-baseline으로 기록하세요.")
+
+    if args.json == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
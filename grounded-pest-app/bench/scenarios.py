@@ -0,0 +1,220 @@
+# bench/scenarios.py
+"""
+벤치마크 시나리오 — 실제 utils/pipeline/jobs 함수와 페이지 흐름(Streamlit AppTest)을 그대로 실행.
+각 시나리오는 op(i) 1회가 측정 단위이며, i가 다르면 캐시 키가 달라지도록 입력을 바꿉니다
+(웜 모드에서는 run.py가 항상 i=0을 넘겨 캐시 hit 경로를 잽니다).
+config가 import 시점에 환경 변수를 읽으므로 run.py가 스텁 환경을 넣은 뒤 import해야 합니다.
+"""
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import cache
+import jobs
+import pipeline
+import retrieval
+import structured
+import utils
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PAGE = os.path.join(APP_DIR, "0_💼_AX_Biz_Insight.py")
+DOC_PAGE = os.path.join(APP_DIR, "pages", "1_📄_내부_문서_분석.py")
+COMBINED_PAGE = os.path.join(APP_DIR, "pages", "2_💡_통합_인사이트.py")
+
+COMPANY, TECHS, DOMAINS = "삼성SDS", ["AI"], ["금융"]
+PAGE_TIMEOUT = 120      # AppTest 스크립트 1회 실행 제한(초)
+
+
+@dataclass
+class Scenario:
+    name: str
+    op: callable                    # op(i) — 측정 단위 1회
+    kind: str = "core"              # core | page
+    desc: str = ""
+    setup: callable = None          # 측정 전 1회 (입력 데이터 준비 등)
+    state: dict = field(default_factory=dict)
+
+
+SCENARIOS = {}
+
+
+def scenario(name: str, kind: str = "core", setup=None):
+    def deco(fn):
+        SCENARIOS[name] = Scenario(name, fn, kind, (fn.__doc__ or "").strip(), setup)
+        return fn
+    return deco
+
+
+def cold():
+    """프로세스 메모리 캐시 전체 비우기 (시나리오 시작 전)"""
+    for ns in list(cache.store.stats()):
+        cache.store.invalidate(ns)
+
+
+def _company(i: int) -> str:
+    return f"{COMPANY} {i}" if i else COMPANY
+
+
+def _context():
+    """통합 인사이트 입력 (뉴스 + 내부 문서 조각) — 측정 밖에서 1회 수집"""
+    news, _ = utils.fetch_news_all(" ".join([COMPANY, *TECHS, *DOMAINS]), 2, "Week")
+    hits = utils.search_docs_by_keyword("보안 요구사항", top=8)
+    if not (news and hits):
+        raise RuntimeError(f"입력 준비 실패 (뉴스 {len(news)}건, 문서 {len(hits)}건)")
+    return {"news": news, "hits": hits}
+
+
+def _compact_context():
+    """통합 인사이트 압축 입력 — 원문 입력 + 같은 뉴스의 PEST·SWOT JSON + 문서 통합 요약"""
+    ctx = _context()
+    messages = utils.build_messages_news(COMPANY, TECHS, DOMAINS, ctx["news"])
+    text = utils.run_aoai(messages, response_format=structured.response_format("pest_swot"))
+    ctx["pest_swot"] = utils.complete_json("pest_swot", messages, text)[1]
+    ctx["doc_summary"] = utils.summarize_docs_combined(ctx["hits"], query="보안 요구사항")
+    return ctx
+
+
+# ===================== 코어 (utils / pipeline / jobs) =====================
+@scenario("news_search")
+def news_search(i):
+    """공급자 병렬 조회 + 병합/근사 중복 제거 (utils.fetch_news_all)"""
+    news, status = utils.fetch_news_all(" ".join([_company(i), *TECHS, *DOMAINS]), 2, "Week")
+    if not news:
+        raise RuntimeError(f"뉴스 없음: {status}")
+
+
+@scenario("pest_swot")
+def pest_swot(i):
+    """뉴스 수집 → PEST·SWOT JSON (pipeline.run_pest_swot, 저장소 미사용)"""
+    res = pipeline.run_pest_swot(_company(i), TECHS, DOMAINS, cnt=2, use_store=False)
+    if not res.ok:
+        raise RuntimeError(res.error)
+
+
+@scenario("upload_poll")
+def upload_poll(i):
+    """Blob 업로드 → 인덱서 실행 대기 → blob 이름 검색 (jobs.upload_and_index)"""
+    job = jobs.Job(id=uuid.uuid4().hex, kind="bench")
+    kb = float(os.getenv("BENCH_UPLOAD_KB", "256"))
+    data = b"%PDF-1.4\n" + os.urandom(int(kb * 1024))
+    out = jobs.upload_and_index(job, data, f"{uuid.uuid4().hex}_bench_{i}.pdf")
+    if not out.get("hits"):
+        raise RuntimeError("인덱싱 결과 없음")
+
+
+@scenario("upload_job")
+def upload_job(i):
+    """업로드 페이지 방식: jobs.submit으로 작업 풀에 넣고 상태를 1초 간격으로 조회"""
+    kb = float(os.getenv("BENCH_UPLOAD_KB", "256"))
+    data = b"%PDF-1.4\n" + os.urandom(int(kb * 1024))
+    job_id = jobs.submit("upload", jobs.upload_and_index, data, f"{uuid.uuid4().hex}_bench_{i}.pdf")
+    deadline = time.monotonic() + PAGE_TIMEOUT
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id) or {}
+        if job.get("status") == "done":
+            if not (job.get("result") or {}).get("hits"):
+                raise RuntimeError("인덱싱 결과 없음")
+            return
+        if job.get("status") == "failed":
+            raise RuntimeError(job.get("error") or "작업 실패")
+        time.sleep(1.0)
+    raise TimeoutError("업로드 작업 시간 초과")
+
+
+@scenario("keyword_search")
+def keyword_search(i):
+    """키워드 검색 (retrieval.search → 후보 병렬 검색)"""
+    hits = retrieval.search(f"보안 요구사항 {i}" if i else "보안 요구사항", top=8)
+    if not hits:
+        raise RuntimeError("검색 결과 없음")
+
+
+@scenario("combined_insight", setup=_context)
+def combined_insight(i, news=None, hits=None):
+    """뉴스 + 내부 문서 → 통합 인사이트 JSON (pipeline.run_combined)"""
+    data = pipeline.run_combined(news, hits, _company(i), TECHS, DOMAINS)
+    if not data:
+        raise RuntimeError("JSON 파싱 실패")
+
+
+@scenario("combined_insight_compact", setup=_compact_context)
+def combined_insight_compact(i, news=None, hits=None, pest_swot=None, doc_summary=None):
+    """PEST·SWOT + 문서 요약을 압축 근거로 쓰는 통합 인사이트 (combined_insight와 비교용)"""
+    data = pipeline.run_combined(news, hits, _company(i), TECHS, DOMAINS, pest_swot=pest_swot, doc_summary=doc_summary)
+    if not data:
+        raise RuntimeError("JSON 파싱 실패")
+
+
+# ===================== 페이지 흐름 (AppTest) =====================
+def _apptest(path):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(path, default_timeout=PAGE_TIMEOUT)
+
+
+def _check(at, step: str):
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+    errors = [e.value for e in at.error]
+    if errors:
+        raise RuntimeError(f"{step}: {errors[0]}")
+
+
+@scenario("page_news_pest", kind="page")
+def page_news_pest(i):
+    """메인 페이지: 회사 입력 → 🔎 뉴스 검색 → 📊 PEST·SWOT 생성 (스트리밍)"""
+    at = _apptest(MAIN_PAGE)
+    at.run()
+    _check(at, "첫 렌더")
+    at.selectbox("sel_company").set_value("기타(직접입력)").run()
+    at.text_input("txt_company_custom").input(_company(i)).run()
+    at.button("btn_news_search").click().run()
+    _check(at, "뉴스 검색")
+    at.button("btn_pest_swot").click().run()
+    _check(at, "PEST·SWOT")
+    if not at.session_state["pest_swot_json"]:
+        raise RuntimeError("PEST·SWOT 결과 없음")
+
+
+@scenario("page_keyword_search", kind="page")
+def page_keyword_search(i):
+    """내부 문서 페이지: 키워드 검색 → 통합 요약 렌더"""
+    at = _apptest(DOC_PAGE)
+    at.run()
+    at.text_input("txt_q_doc").input(f"보안 요구사항 {i}" if i else "보안 요구사항").run()
+    at.button("btn_fetch_by_kw").click().run()
+    _check(at, "키워드 검색")
+    if not at.session_state["doc_hits"]:
+        raise RuntimeError("검색 결과 없음")
+
+
+@scenario("page_combined_insight", kind="page", setup=_context)
+def page_combined_insight(i, news=None, hits=None):
+    """통합 인사이트 페이지: 세션에 뉴스/문서 조각을 넣고 💡 생성 (스트리밍)"""
+    at = _apptest(COMBINED_PAGE)
+    at.session_state["news_results"] = news
+    at.session_state["doc_hits"] = hits
+    at.session_state["txt_company_custom"] = _company(i)
+    at.session_state["ms_techs"], at.session_state["ms_domains"] = TECHS, DOMAINS
+    at.run()
+    at.button("btn_run_combined").click().run()
+    _check(at, "통합 인사이트")
+    if not at.session_state["combined_json"]:
+        raise RuntimeError("통합 인사이트 결과 없음")
+
+
+def select(names=None, kinds=None) -> list:
+    """이름(쉼표 구분 목록) 또는 종류로 시나리오 선택"""
+    if names:
+        unknown = [n for n in names if n not in SCENARIOS]
+        if unknown:
+            raise ValueError(f"알 수 없는 시나리오: {', '.join(unknown)} (가능: {', '.join(SCENARIOS)})")
+        return [SCENARIOS[n] for n in names]
+    return [s for s in SCENARIOS.values() if not kinds or s.kind in kinds]
+
+
+def bind(sc: Scenario):
+    """setup 결과를 op 키워드 인자로 묶은 호출 가능 객체"""
+    if sc.setup and not sc.state:
+        sc.state.update(sc.setup() or {})
+    return lambda i: sc.op(i, **sc.state)
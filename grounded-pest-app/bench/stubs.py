@@ -0,0 +1,451 @@
+# bench/stubs.py
+"""
+외부 서비스 로컬 대역(stub) — NewsAPI, Naver, Azure OpenAI, Azure AI Search(+인덱서), Azure Blob.
+- 하나의 ThreadingHTTPServer가 경로로 서비스를 구분 (/newsapi, /naver, /openai, /indexes·/indexers, /devstoreaccount1)
+- 서비스별 지연/지터/오류율(429·503)/응답 크기를 ServiceProfile로 조정
+- AOAI는 일반 JSON(usage 포함)과 SSE 스트리밍을 모두 지원, 인덱서는 run → inProgress → success 상태를 흉내
+StubServer.env()의 값을 config import 전에 환경 변수로 넣어야 앱이 스텁을 바라봅니다.
+"""
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+SERVICES = ("newsapi", "naver", "aoai", "search", "blob")
+
+_WORDS = (
+    "클라우드 전환 생성형 AI 금융권 규제 데이터 플랫폼 보안 인증 투자 확대 협력 발표 공공 사업 수주 "
+    "디지털 혁신 인프라 구축 운영 효율 고객 경험 자동화 모델 학습 거버넌스 비용 절감 시장 점유율 "
+    "파트너십 솔루션 출시 서비스 고도화 매출 성장 인재 확보 전략 발표 실증 사업 확산 표준"
+).split()
+
+
+@dataclass
+class ServiceProfile:
+    latency_ms: float = 20.0      # 응답 시작까지 지연 (AOAI 스트리밍은 첫 청크까지)
+    jitter_ms: float = 5.0        # ± 균등 분포
+    error_rate: float = 0.0       # 429/503으로 응답할 비율
+    payload_kb: float = 1.0       # 기사/문서/완료 텍스트의 대략적 크기
+    chunk_ms: float = 0.0         # AOAI 스트리밍 청크 간격
+
+    def delay(self, rng: random.Random) -> float:
+        return max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+
+
+def _uniform(**kw) -> dict:
+    return {s: ServiceProfile(**kw) for s in SERVICES}
+
+
+PROFILES = {
+    # 스택 자체 오버헤드 측정용 (네트워크 지연 거의 없음)
+    "fast": _uniform(latency_ms=2, jitter_ms=1),
+    # 실제 서비스에서 관측되는 수준의 지연/크기
+    "realistic": {
+        "newsapi": ServiceProfile(250, 80, 0.0, 2),
+        "naver": ServiceProfile(120, 40, 0.0, 2),
+        "aoai": ServiceProfile(900, 300, 0.0, 2, chunk_ms=15),
+        "search": ServiceProfile(150, 50, 0.0, 4),
+        "blob": ServiceProfile(200, 60, 0.0, 0),
+    },
+}
+PROFILES["flaky"] = {s: replace(p, error_rate=0.1) for s, p in PROFILES["realistic"].items()}
+
+
+def make_profile(name: str = "fast", overrides=None) -> dict:
+    """
+    PROFILES[name] 복사본에 "서비스.필드=값" 덮어쓰기 적용.
+    서비스 자리에 '*'를 쓰면 전체 (예: "*.error_rate=0.05", "aoai.latency_ms=1500").
+    """
+    if name not in PROFILES:
+        raise ValueError(f"알 수 없는 프로필: {name} (가능: {', '.join(PROFILES)})")
+    prof = {s: replace(p) for s, p in PROFILES[name].items()}
+    for item in overrides or []:
+        try:
+            lhs, value = item.split("=", 1)
+            svc, fld = lhs.split(".", 1)
+        except ValueError:
+            raise ValueError(f"잘못된 덮어쓰기 형식: {item!r} (예: aoai.latency_ms=500)")
+        targets = SERVICES if svc == "*" else [svc]
+        for s in targets:
+            if s not in prof or not hasattr(prof[s], fld):
+                raise ValueError(f"알 수 없는 항목: {s}.{fld}")
+            setattr(prof[s], fld, float(value))
+    return prof
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _sentence(rng: random.Random, n: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)) + "."
+
+
+def _text(rng: random.Random, kb: float) -> str:
+    """대략 kb 킬로바이트(UTF-8) 분량의 한국어 문장"""
+    out, size, target = [], 0, max(64, int(kb * 1024))
+    while size < target:
+        s = _sentence(rng)
+        out.append(s)
+        size += len(s.encode("utf-8")) + 1
+    return " ".join(out)
+
+
+# ===================== 상태 (Blob 업로드 → 인덱서 → 검색) =====================
+class _IndexState:
+    def __init__(self, run_sec: float):
+        self.run_sec = run_sec
+        self.lock = threading.Lock()
+        self.uploaded = {}          # blob 이름 -> (업로드 시각, 크기)
+        self.indexed = {}           # blob 이름 -> 크기
+        self.history = []           # 실행 기록 (최신이 앞)
+
+    def _advance(self, now: float):
+        run = self.history[0] if self.history else None
+        if run and run["status"] == "inProgress" and now - run["_start"] >= self.run_sec:
+            run["status"] = "success"
+            run["endTime"] = _iso(run["_start"] + self.run_sec)
+            for name, (at, size) in self.uploaded.items():
+                if at <= run["_start"]:
+                    self.indexed[name] = size
+
+    def run(self) -> bool:
+        """새 실행 시작 (이미 실행 중이면 False → 409)"""
+        now = time.time()
+        with self.lock:
+            self._advance(now)
+            if self.history and self.history[0]["status"] == "inProgress":
+                return False
+            self.history.insert(0, {"status": "inProgress", "startTime": _iso(now), "endTime": None, "_start": now})
+            del self.history[10:]
+            return True
+
+    def reset(self):
+        with self.lock:
+            self.indexed.clear()
+
+    def status(self) -> dict:
+        with self.lock:
+            self._advance(time.time())
+            hist = [{k: v for k, v in r.items() if not k.startswith("_")} for r in self.history]
+        return {"status": "running", "lastResult": hist[0] if hist else None, "executionHistory": hist}
+
+    def upload(self, name: str, size: int):
+        with self.lock:
+            self.uploaded[name] = (time.time(), size)
+
+    def matching(self, term: str) -> list:
+        with self.lock:
+            return [(n, s) for n, s in self.indexed.items() if term and term in n]
+
+
+# ===================== 요청 처리 =====================
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # ---- 공통 ----
+    def _body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+    def _send(self, status: int, body=b"", headers=None, ctype="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        if body or status not in (201, 202, 204):
+            self.send_header("Content-Type", ctype)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if status != 204:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        self.server.count(self._svc, bytes_out=len(body))
+
+    def _service(self, path: str) -> str:
+        if path.startswith("/newsapi/"):
+            return "newsapi"
+        if path.startswith("/naver/"):
+            return "naver"
+        if path.startswith("/openai/"):
+            return "aoai"
+        if path.startswith(("/indexes", "/indexers")):
+            return "search"
+        if path.startswith("/devstoreaccount1/"):
+            return "blob"
+        return ""
+
+    def _dispatch(self, method: str):
+        parts = urlsplit(self.path)
+        path, query = unquote(parts.path), parse_qs(parts.query)
+        self._svc = self._service(path)
+        body = self._body() if method in ("POST", "PUT") else b""
+        if not self._svc:
+            return self._send(404, {"error": f"no stub for {path}"})
+        prof = self.server.profile[self._svc]
+        rng = self.server.rng()
+        self.server.count(self._svc, requests=1)
+        if prof.error_rate and rng.random() < prof.error_rate:
+            time.sleep(prof.delay(rng) / 4)
+            status = 429 if self._svc == "aoai" or rng.random() < 0.5 else 503
+            self.server.count(self._svc, errors=1)
+            return self._send(status, {"error": {"code": str(status), "message": "stub injected error"}},
+                              headers={"retry-after-ms": "200", "Retry-After": "1"})
+        handler = getattr(self, f"_{self._svc}")
+        return handler(method, path, query, body, prof, rng)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    # ---- 뉴스 ----
+    def _articles(self, q: str, n: int, prof, rng):
+        seed = random.Random(f"{q}:{n}")
+        for i in range(n):
+            yield {
+                "title": f"{q} {seed.choice(_WORDS)} {seed.choice(_WORDS)} 관련 보도 {i + 1}",
+                "snippet": _text(seed, prof.payload_kb / 2),
+                "url": f"https://news.example.com/{uuid.UUID(int=seed.getrandbits(128)).hex}",
+                "published": _iso(time.time() - 3600 * (i + 1)),
+            }
+
+    def _newsapi(self, method, path, query, body, prof, rng):
+        time.sleep(prof.delay(rng))
+        q = (query.get("q") or [""])[0]
+        n = int((query.get("pageSize") or ["5"])[0])
+        arts = [{"title": a["title"], "description": a["snippet"], "content": a["snippet"], "url": a["url"],
+                 "publishedAt": a["published"], "source": {"name": "Bench Daily"}}
+                for a in self._articles(q, n, prof, rng)]
+        self._send(200, {"status": "ok", "totalResults": len(arts), "articles": arts})
+
+    def _naver(self, method, path, query, body, prof, rng):
+        time.sleep(prof.delay(rng))
+        q = (query.get("query") or [""])[0]
+        n = int((query.get("display") or ["5"])[0])
+        items = [{"title": f"<b>{a['title']}</b>", "description": a["snippet"], "link": a["url"],
+                  "originallink": a["url"], "pubDate": a["published"]}
+                 for a in self._articles("N " + q, n, prof, rng)]
+        self._send(200, {"total": len(items), "display": len(items), "items": items})
+
+    # ---- Azure OpenAI ----
+    @staticmethod
+    def _completion(messages, prof, rng) -> str:
+        prompt = "\n".join(str(m.get("content") or "") for m in messages or [])
+        k = max(1, int(prof.payload_kb * 2))          # 항목 수로 크기 조절
+        items = lambda tag="": [_sentence(rng) + (f" [{tag}{i + 1}]" if tag else "") for i in range(k)]
+        if '"internal_summary"' in prompt:
+            return json.dumps({
+                "internal_summary": items("D"), "strengths": items("D"), "weaknesses": items("D"),
+                "external_insights": items("N"),
+                "proposals": {"benchmarking": items("N"), "cooperation": items("N"),
+                              "differentiation": items("D"), "execution_kpis": items()},
+            }, ensure_ascii=False)
+        if '"PEST"' in prompt:
+            return json.dumps({
+                "PEST": {x: items("N") for x in "PEST"},
+                "SWOT": {x: items("N") for x in "SWOT"},
+                "one_liner": _sentence(rng),
+            }, ensure_ascii=False)
+        return _text(rng, prof.payload_kb / 2)
+
+    def _aoai(self, method, path, query, body, prof, rng):
+        if not path.endswith("/chat/completions"):
+            time.sleep(prof.delay(rng) / 4)
+            return self._send(200, {"object": "list", "data": []})     # warm_up()의 models.list
+        req = json.loads(body or b"{}")
+        content = self._completion(req.get("messages"), prof, rng)
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in req.get("messages") or []) // 2
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 2,
+                 "total_tokens": prompt_tokens + len(content) // 2}
+        cid, created, model = f"chatcmpl-{uuid.uuid4().hex[:12]}", int(time.time()), req.get("model") or "stub"
+        time.sleep(prof.delay(rng))
+        if not req.get("stream"):
+            return self._send(200, {
+                "id": cid, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        # SSE (chunked) — 40자 단위 델타, 마지막에 usage 청크(요청 시) + [DONE]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+
+        def _event(obj):
+            nonlocal sent
+            data = b"data: " + (obj if isinstance(obj, bytes) else json.dumps(obj, ensure_ascii=False).encode("utf-8")) + b"\n\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+            sent += len(data)
+
+        base = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model}
+        _event(dict(base, choices=[]))          # Azure 콘텐츠 필터 결과 청크 흉내
+        for i in range(0, len(content), 40):
+            if prof.chunk_ms:
+                time.sleep(prof.chunk_ms / 1000.0)
+            _event(dict(base, choices=[{"index": 0, "delta": {"content": content[i:i + 40]}, "finish_reason": None}]))
+        _event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (req.get("stream_options") or {}).get("include_usage"):
+            _event(dict(base, choices=[], usage=usage))
+        _event(b"[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.server.count("aoai", bytes_out=sent)
+
+    # ---- Azure AI Search (+ 인덱서) ----
+    def _search(self, method, path, query, body, prof, rng):
+        state = self.server.index
+        parts = [p for p in path.split("/") if p]
+        time.sleep(prof.delay(rng))
+        if parts[0] == "indexers" and len(parts) == 3:
+            action = parts[2]
+            if action == "status":
+                return self._send(200, state.status())
+            if action == "run":
+                return self._send(202) if state.run() else self._send(409, {"error": {"message": "already running"}})
+            if action == "reset":
+                state.reset()
+                return self._send(204)
+        if parts[0] == "indexes" and len(parts) == 2 and method == "GET":
+            return self._send(200, {"name": parts[1], "fields": [
+                {"name": "content", "type": "Edm.String", "searchable": True},
+                {"name": "title", "type": "Edm.String", "searchable": True},
+                {"name": "metadata_storage_name", "type": "Edm.String", "filterable": True},
+                {"name": "metadata_storage_path", "type": "Edm.String"},
+            ]})
+        if parts[0] == "indexes" and parts[2:] == ["docs", "search"]:
+            req = json.loads(body or b"{}")
+            term = str(req.get("search") or "").strip().strip('"')
+            top = int(req.get("top") or 8)
+            blobs = state.matching(term)
+            seed = random.Random(term)
+            if blobs:
+                docs = [{"metadata_storage_name": name, "title": name,
+                         "metadata_storage_path": f"{self.server.url}/devstoreaccount1/docs/{name}",
+                         "content": _text(seed, max(prof.payload_kb, size / 1024 / top)), "@search.score": 1.0}
+                        for name, size in blobs for _ in range(min(top, 3))]
+            else:
+                docs = [{"metadata_storage_name": f"corpus_{i}.pdf", "title": f"{term} 내부 문서 {i + 1}",
+                         "metadata_storage_path": f"{self.server.url}/devstoreaccount1/docs/corpus_{i}.pdf",
+                         "content": f"{term} " + _text(seed, prof.payload_kb), "@search.score": 1.0 / (i + 1)}
+                        for i in range(top)]
+            return self._send(200, {"value": docs[:top]})
+        return self._send(404, {"error": {"message": f"no search route for {path}"}})
+
+    # ---- Azure Blob ----
+    def _blob(self, method, path, query, body, prof, rng):
+        # /devstoreaccount1/{container}/{blob...}
+        parts = path.split("/", 3)
+        time.sleep(prof.delay(rng))
+        if method != "PUT" or len(parts) < 4:
+            return self._send(404, b"", ctype="application/xml")
+        self.server.index.upload(parts[3], len(body))
+        self._send(201, headers={
+            "ETag": f'"0x{uuid.uuid4().hex[:15].upper()}"',
+            "Last-Modified": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+            "x-ms-request-id": str(uuid.uuid4()),
+            "x-ms-version": self.headers.get("x-ms-version") or "2023-11-03",
+            "x-ms-request-server-encrypted": "true",
+        })
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, profile: dict, index_run_sec: float, seed):
+        super().__init__(addr, _Handler)
+        self.profile = profile
+        self.index = _IndexState(index_run_sec)
+        self.url = f"http://{addr[0]}:{self.server_address[1]}"
+        self._seed = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {s: {"requests": 0, "errors": 0, "bytes_out": 0} for s in SERVICES}
+
+    def rng(self) -> random.Random:
+        with self._lock:
+            return random.Random(self._seed.getrandbits(64))
+
+    def count(self, svc: str, **fields):
+        if svc not in self.counters:
+            return
+        with self._lock:
+            for k, v in fields.items():
+                self.counters[svc][k] += v
+
+
+class StubServer:
+    """
+    with StubServer(make_profile("realistic")) as stub:
+        os.environ.update(stub.env())
+    """
+
+    def __init__(self, profile: dict = None, *, host: str = "127.0.0.1", port: int = 0,
+                 index_run_sec: float = 1.0, seed=None):
+        self._server = _Server((host, port), profile or make_profile(), index_run_sec, seed)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return self._server.url
+
+    @property
+    def profile(self) -> dict:
+        return self._server.profile
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._server._lock:
+            return {s: dict(c) for s, c in self._server.counters.items() if c["requests"]}
+
+    def env(self) -> dict:
+        """앱 설정을 스텁으로 돌리는 환경 변수 (키 값은 형식만 맞춘 더미)"""
+        key = base64.b64encode(b"bench-stub-account-key").decode()
+        return {
+            "NEWSAPI_KEY": "bench",
+            "NEWSAPI_URL": f"{self.url}/newsapi/v2/everything",
+            "NAVER_CLIENT_ID": "bench",
+            "NAVER_CLIENT_SECRET": "bench",
+            "NAVER_NEWS_URL": f"{self.url}/naver/v1/search/news.json",
+            "AZURE_OPENAI_ENDPOINT": self.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_DEPLOYMENT": "bench-deploy",
+            "AZURE_STORAGE_CONN": (f"DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+                                   f"AccountKey={key};BlobEndpoint={self.url}/devstoreaccount1;"),
+            "AZURE_BLOB_CONTAINER": "docs",
+            "AZURE_SEARCH_ENDPOINT": self.url,
+            "AZURE_SEARCH_KEY": "bench",
+            "AZURE_SEARCH_INDEX": "bench-index",
+            "AZURE_SEARCH_INDEXER": "bench-indexer",
+        }
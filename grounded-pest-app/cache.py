@@ -0,0 +1,201 @@
+# cache.py
+"""
+네임스페이스 단위 in-process 캐시 (st.cache_data 전역 clear 대체).
+- 함수별 네임스페이스 + 인자 기반 키 → 특정 항목만 무효화 가능
+- 항목마다 사용한 세션을 기록 → 세션 초기화 시 그 세션만 쓰던 항목만 제거
+- 무효화마다 제거 건수를 카운터/이력으로 남김
+- miss 시 같은 키의 동시 호출은 single-flight로 1회만 실행하고 결과를 공유
+"""
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+
+import metrics
+import runtime
+import singleflight
+
+
+def _canon(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "args", "owners")
+
+    def __init__(self, value, expires, args, owners):
+        self.value = value
+        self.expires = expires
+        self.args = args
+        self.owners = owners
+
+
+class NamespacedCache:
+    def __init__(self, history: int = 50):
+        self._lock = threading.RLock()
+        self._data = defaultdict(OrderedDict)   # ns -> key -> _Entry
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "evicted": 0, "invalidations": 0})
+        self.history = deque(maxlen=history)     # (시각, 범위, 제거 건수)
+
+    def get(self, ns: str, key: str, session=None, *, record: bool = True):
+        """(found, value) 반환. 만료 항목은 제거 후 miss 처리. record=False면 hit/miss 집계 제외."""
+        with self._lock:
+            bucket = self._data.get(ns)
+            ent = bucket.get(key) if bucket else None
+            if ent is not None and ent.expires is not None and ent.expires < time.time():
+                del bucket[key]
+                ent = None
+            if ent is None:
+                if record:
+                    self._stats[ns]["misses"] += 1
+                return False, None
+            bucket.move_to_end(key)
+            if session:
+                ent.owners.add(session)
+            if record:
+                self._stats[ns]["hits"] += 1
+            return True, ent.value
+
+    def set(self, ns: str, key: str, value, *, ttl=None, args=None, session=None, max_entries: int = 256):
+        with self._lock:
+            bucket = self._data[ns]
+            old = bucket.pop(key, None)
+            owners = old.owners if old else set()
+            if session:
+                owners.add(session)
+            expires = (time.time() + ttl) if ttl else None
+            bucket[key] = _Entry(value, expires, args or {}, owners)
+            while len(bucket) > max_entries:
+                bucket.popitem(last=False)
+
+    def invalidate(self, ns: str, match: dict = None) -> int:
+        """ns 전체 또는 인자(match)가 일치하는 항목만 제거. 제거 건수 반환."""
+        with self._lock:
+            bucket = self._data.get(ns)
+            if not bucket:
+                n = 0
+            elif not match:
+                n = len(bucket)
+                bucket.clear()
+            else:
+                doomed = [k for k, e in bucket.items()
+                          if all(e.args.get(a) == v for a, v in match.items())]
+                for k in doomed:
+                    del bucket[k]
+                n = len(doomed)
+            self._record(ns, f"{ns}{'(' + ', '.join(match) + ')' if match else ''}", n)
+            return n
+
+    def invalidate_session(self, session) -> int:
+        """세션 소유 표시를 지우고, 다른 세션이 쓰지 않는 항목만 제거."""
+        if not session:
+            return 0
+        total = 0
+        with self._lock:
+            for ns, bucket in self._data.items():
+                doomed = []
+                for k, e in bucket.items():
+                    if session in e.owners:
+                        e.owners.discard(session)
+                        if not e.owners:
+                            doomed.append(k)
+                for k in doomed:
+                    del bucket[k]
+                if doomed:
+                    self._stats[ns]["evicted"] += len(doomed)
+                total += len(doomed)
+            self.history.append((time.time(), f"session:{str(session)[:8]}", total))
+        return total
+
+    def _record(self, ns, scope, n):
+        self._stats[ns]["evicted"] += n
+        self._stats[ns]["invalidations"] += 1
+        self.history.append((time.time(), scope, n))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {ns: dict(s, entries=len(self._data.get(ns) or {})) for ns, s in self._stats.items()}
+
+
+store = NamespacedCache()
+
+
+def cached(namespace: str = None, *, ttl: float = 3600, max_entries: int = 256, show_spinner=None):
+    """
+    st.cache_data 대체 데코레이터. '_'로 시작하는 인자는 키에서 제외(st.cache_data와 동일 규칙).
+    예외는 캐싱하지 않음. 래핑된 함수에 .invalidate(*args, **kwargs) / .clear() 제공.
+    """
+    def deco(fn):
+        ns = namespace or fn.__name__
+        sig = inspect.signature(fn)
+        flights = singleflight.get_group(ns)
+
+        def _args(bound):
+            return {k: _canon(v) for k, v in bound.arguments.items() if not k.startswith("_")}
+
+        def _key(args):
+            return hashlib.sha256(_canon(args).encode("utf-8")).hexdigest()
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            bound = sig.bind(*a, **kw)
+            bound.apply_defaults()
+            args = _args(bound)
+            key = _key(args)
+            sid = runtime.session_id()
+            found, value = store.get(ns, key, sid)
+            metrics.cache_event(ns, found)
+            if not found:
+                def _load():
+                    hit, v = store.get(ns, key, record=False)   # 앞선 리더가 방금 채웠을 수 있음
+                    if hit:
+                        return v
+                    v = fn(*a, **kw)
+                    store.set(ns, key, v, ttl=ttl, args=args, session=sid, max_entries=max_entries)
+                    return v
+
+                with runtime.spinner(show_spinner):
+                    value, shared = flights.do(key, _load)
+                if shared:
+                    store.get(ns, key, sid, record=False)   # 합쳐진 호출자 세션도 항목 소유자로 기록
+            # 호출부가 결과를 수정해도 캐시 원본은 보존
+            return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+
+        def invalidate(*a, **kw) -> int:
+            """주어진 인자와 일치하는 항목만 제거 (인자가 없으면 네임스페이스 전체)"""
+            bound = sig.bind_partial(*a, **kw)
+            return store.invalidate(ns, _args(bound))
+
+        def prime(value, *a, **kw):
+            """함수를 실행하지 않고 해당 인자의 캐시 값을 채움 (스트리밍 결과 저장 등)"""
+            bound = sig.bind(*a, **kw)
+            bound.apply_defaults()
+            args = _args(bound)
+            store.set(ns, _key(args), value, ttl=ttl, args=args, session=runtime.session_id(),
+                      max_entries=max_entries)
+
+        def cache_key(*a, **kw) -> str:
+            """캐시/single-flight 공용 키 (run_aoai_stream이 같은 요청과 합쳐지는 데 사용)"""
+            bound = sig.bind(*a, **kw)
+            bound.apply_defaults()
+            return _key(_args(bound))
+
+        def peek(*a, **kw):
+            """실행 없이 캐시만 조회 → (found, value)"""
+            bound = sig.bind(*a, **kw)
+            bound.apply_defaults()
+            return store.get(ns, _key(_args(bound)), runtime.session_id())
+
+        wrapper.invalidate = invalidate
+        wrapper.prime = prime
+        wrapper.peek = peek
+        wrapper.cache_key = cache_key
+        wrapper.clear = lambda: store.invalidate(ns)
+        wrapper.namespace = ns
+        wrapper.flights = flights
+        return wrapper
+    return deco
@@ -1,9 +1,11 @@
 # config.py
 import os
-import streamlit as st
-from azure.storage.blob import BlobServiceClient
+import threading
+import time
 from dotenv import load_dotenv
 
+import startup
+
 # .env 파일에서 환경 변수 로드 (로컬 테스트용)
 try:
     load_dotenv()
@@ -14,6 +16,8 @@ except Exception:
 NEWS_KEY = os.getenv("NEWSAPI_KEY")
 NAVER_ID = os.getenv("NAVER_CLIENT_ID")
 NAVER_SECRET = os.getenv("NAVER_CLIENT_SECRET")
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")                 # 벤치마크 스텁 등으로 교체 가능
+NAVER_NEWS_URL = os.getenv("NAVER_NEWS_URL", "https://openapi.naver.com/v1/search/news.json")
 
 AOAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 AOAI_KEY = os.getenv("AZURE_OPENAI_API_KEY")
@@ -29,28 +33,145 @@ SEARCH_INDEX = (os.getenv("AZURE_SEARCH_INDEX") or "").strip()
 SEARCH_INDEXER = (os.getenv("AZURE_SEARCH_INDEXER") or "").strip()
 SEARCH_API_VER = os.getenv("AZURE_SEARCH_API_VERSION", "2023-11-01")
 
-# --- Azure Blob 클라이언트 초기화 ---
-@st.cache_resource
+def _env_bool(name, default=False):
+    v = os.getenv(name)
+    if v is None or not v.strip():
+        return default
+    return v.strip().lower() not in ("0", "false", "no", "off")
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+# --- 공용 HTTP 전송 (http_client.py) ---
+HTTP_POOL_SIZE = _env_int("HTTP_POOL_SIZE", 10)          # 호스트별 keep-alive 커넥션 수
+HTTP_MAX_RETRIES = _env_int("HTTP_MAX_RETRIES", 2)       # 429/5xx/연결 오류 재시도 횟수
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+
+# --- Azure OpenAI 클라이언트 (aoai_client.py) ---
+AOAI_POOL_SIZE = _env_int("AOAI_POOL_SIZE", 20)             # keep-alive 커넥션 수
+AOAI_KEEPALIVE_SEC = float(os.getenv("AOAI_KEEPALIVE_SEC", "120"))
+AOAI_TIMEOUT = float(os.getenv("AOAI_TIMEOUT", "120"))       # 읽기 타임아웃(초)
+AOAI_CONNECT_TIMEOUT = float(os.getenv("AOAI_CONNECT_TIMEOUT", "10"))
+AOAI_WARMUP = _env_bool("AOAI_WARMUP", True)                 # 앱 시작 시 연결 미리 열기
+
+# --- Azure OpenAI 속도 제한 (rate_limit.py, 프로세스 단위) ---
+AOAI_RPM = _env_int("AOAI_RPM", 0)                           # 분당 요청 수 (0 = 제한 없음, 배포 할당량에 맞춰 설정)
+AOAI_TPM = _env_int("AOAI_TPM", 0)                           # 분당 토큰 수 (0 = 제한 없음, 배포 할당량에 맞춰 설정)
+AOAI_MAX_CONCURRENCY = _env_int("AOAI_MAX_CONCURRENCY", 8)   # 동시 호출 상한 (429/지연에 따라 자동으로 줄였다 늘림)
+AOAI_LATENCY_TARGET_SEC = float(os.getenv("AOAI_LATENCY_TARGET_SEC", "30"))   # 이보다 느린 응답은 한도 -1
+AOAI_QUEUE_TIMEOUT_SEC = float(os.getenv("AOAI_QUEUE_TIMEOUT_SEC", "120"))    # 대기열 최대 대기
+AOAI_MAX_RETRIES = _env_int("AOAI_MAX_RETRIES", 4)           # 429/503 재시도 횟수
+
+# --- 구조화 출력 (structured.py) ---
+AOAI_STRUCTURED_OUTPUT = _env_bool("AOAI_STRUCTURED_OUTPUT", True)   # response_format=json_schema (미지원 배포면 자동으로 끔)
+JSON_REASK_MAX_RATIO = float(os.getenv("JSON_REASK_MAX_RATIO", "0.5"))   # 문제 필드가 이 비율을 넘으면 전체 재생성
+JSON_REASK_MAX_TOKENS = _env_int("JSON_REASK_MAX_TOKENS", 400)        # 부분 재요청 최대 출력 토큰
+
+# --- 콜드 스타트 ---
+STARTUP_BUDGET_SEC = float(os.getenv("STARTUP_BUDGET_SEC", "3"))   # 모듈 import 합계 목표 (초과 시 경고)
+
+# --- 뉴스 공급자 병렬 조회 ---
+NEWS_DEADLINE_SEC = float(os.getenv("NEWS_DEADLINE_SEC", "8"))   # 전체 공급자 공용 마감시간
+NEWS_DEDUPE_THRESHOLD = float(os.getenv("NEWS_DEDUPE_THRESHOLD", "0.6"))   # 근사 중복(MinHash Jaccard) 기준, 1 이상이면 끔
+
+# --- 분석 대상 프리셋 (메인/일괄 비교 페이지 공용) ---
+COMPANY_PRESETS = ["KT DS", "삼성SDS", "LG CNS", "SK C&C", "현대오토에버", "카카오엔터프라이즈", "네이버클라우드"]
+TECH_CHOICES = ["AI", "RAG", "LangGraph", "Azure OpenAI", "Process Mining", "Cloud Native", "Azure AI Search", "MLOps", "Data Fabric"]
+DOMAIN_CHOICES = ["금융", "제조", "리테일", "공공", "통신", "교육", "의료"]
+
+# --- 일괄 PEST·SWOT (batch.py) ---
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 4)    # 프로세스 전체 동시 실행 셀 수
+BATCH_MAX_CELLS = _env_int("BATCH_MAX_CELLS", 40)       # 1회 실행 최대 셀 수 (비용 상한)
+
+# --- 사전 계산 결과 저장소 (pipeline.py precompute → result_store.py) ---
+RESULT_STORE_ENABLED = _env_bool("RESULT_STORE_ENABLED", True)
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", ".cache/results.sqlite3")
+RESULT_STORE_MAX_AGE_SEC = _env_int("RESULT_STORE_MAX_AGE_SEC", 36 * 3600)   # 야간 배치 1회 누락까지 허용
+PRECOMPUTE_TECHS = [x.strip() for x in os.getenv("PRECOMPUTE_TECHS", "AI").split(",") if x.strip()]
+PRECOMPUTE_DOMAINS = [x.strip() for x in os.getenv("PRECOMPUTE_DOMAINS", "금융").split(",") if x.strip()]
+PRECOMPUTE_NEWS_COUNT = _env_int("PRECOMPUTE_NEWS_COUNT", 2)       # 메인 페이지 슬라이더 기본값과 맞춤
+PRECOMPUTE_FRESHNESS = os.getenv("PRECOMPUTE_FRESHNESS", "Week")
+
+# --- 백그라운드 작업 (jobs.py) ---
+JOB_WORKERS = _env_int("JOB_WORKERS", 4)          # 업로드/인덱싱 대기 작업 워커 수
+JOB_TTL_SEC = _env_int("JOB_TTL_SEC", 3600)       # 끝난 작업 상태 보관 시간
+JOB_INDEX_TIMEOUT_SEC = _env_int("JOB_INDEX_TIMEOUT_SEC", 90)   # 인덱서 반영 최대 대기
+
+# --- 업로드 직후 로컬 PDF 추출 (local_docs.py) ---
+LOCAL_EXTRACT_ENABLED = _env_bool("LOCAL_EXTRACT_ENABLED", True)
+LOCAL_CHUNK_CHARS = _env_int("LOCAL_CHUNK_CHARS", 1500)
+LOCAL_CHUNK_OVERLAP = _env_int("LOCAL_CHUNK_OVERLAP", 200)
+LOCAL_MAX_CHUNKS = _env_int("LOCAL_MAX_CHUNKS", 20)
+
+# --- 검색 백엔드 (retrieval.py) ---
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "auto")   # auto | azure | bm25
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", ".cache/bm25.idx")
+BM25_COMPACT_CHUNKS = _env_int("BM25_COMPACT_CHUNKS", 500)   # 증분 청크+삭제가 이만큼 쌓이면 백그라운드 압축
+
+# --- 프롬프트 컨텍스트 토큰 예산 (context_pack.py) ---
+PACK_SUMMARY_TOKENS = _env_int("PACK_SUMMARY_TOKENS", 4000)              # 문서 통합 요약
+PACK_COMBINED_DOC_TOKENS = _env_int("PACK_COMBINED_DOC_TOKENS", 2500)    # 통합 인사이트: 내부 문서
+PACK_COMBINED_NEWS_TOKENS = _env_int("PACK_COMBINED_NEWS_TOKENS", 1200)  # 통합 인사이트: 뉴스
+COMBINED_COMPACT_CONTEXT = _env_bool("COMBINED_COMPACT_CONTEXT", True)   # 통합 인사이트: PEST·SWOT/문서 요약이 있으면 원문 대신 사용
+
+# --- 문서 요약 map-reduce ---
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "single").lower()          # single(관련도 패킹 + 1회 호출) | mapreduce(예산 초과 시)
+SUMMARY_CHUNK_TOKENS = _env_int("SUMMARY_CHUNK_TOKENS", 1500)       # 청크 1개 최대 토큰
+SUMMARY_MAP_CONCURRENCY = _env_int("SUMMARY_MAP_CONCURRENCY", 4)    # 부분 요약 동시 호출 수
+SUMMARY_MAX_CHUNKS = _env_int("SUMMARY_MAX_CHUNKS", 24)             # 문서당 최대 청크 수 (비용 상한)
+
+# --- LLM 응답 디스크 캐시 (재시작 후에도 유지) ---
+AOAI_CACHE_ENABLED = _env_bool("AOAI_CACHE_ENABLED", True)
+AOAI_CACHE_PATH = os.getenv("AOAI_CACHE_PATH", ".cache/aoai_cache.sqlite3")
+AOAI_CACHE_MAX_ENTRIES = _env_int("AOAI_CACHE_MAX_ENTRIES", 2000)
+AOAI_CACHE_MAX_MB = _env_int("AOAI_CACHE_MAX_MB", 200)
+
+# --- 동일 요청 합치기 (singleflight.py) ---
+SINGLEFLIGHT_WAIT_SEC = float(os.getenv("SINGLEFLIGHT_WAIT_SEC", "300"))   # 리더 결과를 기다리는 최대 시간
+
+# --- Azure Blob 클라이언트 (첫 사용 시 생성) ---
+_blob_lock = threading.Lock()
+_blob_cache = {}
+
 def get_blob_container():
-    """Blob 컨테이너 클라이언트를 반환 (캐싱됨)"""
+    """Blob 컨테이너 클라이언트를 반환 (첫 호출 시 SDK import + 생성, 이후 재사용. 실패는 캐싱하지 않음)"""
     if not STORAGE_CONN:
         return None
-    try:
-        blob_service_client = BlobServiceClient.from_connection_string(STORAGE_CONN)
-        container_client = blob_service_client.get_container_client(BLOB_CONTAINER_NAME)
+    with _blob_lock:
+        if "container" in _blob_cache:
+            return _blob_cache["container"]
+        t0 = time.perf_counter()
+        try:
+            from azure.storage.blob import BlobServiceClient   # 무거운 SDK — 업로드 경로에서만 로드
+            blob_service_client = BlobServiceClient.from_connection_string(STORAGE_CONN)
+            container_client = blob_service_client.get_container_client(BLOB_CONTAINER_NAME)
+        except Exception as e:
+            import runtime
+            runtime.notify_error(f"Blob 컨테이너 연결 실패: {e}")
+            return None
+        startup.record("blob_container", time.perf_counter() - t0)
+        _blob_cache["container"] = container_client
         return container_client
-    except Exception as e:
-        st.error(f"Blob 컨테이너 연결 실패: {e}")
-        return None
 
-blob_container = get_blob_container()
+def __getattr__(name):
+    # 기존 호출부 호환: config.blob_container 접근 시점에 생성 (import 시점 생성 제거)
+    if name == "blob_container":
+        return get_blob_container()
+    raise AttributeError(f"module 'config' has no attribute {name!r}")
 
 # --- 세션 상태 초기화 ---
 def initialize_session_state():
     """모든 페이지에서 공통으로 사용할 세션 상태를 초기화합니다."""
+    import streamlit as st   # 페이지에서만 호출 — 코어 경로는 streamlit 없이 import 가능
     defaults = {
         "news_results": [],
         "doc_hits": [],
+        "doc_hits_query": "",
         "last_blob_name": "",
         "search_fieldmap": None,
         "pest_swot_json": None,
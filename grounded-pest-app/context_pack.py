@@ -0,0 +1,226 @@
+# context_pack.py
+"""
+프롬프트 컨텍스트 패커.
+- 토큰 수를 세고(tiktoken 있으면 사용, 없으면 근사치), 질의(회사/기술/도메인)와의 관련도로 청크 점수화
+- 호출별 토큰 예산 안에서 점수 높은 청크부터 채우고, 거의 같은 청크는 제거
+- 남은 예산보다 큰 조각(문장 구분 없는 긴 본문 등)은 버리지 않고 앞부분만 잘라 넣음
+- [D#]/[N#] 번호는 원래 순번 그대로 유지 (일부 문서가 빠져도 번호가 밀리지 않음)
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from textproc import tokenize, shingles, jaccard
+
+_HANGUL = re.compile(r"[가-힣]")
+_MIN_TRUNCATED = 32     # 잘라 넣을 때 최소 본문 토큰 (이보다 적게 남으면 자르지 않고 다음 조각으로)
+_enc = None
+_enc_checked = False
+
+
+def count_tokens(text: str) -> int:
+    """토큰 수. tiktoken(o200k/cl100k) 우선, 없으면 한글 1자≈1토큰 / 그 외 4자≈1토큰 근사."""
+    global _enc, _enc_checked
+    if not text:
+        return 0
+    if not _enc_checked:
+        _enc_checked = True
+        try:
+            import tiktoken
+            try:
+                _enc = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _enc = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _enc = None
+    if _enc is not None:
+        return len(_enc.encode(text, disallowed_special=()))
+    hangul = len(_HANGUL.findall(text))
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """앞부분을 max_tokens 이하로 자름 (count_tokens 기준 이분 탐색 — 토크나이저 유무와 무관)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def build_query(company="", techs=None, domains=None) -> str:
+    return " ".join([company or ""] + list(techs or []) + list(domains or [])).strip()
+
+
+def split_passages(text: str, max_tokens: int = 250) -> list:
+    """문단 단위로 자르고, 긴 문단은 문장 단위로 max_tokens 이하로 다시 묶음"""
+    out = []
+    for para in re.split(r"\n\s*\n", text or ""):
+        para = para.strip()
+        if not para:
+            continue
+        if count_tokens(para) <= max_tokens:
+            out.append(para)
+            continue
+        buf = ""
+        for sent in re.split(r"(?<=[.!?。])\s+|\n", para):
+            if buf and count_tokens(buf + " " + sent) > max_tokens:
+                out.append(buf.strip())
+                buf = ""
+            buf = f"{buf} {sent}" if buf else sent
+        if buf.strip():
+            out.append(buf.strip())
+    return out
+
+
+@dataclass
+class PackResult:
+    text: str
+    used_tokens: int
+    original_tokens: int
+    dropped_duplicates: int = 0
+    truncated: int = 0                           # 예산에 맞춰 앞부분만 넣은 조각 수
+    kept: dict = field(default_factory=dict)     # 인용 번호 -> 채택된 조각 수
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_tokens - self.used_tokens)
+
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {"calls": 0, "original_tokens": 0, "packed_tokens": 0, "saved_tokens": 0,
+                              "dropped_duplicates": 0, "truncated": 0})
+
+
+def _record(kind: str, res: PackResult):
+    with _stats_lock:
+        s = _stats[kind]
+        s["calls"] += 1
+        s["original_tokens"] += res.original_tokens
+        s["packed_tokens"] += res.used_tokens
+        s["saved_tokens"] += res.saved_tokens
+        s["dropped_duplicates"] += res.dropped_duplicates
+        s["truncated"] += res.truncated
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+
+def _bm25_scores(passages_tokens, query_terms, k1=1.2, b=0.75):
+    n = len(passages_tokens)
+    if not n or not query_terms:
+        return [0.0] * n
+    avgdl = sum(len(t) for t in passages_tokens) / n or 1.0
+    tfs = [Counter(t) for t in passages_tokens]
+    df = Counter(term for tf in tfs for term in query_terms if term in tf)
+    scores = []
+    for toks, tf in zip(passages_tokens, tfs):
+        s = 0.0
+        for term in query_terms:
+            f = tf.get(term)
+            if not f:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            s += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * len(toks) / avgdl))
+        scores.append(s)
+    return scores
+
+
+def rank(texts, query: str) -> list:
+    """질의 관련도(BM25) 내림차순 인덱스 — 동점이면 원래 순서 (질의어가 없으면 원래 순서 그대로)"""
+    scores = _bm25_scores([tokenize(t) for t in texts], list(dict.fromkeys(tokenize(query))))
+    return sorted(range(len(texts)), key=lambda k: (-scores[k], k))
+
+
+def pack(items, query: str, budget_tokens: int, *, label: str, kind: str = None,
+         header=None, body=None, split: bool = True, dedupe_threshold: float = 0.8) -> PackResult:
+    """
+    items: 원래 순서의 dict 리스트 (번호 = 1부터의 위치)
+    header(i, item) → 번호 줄, body(item) → 본문 텍스트
+    split=True면 본문을 문단 조각으로 나눠 조각 단위로 선택 (문서), False면 항목 통째로 (뉴스)
+    """
+    header = header or (lambda i, it: f"[{label}{i}] {it.get('title') or '(제목 없음)'}")
+    body = body or (lambda it: str(it.get("content") or ""))
+
+    cands = []      # (번호, 조각 순서, 텍스트)
+    original = 0
+    for i, it in enumerate(items or [], 1):
+        if not isinstance(it, dict):
+            continue
+        text = body(it)
+        original += count_tokens(header(i, it)) + count_tokens(text) + 2
+        pieces = split_passages(text) if split else [text]
+        for j, p in enumerate(pieces or [""]):
+            cands.append((i, j, p))
+
+    q_terms = list(dict.fromkeys(tokenize(query)))
+    scores = _bm25_scores([tokenize(p) for _, _, p in cands], q_terms)
+    # 질의어가 하나도 안 걸려도 문서 앞부분을 약간 우대 (요약/개요일 가능성)
+    order = sorted(range(len(cands)), key=lambda k: (scores[k] + (0.1 if cands[k][1] == 0 else 0.0)), reverse=True)
+
+    chosen, shingle_sets, used, dropped, truncated = [], [], 0, 0, 0
+    headers_paid = set()
+    for k in order:
+        i, j, p = cands[k]
+        sh = shingles(p)
+        if any(jaccard(sh, other) >= dedupe_threshold for other in shingle_sets):
+            dropped += 1
+            continue
+        head_cost = 0 if i in headers_paid else count_tokens(header(i, items[i - 1])) + 1
+        cost = head_cost + count_tokens(p) + 1
+        if used + cost > budget_tokens:
+            room = budget_tokens - used - head_cost - 2     # 줄바꿈 + 생략 표시
+            if room < _MIN_TRUNCATED:
+                continue
+            p = truncate_tokens(p, room).rstrip() + "…"
+            cost = head_cost + count_tokens(p) + 1
+            truncated += 1
+        used += cost
+        headers_paid.add(i)
+        chosen.append((i, j, p))
+        shingle_sets.append(sh)
+
+    by_num = defaultdict(list)
+    for i, j, p in sorted(chosen):
+        by_num[i].append(p)
+    blocks = [f"{header(i, items[i - 1])}\n" + "\n".join(ps) for i, ps in sorted(by_num.items())]
+    res = PackResult(
+        text="\n\n".join(blocks) + ("\n\n" if blocks else ""),
+        used_tokens=used,
+        original_tokens=original,
+        dropped_duplicates=dropped,
+        truncated=truncated,
+        kept={i: len(ps) for i, ps in by_num.items()},
+    )
+    _record(kind or label, res)
+    return res
+
+
+def pack_docs(hits, query: str, budget_tokens: int, *, kind: str = "docs", with_source: bool = False) -> PackResult:
+    """내부 문서 hit → [D#] 블록"""
+    if with_source:
+        hdr = lambda i, h: f"[D{i}] {h.get('title') or '(제목 없음)'} - {h.get('source', '')}\n내용:"
+    else:
+        hdr = lambda i, h: f"[D{i}] {h.get('title') if isinstance(h.get('title'), str) and h.get('title').strip() else '(제목 없음)'}"
+    return pack(hits, query, budget_tokens, label="D", kind=kind, header=hdr)
+
+
+def pack_news(news, query: str, budget_tokens: int, *, kind: str = "news") -> PackResult:
+    """뉴스 → [N#] 블록 (기사 단위로 선택)"""
+    return pack(
+        news, query, budget_tokens, label="N", kind=kind, split=False,
+        header=lambda i, n: (
+            f"[N{i}] {n.get('title','(제목 없음)')} — {n.get('provider','')} — {n.get('datePublished','')}"
+            + (f" — 유사 보도 {n['source_count']}건" if n.get("source_count", 1) > 1 else "")
+        ),
+        body=lambda n: f"요약:{n.get('snippet','')}\nURL:{n.get('url','')}",
+    )
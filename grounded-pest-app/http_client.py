@@ -0,0 +1,168 @@
+# http_client.py
+"""
+공용 HTTP 전송 계층.
+- 호스트별 requests.Session + 커넥션 풀(keep-alive) 재사용 → 매 호출 TCP/TLS 핸드셰이크 제거
+- 429/5xx·연결 오류 시 지터 백오프 재시도 (Retry-After 헤더 우선)
+  멱등이 아닌 요청(POST 등)은 서버가 처리하지 않은 게 확실한 경우(연결 수립 실패, 429/503)만 재시도
+- 요청 단위 타이밍 훅 (add_timing_hook)
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+import config
+
+log = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+UNPROCESSED_STATUSES = frozenset({429, 503})     # 처리 전에 거절 — 멱등이 아닌 요청도 재시도 가능
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_hooks = []
+_stats = defaultdict(lambda: {"requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0})
+_stats_lock = threading.Lock()
+
+
+# ===================== 타이밍 훅 =====================
+def add_timing_hook(fn):
+    """fn(info: dict) — 시도(attempt)마다 호출. info: method, host, path, status, elapsed_ms, attempt, bytes, error"""
+    if fn not in _hooks:
+        _hooks.append(fn)
+    return fn
+
+
+def remove_timing_hook(fn):
+    if fn in _hooks:
+        _hooks.remove(fn)
+
+
+def _emit(info: dict):
+    with _stats_lock:
+        s = _stats[info["host"]]
+        s["requests"] += 1
+        s["total_ms"] += info["elapsed_ms"]
+        if info.get("error") or (info.get("status") or 0) >= 400:
+            s["errors"] += 1
+        if info["attempt"] > 0:
+            s["retries"] += 1
+    for fn in list(_hooks):
+        try:
+            fn(info)
+        except Exception as e:
+            log.debug("timing hook 실패: %s", e)
+
+
+def host_stats() -> dict:
+    """호스트별 누적 요청/오류/재시도 건수와 평균 지연(ms)"""
+    with _stats_lock:
+        return {
+            h: dict(s, avg_ms=round(s["total_ms"] / s["requests"], 1) if s["requests"] else 0.0)
+            for h, s in _stats.items()
+        }
+
+
+# ===================== 세션 (호스트별 풀) =====================
+def get_session(url: str) -> requests.Session:
+    """scheme://host 단위로 keep-alive 세션을 하나씩 공유"""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    sess = _sessions.get(origin)
+    if sess is None:
+        with _sessions_lock:
+            sess = _sessions.get(origin)
+            if sess is None:
+                sess = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=config.HTTP_POOL_SIZE,
+                    pool_block=False,
+                    max_retries=0,   # 재시도는 아래 request()에서 직접 처리
+                )
+                sess.mount(f"{parts.scheme}://", adapter)
+                _sessions[origin] = sess
+    return sess
+
+
+def _retry_after(resp) -> float:
+    v = (resp.headers or {}).get("Retry-After") or (resp.headers or {}).get("retry-after-ms")
+    if not v:
+        return None
+    try:
+        sec = float(v)
+    except ValueError:
+        return None
+    if "retry-after-ms" in resp.headers and "Retry-After" not in resp.headers:
+        sec = sec / 1000.0
+    return max(0.0, min(sec, config.HTTP_BACKOFF_MAX))
+
+
+def _not_sent(e) -> bool:
+    """연결 수립 단계에서 실패해 요청 바이트가 나가지 않았는지 (읽기 타임아웃·연결 끊김은 False)"""
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """full jitter: U(0, min(max, base * 2^attempt))"""
+    cap = min(config.HTTP_BACKOFF_MAX, config.HTTP_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+# ===================== 요청 =====================
+def request(method: str, url: str, *, retries: int = None, retry_statuses=RETRY_STATUSES,
+            idempotent: bool = None, **kwargs):
+    """
+    requests.request와 같은 인자. 429/5xx/연결 오류 시 retries회까지 재시도.
+    idempotent(기본: 메서드로 판단)가 False면 연결 수립 실패와 429/503만 재시도
+    — 검색 질의처럼 POST지만 다시 보내도 되는 요청은 호출부가 idempotent=True로 표시.
+    마지막 응답은 상태코드와 무관하게 그대로 반환(raise_for_status는 호출부 책임).
+    """
+    retries = config.HTTP_MAX_RETRIES if retries is None else max(0, int(retries))
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    if not idempotent:
+        retry_statuses = frozenset(retry_statuses) & UNPROCESSED_STATUSES
+    kwargs.setdefault("timeout", config.HTTP_TIMEOUT)
+    sess = get_session(url)
+    parts = urlsplit(url)
+    base_info = {"method": method.upper(), "host": parts.netloc, "path": parts.path}
+
+    for attempt in range(retries + 1):
+        t0 = time.perf_counter()
+        try:
+            resp = sess.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _emit(dict(base_info, status=None, elapsed_ms=(time.perf_counter() - t0) * 1000,
+                       attempt=attempt, bytes=0, error=type(e).__name__))
+            if attempt >= retries or not (idempotent or _not_sent(e)):
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        _emit(dict(base_info, status=resp.status_code, elapsed_ms=(time.perf_counter() - t0) * 1000,
+                   attempt=attempt, bytes=len(resp.content or b""), error=None))
+        if resp.status_code in retry_statuses and attempt < retries:
+            wait = _retry_after(resp)
+            resp.close()
+            time.sleep(backoff_delay(attempt) if wait is None else wait)
+            continue
+        return resp
+
+
+def get(url: str, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,260 @@
+# indexer_monitor.py
+"""
+프로세스 공용 인덱서 상태 감시자 (SEARCH_INDEXER당 1개).
+- /status 를 적응형 간격으로 폴링 (실행 중엔 빠르게, 유휴 땐 점점 느리게, 대기자 없으면 종료)
+- run 요청을 합쳐 동시에 최대 1개만 실행 (실행 중 들어온 요청은 끝난 뒤 1회로 묶어 재실행)
+- 업로드한 blob을 포함하는 실행(업로드 이후 시작된 실행)이 끝나면 대기 중인 모든 세션에 통지
+- 로컬 시각(since)과 Azure startTime은 응답 Date 헤더로 잰 시계 차이를 보정해 비교
+- run/reset POST는 잠금 밖에서 보내고, 결과 반영만 잠금 안에서 (POST 중에도 status/wait_for가 막히지 않음)
+"""
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import config
+import http_client
+
+log = logging.getLogger(__name__)
+
+_FAST, _WAITING, _IDLE_MAX = 2.0, 3.0, 60.0
+_RUN_GRACE = 15.0      # run 요청 후 상태에 inProgress가 보이기까지 기다려 주는 시간
+_SKEW_TOL = 1.0        # Date 헤더는 초 단위 — 보정 후 남는 오차 허용폭
+
+
+def _ts(s) -> float:
+    """Azure ISO 시각(소수 7자리 + Z 포함) → epoch 초. 실패 시 0."""
+    if not s:
+        return 0.0
+    s = re.sub(r"(\.\d{6})\d+", r"\1", str(s)).replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(s).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _server_offset(r, sent_at: float):
+    """응답 Date 헤더 기준 (서버 시각 - 로컬 시각). 헤더가 없거나 깨졌으면 None."""
+    try:
+        server = parsedate_to_datetime((r.headers or {}).get("Date")).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return server - (sent_at + time.time()) / 2
+
+
+class IndexerMonitor:
+    def __init__(self, name: str):
+        self.name = name
+        self._cond = threading.Condition()
+        self._status = {}
+        self._fetched_at = 0.0
+        self._error = None
+        self._waiters = {}            # waiter id -> since(epoch)
+        self._run_requested_at = 0.0
+        self._posting = False         # run POST 진행 중 (잠금 밖) — 그동안 들어온 요청은 합쳐짐
+        self._skew = 0.0              # 서버 시각 - 로컬 시각 (마지막으로 잰 값)
+        self._thread = None
+        self.counters = {"polls": 0, "runs_triggered": 0, "runs_coalesced": 0, "conflicts": 0, "notifications": 0}
+
+    # ---------- REST ----------
+    def _url(self, action: str) -> str:
+        return f"{config.SEARCH_ENDPOINT}/indexers/{self.name}/{action}?api-version={config.SEARCH_API_VER}"
+
+    def _headers(self):
+        return {"api-key": config.SEARCH_KEY}
+
+    def refresh(self) -> dict:
+        """/status 를 즉시 조회해 스냅샷 갱신 + 대기자 깨움"""
+        sent_at, offset = time.time(), None
+        try:
+            r = http_client.get(self._url("status"), headers=self._headers(), timeout=20)
+            r.raise_for_status()
+            status, error = r.json() or {}, None
+            offset = _server_offset(r, sent_at)
+        except Exception as e:
+            status, error = None, str(e)
+        with self._cond:
+            self.counters["polls"] += 1
+            self._error = error
+            if offset is not None:
+                self._skew = offset
+            if status is not None:
+                self._status = status
+                self._fetched_at = time.time()
+            self._cond.notify_all()
+            return dict(self._status)
+
+    def status(self, max_age: float = 5.0) -> dict:
+        """캐시된 상태 (max_age초보다 오래됐으면 새로 조회). 조회 실패 시 RuntimeError."""
+        if time.time() - self._fetched_at > max_age:
+            self.refresh()
+        with self._cond:
+            if self._error and not self._status:
+                raise RuntimeError(self._error)
+            return dict(self._status)
+
+    # ---------- 실행 상태 판정 (호출부에서 _cond 보유) ----------
+    def _last(self):
+        return self._status.get("lastResult") or {}
+
+    def _in_progress(self) -> bool:
+        if (self._last().get("status") or "").lower() == "inprogress":
+            return True
+        return time.time() - self._run_requested_at < _RUN_GRACE
+
+    def _latest_finished_start(self) -> float:
+        """끝난 실행 중 가장 늦게 시작한 실행의 시작 시각"""
+        best = 0.0
+        for ex in [self._last()] + list(self._status.get("executionHistory") or []):
+            if ex and (ex.get("status") or "").lower() not in ("inprogress", ""):
+                best = max(best, _ts(ex.get("startTime")))
+        return best
+
+    def _server_since(self, since: float) -> float:
+        """로컬 since → 서버 시각 (startTime과 같은 시계로 비교)"""
+        return since + self._skew - _SKEW_TOL
+
+    def _covered(self, since: float) -> bool:
+        return self._latest_finished_start() >= self._server_since(since)
+
+    # ---------- run / reset ----------
+    def _claim_run_locked(self) -> bool:
+        """POST 직전 잠금 안에서 '실행 요청 중'으로 표시 (_in_progress가 참이 되어 동시 요청은 합쳐짐)"""
+        if self._posting:
+            return False
+        self._posting = True
+        self._run_requested_at = time.time()
+        return True
+
+    def _post_run(self) -> str:
+        """_claim_run_locked() 후 잠금 없이 호출 — HTTP는 잠금 밖, 상태 반영만 잠금 안에서"""
+        sent_at = time.time()
+        try:
+            r, error = http_client.post(self._url("run"), headers=self._headers(), timeout=20), None
+        except Exception as e:
+            r, error = None, e
+        with self._cond:
+            self._posting = False
+            offset = _server_offset(r, sent_at) if r is not None else None
+            if offset is not None:
+                self._skew = offset
+            if r is not None and r.status_code in (200, 202, 204):
+                self._run_requested_at = time.time()
+                self.counters["runs_triggered"] += 1
+                outcome = "started"
+            elif r is not None and r.status_code == 409:
+                # 이미 실행 중 — 진행 중인 실행으로 간주
+                self._run_requested_at = time.time()
+                self.counters["conflicts"] += 1
+                outcome = "conflict"
+            else:
+                self._run_requested_at = 0.0     # 실패 — 실행 중으로 보지 않음 (다음 폴링에서 재시도)
+                outcome = f"error: {error}" if r is None else f"error: {r.status_code} {r.text}"
+            self._cond.notify_all()
+        return outcome
+
+    def request_run(self) -> str:
+        """실행 요청. 이미 실행 중이면 합쳐서(coalesced) 끝난 뒤 필요 시 1회만 재실행."""
+        with self._cond:
+            claimed = not self._in_progress() and self._claim_run_locked()
+            if not claimed:
+                self.counters["runs_coalesced"] += 1
+        outcome = self._post_run() if claimed else "coalesced"
+        self._ensure_thread()
+        return outcome
+
+    def reset_and_run(self) -> str:
+        try:
+            r = http_client.post(self._url("reset"), headers=self._headers(), timeout=20)
+            if r.status_code not in (204, 202):
+                return f"error: reset {r.status_code} {r.text}"
+        except Exception as e:
+            return f"error: {e}"
+        with self._cond:
+            claimed = self._claim_run_locked()
+        outcome = self._post_run() if claimed else "coalesced"
+        self._ensure_thread()
+        return outcome
+
+    # ---------- 대기 ----------
+    def wait_for(self, since: float, timeout: float, on_tick=None) -> bool:
+        """since 이후 시작된 실행이 끝날 때까지 대기. on_tick(status)로 진행 상황 전달."""
+        wid = object()
+        deadline = time.time() + timeout
+        with self._cond:
+            self._waiters[wid] = since
+        try:
+            self.request_run()
+            with self._cond:
+                while not self._covered(since):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(min(remaining, _WAITING))
+                    if on_tick:
+                        on_tick(dict(self._status))
+                self.counters["notifications"] += 1
+                return True
+        finally:
+            with self._cond:
+                self._waiters.pop(wid, None)
+
+    # ---------- 감시 스레드 ----------
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=f"indexer-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        idle = _WAITING
+        while True:
+            self.refresh()
+            claimed = False
+            with self._cond:
+                # 실행이 끝났는데 아직 반영 안 된 대기자가 있으면 합쳐서 1회 재실행
+                if not self._in_progress() and self._waiters and not self._covered(min(self._waiters.values())):
+                    claimed = self._claim_run_locked()
+            if claimed:
+                self._post_run()
+            with self._cond:
+                busy = self._in_progress()
+                if busy:
+                    interval, idle = _FAST, _WAITING
+                elif self._waiters:
+                    interval, idle = _WAITING, _WAITING
+                else:
+                    if idle >= _IDLE_MAX:
+                        self._thread = None
+                        return
+                    interval, idle = idle, min(idle * 2, _IDLE_MAX)
+                self._cond.wait(interval)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "indexer": self.name,
+                "last": (self._last().get("status") or "").lower(),
+                "in_progress": self._in_progress(),
+                "waiters": len(self._waiters),
+                "age_sec": round(time.time() - self._fetched_at, 1) if self._fetched_at else None,
+                "error": self._error,
+                **self.counters,
+            }
+
+
+_monitors = {}
+_lock = threading.Lock()
+
+
+def get_monitor(name: str = None):
+    """인덱서 이름별 싱글턴 (미설정이면 None)"""
+    name = name or config.SEARCH_INDEXER
+    if not (name and config.SEARCH_ENDPOINT and config.SEARCH_KEY):
+        return None
+    with _lock:
+        if name not in _monitors:
+            _monitors[name] = IndexerMonitor(name)
+        return _monitors[name]
@@ -0,0 +1,155 @@
+# jobs.py
+"""
+백그라운드 작업 풀.
+업로드 → 인덱서 실행 → 검색 반영 폴링처럼 오래 걸리는 흐름을 워커 스레드에서 돌리고,
+페이지는 세션에 저장한 job_id로 get()만 가볍게 조회합니다.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+
+import config
+import indexer_monitor
+import utils
+
+log = logging.getLogger(__name__)
+
+_pool = ThreadPoolExecutor(max_workers=config.JOB_WORKERS, thread_name_prefix="job")
+_jobs = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"          # queued | running | done | failed
+    progress: float = 0.0           # 0.0 ~ 1.0
+    message: str = ""
+    result: dict = field(default_factory=dict)
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+
+    def update(self, **kw):
+        with _lock:
+            for k, v in kw.items():
+                setattr(self, k, v)
+            self.updated = time.time()
+
+
+def _gc():
+    """완료 후 JOB_TTL_SEC이 지난 작업 정리 (호출부에서 _lock 보유)"""
+    cutoff = time.time() - config.JOB_TTL_SEC
+    for jid in [j.id for j in _jobs.values() if j.status in ("done", "failed") and j.updated < cutoff]:
+        del _jobs[jid]
+
+
+def submit(kind: str, fn, *args, **kwargs) -> str:
+    """fn(job, *args, **kwargs)를 워커에서 실행. 반환값(dict)은 job.result로 저장."""
+    job = Job(id=uuid.uuid4().hex, kind=kind)
+    with _lock:
+        _gc()
+        _jobs[job.id] = job
+
+    def _run():
+        job.update(status="running")
+        try:
+            result = fn(job, *args, **kwargs) or {}
+            job.update(status="done", progress=1.0, result=result)
+        except Exception as e:
+            log.exception("job %s 실패", job.id)
+            job.update(status="failed", error=str(e))
+
+    _pool.submit(_run)
+    return job.id
+
+
+def get(job_id: str):
+    """작업 상태 스냅샷(dict) — 없으면 None"""
+    with _lock:
+        job = _jobs.get(job_id)
+        return asdict(job) if job else None
+
+
+def pool_stats() -> dict:
+    with _lock:
+        by = {}
+        for j in _jobs.values():
+            by[j.status] = by.get(j.status, 0) + 1
+    return {"workers": config.JOB_WORKERS, "jobs": by}
+
+
+# ===================== 업로드 → 인덱싱 → 조회 =====================
+def upload_and_index(job: Job, data: bytes, blob_name: str, auto_fetch: bool = True) -> dict:
+    container = config.blob_container
+    if not container:
+        raise RuntimeError("Blob 컨테이너 연결 실패. .env의 AZURE_STORAGE_CONN 확인.")
+    job.update(message="Blob 업로드 중...", progress=0.05)
+    container.upload_blob(name=blob_name, data=data, overwrite=True)
+    job.update(message=f"업로드 완료: {blob_name}", progress=0.2)
+    if not auto_fetch:
+        return {"blob_name": blob_name, "hits": None}
+
+    since = time.time()
+    return {"blob_name": blob_name, "hits": _fetch_when_indexed(job, blob_name, since)}
+
+
+def reindex_and_fetch(job: Job, blob_name: str) -> dict:
+    """인덱서 Reset → Run 후 해당 blob 결과 재조회"""
+    monitor = indexer_monitor.get_monitor()
+    if not monitor:
+        raise RuntimeError("Azure Search 설정(ENDPOINT/INDEXER/KEY/API_VER)이 누락되었습니다.")
+    since = time.time()
+    job.update(message="인덱서 Reset → Run 요청 중...", progress=0.1)
+    outcome = monitor.reset_and_run()
+    if outcome.startswith("error"):
+        raise RuntimeError(outcome)
+    return {"blob_name": blob_name, "hits": _fetch_when_indexed(job, blob_name, since)}
+
+
+def _search_fresh(blob_name):
+    # 이 blob의 이전(빈) 검색 결과만 무효화 후 재조회
+    utils.search_docs_by_blobname.invalidate(blob_name)
+    return utils.search_docs_by_blobname(blob_name, top=10)
+
+
+def _fetch_when_indexed(job: Job, blob_name: str, since: float):
+    """
+    공용 인덱서 감시자에 대기 등록 → since 이후 시작된 실행이 끝나면 검색.
+    인덱서 미설정 시에는 간격을 늘려가며 검색만 폴링.
+    """
+    hits = _search_fresh(blob_name)
+    if hits:
+        return hits
+
+    monitor = indexer_monitor.get_monitor()
+    if monitor:
+        job.update(message="인덱서 실행 대기 중...", progress=0.3)
+
+        def _tick(status):
+            last = ((status or {}).get("lastResult") or {}).get("status") or ""
+            job.update(message=f"인덱싱 진행 중... ({last or '대기'})",
+                       progress=min(0.9, job.progress + 0.05))
+
+        covered = monitor.wait_for(since, timeout=config.JOB_INDEX_TIMEOUT_SEC, on_tick=_tick)
+        # 실행 완료 직후 검색 노출까지 짧은 지연이 있을 수 있음
+        for wait in ([0, 2, 3] if covered else [0]):
+            time.sleep(wait)
+            job.update(message="검색 반영 확인 중...", progress=0.95)
+            hits = _search_fresh(blob_name)
+            if hits:
+                break
+        return hits
+
+    delays = [2, 3, 5, 8, 13, 21]
+    for i, wait in enumerate(delays, start=1):
+        time.sleep(wait)
+        job.update(message=f"인덱싱 반영 확인 중... ({i}/{len(delays)})", progress=0.2 + 0.75 * i / len(delays))
+        hits = _search_fresh(blob_name)
+        if hits:
+            break
+    return hits
@@ -0,0 +1,157 @@
+# json_stream.py
+"""
+스트리밍 JSON 점진 파서.
+LLM이 토큰 단위로 보내는 JSON 텍스트를 feed()로 넣으면,
+지정 깊이(max_depth) 이하의 필드 값이 닫히는 즉시 (path, value)를 돌려줍니다.
+  예) ("PEST", "P") → ["문장1", "문장2"],  ("one_liner",) → "…"
+코드펜스(```json) 등 '{' 이전의 텍스트는 무시합니다.
+"""
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "state", "start")
+
+    def __init__(self, kind, start):
+        self.kind = kind            # "obj" | "arr"
+        self.key = 0 if kind == "arr" else None
+        self.state = "value" if kind == "arr" else "key"
+        self.start = start          # 컨테이너 시작 위치 (buffer index)
+
+
+class IncrementalJSONParser:
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.text = ""              # 지금까지 받은 전체 텍스트 (최종 캐싱용)
+        self.result = {}            # 닫힌 필드로 조립한 부분 결과
+        self.done = False
+        self._pos = 0
+        self._stack = []
+        self._in_str = False
+        self._esc = False
+        self._str_start = -1
+        self._scalar_start = -1
+
+    # ---------- 내부 ----------
+    def _path(self):
+        return tuple(f.key for f in self._stack)
+
+    def _store(self, path, value, out):
+        if not path or len(path) > self.max_depth:
+            return
+        node = self.result
+        for p in path[:-1]:
+            if not isinstance(node, dict):
+                return
+            node = node.setdefault(p, {})
+        if isinstance(node, dict):
+            node[path[-1]] = value
+            out.append((path, value))
+
+    def _load(self, start, end):
+        raw = self.text[start:end]
+        try:
+            return True, json.loads(raw)
+        except Exception:
+            try:
+                return True, json.loads(_TRAILING_COMMA.sub(r"\1", raw))
+            except Exception:
+                return False, None
+
+    def _value_done(self, start, end, out):
+        """현재 top frame 안에서 값 하나가 [start, end) 로 끝남"""
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        path = self._path()
+        top.state = "after"
+        # 배열 원소는 개별 방출하지 않음 — 배열이 닫힐 때 통째로 방출
+        if top.kind == "obj" and len(path) <= self.max_depth:
+            ok, val = self._load(start, end)
+            if ok:
+                self._store(path, val, out)
+
+    def _flush_scalar(self, end, out):
+        if self._scalar_start >= 0:
+            start, self._scalar_start = self._scalar_start, -1
+            self._value_done(start, end, out)
+
+    # ---------- 공개 ----------
+    def feed(self, chunk: str):
+        """텍스트 조각을 넣고, 이번에 새로 닫힌 [(path, value), ...] 반환"""
+        out = []
+        if not chunk or self.done:
+            self.text += chunk or ""
+            return out
+        self.text += chunk
+        s = self.text
+        i = self._pos
+        n = len(s)
+        while i < n:
+            c = s[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    top = self._stack[-1] if self._stack else None
+                    if top is not None and top.kind == "obj" and top.state == "key":
+                        try:
+                            top.key = json.loads(s[self._str_start:i + 1])
+                        except Exception:
+                            top.key = s[self._str_start + 1:i]
+                        top.state = "colon"
+                    else:
+                        self._value_done(self._str_start, i + 1, out)
+                i += 1
+                continue
+
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(_Frame("obj", i))
+                i += 1
+                continue
+
+            top = self._stack[-1]
+            if c == '"':
+                self._in_str = True
+                self._str_start = i
+            elif c in "{[":
+                self._stack.append(_Frame("obj" if c == "{" else "arr", i))
+            elif c in "}]":
+                self._flush_scalar(i, out)
+                frame = self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                    ok, val = self._load(frame.start, i + 1)
+                    if ok and isinstance(val, dict):
+                        self.result = val
+                    i += 1
+                    break
+                self._value_done(frame.start, i + 1, out)
+            elif c == ":":
+                top.state = "value"
+            elif c == ",":
+                self._flush_scalar(i, out)
+                if top.kind == "arr":
+                    top.key += 1
+                    top.state = "value"
+                else:
+                    top.state = "key"
+            elif not c.isspace() and top.state == "value" and self._scalar_start < 0:
+                self._scalar_start = i
+            i += 1
+        self._pos = i
+        return out
+
+
+def iter_fields(chunks, max_depth: int = 2):
+    """델타 이터러블을 받아 (parser, 새로 닫힌 필드 목록)을 순서대로 yield"""
+    parser = IncrementalJSONParser(max_depth=max_depth)
+    for chunk in chunks:
+        yield parser, parser.feed(chunk)
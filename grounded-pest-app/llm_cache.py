@@ -0,0 +1,148 @@
+# llm_cache.py
+"""
+Azure OpenAI 응답 디스크 캐시 (SQLite).
+- 프로세스 재시작/배포/세션 초기화 후에도 동일 요청은 재호출하지 않음
+- 키: messages + deployment + temperature + max_tokens 의 정규화 해시
+- 용량 제한(건수/바이트) 초과 시 오래 안 쓴 항목부터 제거(LRU)
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+log = logging.getLogger(__name__)
+
+
+def make_key(messages, *, deployment, temperature, max_tokens, **extra) -> str:
+    """요청 파라미터를 정규화(JSON, 키 정렬)한 뒤 sha256 해시."""
+    payload = {
+        "messages": messages,
+        "deployment": deployment,
+        "temperature": round(float(temperature), 4),
+        "max_tokens": int(max_tokens),
+    }
+    payload.update({k: v for k, v in extra.items() if v is not None})
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """스레드 안전 SQLite 완료 캐시 (WAL 모드, 다중 프로세스 공유 가능)"""
+
+    def __init__(self, path: str, max_entries: int = 2000, max_bytes: int = 200 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions(accessed)")
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE completions SET accessed=? WHERE key=?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, value: str):
+        if value is None:
+            return
+        value = str(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions(key, value, size, created, accessed) VALUES (?,?,?,?,?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self.writes += 1
+            self._evict_locked()
+
+    def _evict_locked(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size),0) FROM completions").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # 오래 안 쓴 순서로 한도 이하가 될 때까지 제거
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY accessed ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM completions WHERE key=?", doomed)
+        self.evictions += len(doomed)
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM completions WHERE key=?", (key,)).rowcount
+
+    def clear(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM completions").rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size),0) FROM completions").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": count,
+            "bytes": total,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_cache():
+    """프로세스 공용 캐시 인스턴스. 비활성화/열기 실패 시 None (캐시 없이 동작)."""
+    global _cache, _cache_failed
+    if not config.AOAI_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = CompletionCache(
+                        config.AOAI_CACHE_PATH,
+                        max_entries=config.AOAI_CACHE_MAX_ENTRIES,
+                        max_bytes=config.AOAI_CACHE_MAX_MB * 1024 * 1024,
+                    )
+                except Exception as e:
+                    log.warning("AOAI 디스크 캐시 열기 실패(캐시 없이 진행): %s", e)
+                    _cache_failed = True
+    return _cache
+
+
+def stats() -> dict:
+    c = get_cache()
+    return c.stats() if c else {}
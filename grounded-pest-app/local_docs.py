@@ -0,0 +1,77 @@
+# local_docs.py
+"""
+업로드 직후용 로컬 PDF 텍스트 추출 + 청크 분할.
+Azure Search 인덱서 반영(수십 초)을 기다리지 않고, 메모리에 있는 PDF 바이트로
+검색 결과와 같은 모양의 hit dict({title, content, source})를 바로 만듭니다.
+pypdf가 없으면 빈 리스트를 돌려주고 기존(인덱스 대기) 흐름으로 동작합니다.
+"""
+import io
+import logging
+import re
+
+import config
+
+log = logging.getLogger(__name__)
+
+LOCAL_SOURCE_PREFIX = "local://"
+
+
+def extract_pdf_pages(data: bytes) -> list:
+    """페이지별 텍스트 리스트. pypdf 미설치/파싱 실패 시 []."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        log.info("pypdf 미설치 — 로컬 추출 생략")
+        return []
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        return [(page.extract_text() or "") for page in reader.pages]
+    except Exception as e:
+        log.warning("로컬 PDF 추출 실패: %s", e)
+        return []
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"[ \t ]+", " ", text or "")
+    text = re.sub(r"\n\s*\n+", "\n\n", text)
+    return text.strip()
+
+
+def chunk_pages(pages, chunk_chars: int = 1500, overlap: int = 200):
+    """페이지 텍스트를 chunk_chars 단위(문단 경계 우선)로 자름 → [(page_no, text), ...]"""
+    chunks = []
+    for page_no, raw in enumerate(pages, 1):
+        text = _clean(raw)
+        start = 0
+        while start < len(text):
+            end = min(len(text), start + chunk_chars)
+            if end < len(text):
+                cut = text.rfind("\n\n", start + chunk_chars // 2, end)
+                if cut < 0:
+                    cut = text.rfind(". ", start + chunk_chars // 2, end)
+                end = cut + 1 if cut > 0 else end
+            piece = text[start:end].strip()
+            if piece:
+                chunks.append((page_no, piece))
+            if end >= len(text):
+                break
+            start = max(end - overlap, start + 1)
+    return chunks
+
+
+def build_local_hits(data: bytes, blob_name: str, *, max_chunks: int = None) -> list:
+    """PDF 바이트 → 검색 결과와 같은 모양의 hit 리스트 (source는 local://<blob>#p<page>)"""
+    if not config.LOCAL_EXTRACT_ENABLED or not data:
+        return []
+    chunks = chunk_pages(extract_pdf_pages(data), config.LOCAL_CHUNK_CHARS, config.LOCAL_CHUNK_OVERLAP)
+    limit = config.LOCAL_MAX_CHUNKS if max_chunks is None else max_chunks
+    return [
+        {"title": blob_name, "content": text, "source": f"{LOCAL_SOURCE_PREFIX}{blob_name}#p{page_no}"}
+        for page_no, text in chunks[:limit]
+    ]
+
+
+def is_local_hits(hits) -> bool:
+    return bool(hits) and all(
+        isinstance(h, dict) and str(h.get("source") or "").startswith(LOCAL_SOURCE_PREFIX) for h in hits
+    )
@@ -0,0 +1,217 @@
+# metrics.py
+"""
+단계(stage)별 계측.
+- stage(name): 벽시계 시간 + 그 안에서 생긴 HTTP 바이트/재시도, 캐시 hit/miss, 프롬프트/완료 토큰을 기록
+- collect(): 한 동작(뉴스 검색, PEST·SWOT 생성 등)의 단계 기록을 모음 → 세션 last_metrics에 저장
+- 프로세스 누적 히스토그램/카운터 → prometheus_text()로 내보내기
+contextvars 기반이라 워커 스레드로 넘길 때는 submit(pool, fn, ...)으로 컨텍스트를 복사해야 합니다.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+_collector = contextvars.ContextVar("metrics_collector", default=None)
+_stage = contextvars.ContextVar("metrics_stage", default=None)
+_lock = threading.Lock()
+
+FIELDS = ("bytes", "http_requests", "retries", "cache_hits", "cache_misses",
+          "prompt_tokens", "completion_tokens", "aoai_calls", "json_reasks", "json_regens", "json_extra_tokens")
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_hist = defaultdict(lambda: {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})   # stage -> 히스토그램
+_counters = defaultdict(float)      # (metric, ((label, value), ...)) -> 누적값
+
+
+class StageRecord:
+    __slots__ = ("name", "labels", "wall_ms", "error", "counts")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.wall_ms = 0.0
+        self.error = ""
+        self.counts = dict.fromkeys(FIELDS, 0)
+
+    def to_dict(self) -> dict:
+        out = {"stage": self.name, **self.labels, "wall_ms": round(self.wall_ms, 1)}
+        out.update({k: v for k, v in self.counts.items() if v})
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class Collector:
+    """한 동작 동안의 단계 기록 (워커 스레드에서도 추가되므로 잠금 사용)"""
+
+    def __init__(self, action: str = ""):
+        self.action = action
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.wall_ms = 0.0
+        self.stages = []
+        self.loose = dict.fromkeys(FIELDS, 0)     # 어떤 stage에도 속하지 않은 이벤트
+
+    def add_stage(self, rec: StageRecord):
+        with _lock:
+            self.stages.append(rec)
+
+    def summary(self) -> dict:
+        with _lock:
+            stages = [r.to_dict() for r in self.stages]
+            totals = dict(self.loose)
+            for r in self.stages:
+                for k, v in r.counts.items():
+                    totals[k] += v
+        return {
+            "action": self.action,
+            "at": time.strftime("%H:%M:%S", time.localtime(self.started)),
+            "wall_ms": round(self.wall_ms, 1),
+            "totals": {k: v for k, v in totals.items() if v},
+            "stages": stages,
+        }
+
+
+@contextlib.contextmanager
+def collect(action: str = ""):
+    c = Collector(action)
+    token = _collector.set(c)
+    try:
+        yield c
+    finally:
+        c.wall_ms = (time.perf_counter() - c._t0) * 1000
+        _collector.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name: str, **labels):
+    rec = StageRecord(name, {k: v for k, v in labels.items() if v not in (None, "")})
+    token = _stage.set(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    except BaseException as e:
+        rec.error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        rec.wall_ms = elapsed * 1000
+        _stage.reset(token)
+        c = _collector.get()
+        if c is not None:
+            c.add_stage(rec)
+        _observe(rec, elapsed)
+
+
+def add(**fields):
+    """현재 stage(없으면 현재 collector)에 카운트 추가 + 프로세스 카운터 반영"""
+    rec, c = _stage.get(), _collector.get()
+    name = rec.name if rec else "-"
+    with _lock:
+        target = rec.counts if rec else (c.loose if c else None)
+        for k, v in fields.items():
+            if not v:
+                continue
+            if target is not None:
+                target[k] = target.get(k, 0) + v
+            _counters[(k, (("stage", name),))] += v
+
+
+def cache_event(namespace: str, hit: bool):
+    add(**{"cache_hits" if hit else "cache_misses": 1})
+    with _lock:
+        _counters[("cache_requests", (("namespace", namespace), ("result", "hit" if hit else "miss")))] += 1
+
+
+def json_result(kind: str, outcome: str, *, full_regen: bool = False, reasked: bool = False, extra_tokens: int = 0):
+    """구조화 JSON 생성 결과 — ok | partial(부분 재요청) | regenerated(전체 재생성) | failed"""
+    add(json_reasks=int(reasked), json_regens=int(full_regen), json_extra_tokens=extra_tokens)
+    with _lock:
+        _counters[("json_results", (("kind", kind), ("outcome", outcome)))] += 1
+
+
+def on_http(info: dict):
+    """http_client 타이밍 훅 — 시도마다 호출"""
+    add(http_requests=1, bytes=info.get("bytes") or 0, retries=1 if info.get("attempt") else 0)
+
+
+def submit(pool, fn, *args, **kwargs):
+    """현재 collector/stage 컨텍스트를 복사해 워커에서 실행"""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _observe(rec: StageRecord, seconds: float):
+    with _lock:
+        h = _hist[rec.name]
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                h["buckets"][i] += 1
+        h["sum"] += seconds
+        h["count"] += 1
+        if rec.error:
+            _counters[("stage_errors", (("stage", rec.name),))] += 1
+
+
+def snapshot() -> dict:
+    """단계별 호출 수/평균/누적 카운터 (디버그 패널용)"""
+    with _lock:
+        stages = {
+            name: {"count": h["count"], "avg_ms": round(h["sum"] / h["count"] * 1000, 1) if h["count"] else 0.0}
+            for name, h in _hist.items()
+        }
+        counters = defaultdict(dict)
+        for (metric, labels), v in _counters.items():
+            counters[metric][",".join(f"{k}={val}" for k, val in labels)] = v
+    return {"stages": stages, "counters": dict(counters)}
+
+
+_PROM_HELP = {
+    "bytes": ("app_http_bytes_total", "HTTP 응답 바이트"),
+    "http_requests": ("app_http_requests_total", "HTTP 요청 시도 수"),
+    "retries": ("app_retries_total", "재시도 수 (HTTP/AOAI)"),
+    "cache_hits": ("app_stage_cache_hits_total", "단계별 캐시 hit"),
+    "cache_misses": ("app_stage_cache_misses_total", "단계별 캐시 miss"),
+    "prompt_tokens": ("app_prompt_tokens_total", "AOAI 프롬프트 토큰"),
+    "completion_tokens": ("app_completion_tokens_total", "AOAI 완료 토큰"),
+    "aoai_calls": ("app_aoai_calls_total", "AOAI 호출 수 (캐시 제외)"),
+    "cache_requests": ("app_cache_requests_total", "캐시 조회 (네임스페이스/결과별)"),
+    "stage_errors": ("app_stage_errors_total", "예외로 끝난 단계 수"),
+    "json_reasks": ("app_json_reasks_total", "JSON 일부 필드 재요청 수"),
+    "json_regens": ("app_json_regens_total", "JSON 전체 재생성 수"),
+    "json_extra_tokens": ("app_json_extra_tokens_total", "JSON 보완(재요청/재생성)에 쓴 추가 토큰"),
+    "json_results": ("app_json_results_total", "구조화 JSON 생성 결과 (종류/결과별)"),
+}
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def prometheus_text() -> str:
+    """Prometheus text exposition format (0.0.4)"""
+    lines = []
+    with _lock:
+        hist = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]} for k, v in _hist.items()}
+        counters = dict(_counters)
+
+    lines += ["# HELP app_stage_duration_seconds 단계별 벽시계 시간", "# TYPE app_stage_duration_seconds histogram"]
+    for name, h in sorted(hist.items()):
+        for le, n in zip(BUCKETS, h["buckets"]):
+            lines.append(f"app_stage_duration_seconds_bucket{_labels([('stage', name), ('le', le)])} {n}")
+        lines.append(f"app_stage_duration_seconds_bucket{_labels([('stage', name), ('le', '+Inf')])} {h['count']}")
+        lines.append(f"app_stage_duration_seconds_sum{_labels([('stage', name)])} {h['sum']:.6f}")
+        lines.append(f"app_stage_duration_seconds_count{_labels([('stage', name)])} {h['count']}")
+
+    by_metric = defaultdict(list)
+    for (metric, labels), v in counters.items():
+        by_metric[metric].append((labels, v))
+    for metric in sorted(by_metric):
+        prom, help_text = _PROM_HELP.get(metric, (f"app_{metric}_total", metric))
+        lines += [f"# HELP {prom} {help_text}", f"# TYPE {prom} counter"]
+        for labels, v in sorted(by_metric[metric]):
+            lines.append(f"{prom}{_labels(labels)} {v:g}")
+    return "\n".join(lines) + "\n"
@@ -4,8 +4,9 @@ POLL_INTERVAL = 3     # 재시도 간격(초)
 
 # pages/1_📄_내부_문서_분석.py
 import streamlit as st
-import requests, uuid
-import config, utils
+import uuid
+import config, utils, http_client
+import cache, runtime, jobs, indexer_monitor, local_docs, retrieval, rate_limit, singleflight, metrics
 from ui import H2, H3, _clean_citations
 
 # ====================== 세션 기본값 ======================
@@ -22,22 +23,23 @@ def _rerun():
         st.experimental_rerun()
 
 def _clear_analysis_state():
-    for k in ("doc_hits", "last_blob_name"):
+    for k in ("doc_hits", "doc_hits_query", "doc_summary", "last_blob_name"):
         st.session_state.pop(k, None)
     for k in ("news_results", "pest_swot_json", "combined_json", "pdf_sig"):
         st.session_state.pop(k, None)
-    st.cache_data.clear()
-    st.cache_resource.clear()
+    # 전역 clear 대신 이 세션만 쓰던 캐시 항목만 제거 (다른 사용자 캐시·Blob 클라이언트 유지)
+    return cache.store.invalidate_session(runtime.session_id())
 
 # -------------------------------------------------------------------
 # 유틸: 인덱서 상태 조회 (고급 기능)
 # -------------------------------------------------------------------
 def _get_indexer_status():
+    # 프로세스 공용 감시자의 캐시된 상태를 읽음 (세션마다 따로 폴링하지 않음)
+    monitor = indexer_monitor.get_monitor()
+    if not monitor:
+        return {}
     try:
-        url = f"{config.SEARCH_ENDPOINT}/indexers/{config.SEARCH_INDEXER}/status?api-version={config.SEARCH_API_VER}"
-        r = requests.get(url, headers={"api-key": config.SEARCH_KEY}, timeout=20)
-        r.raise_for_status()
-        return r.json() or {}
+        return monitor.status() or {}
     except Exception as e:
         st.error(f"상태 조회 실패: {e}")
         return {}
@@ -65,55 +67,68 @@ with col_up[2]:
     last = st.session_state.get("last_blob_name")
     st.info(f"최근 업로드: `{last}`" if last else "최근 업로드: (없음)")
 
-# 업로드 실행
+# 업로드 실행 — 업로드/인덱서 실행/반영 폴링은 백그라운드 작업으로 (스크립트 스레드 비점유)
 if st.button("⬆️ 업로드 실행", use_container_width=True, key="btn_blob_upload"):
     if not upload_file:
         st.warning("파일을 먼저 선택하세요.")
     elif not config.blob_container:
         st.error("Blob 컨테이너 연결 실패. .env의 AZURE_STORAGE_CONN 확인.")
     else:
-        try:
-            import time, uuid
-            blob_name = f"{uuid.uuid4()}_{upload_file.name}"
-            upload_file.seek(0)
-            config.blob_container.upload_blob(name=blob_name, data=upload_file, overwrite=True)
-            st.session_state["last_blob_name"] = blob_name
-            st.success(f"✅ 업로드 완료: {blob_name}")
-
-            if auto_fetch:
-                # 화면엔 스피너만 보이게
-                with st.spinner("📄 인덱싱 반영 중입니다... 잠시만 기다려주세요."):
-                    hits = []
-                    delays = [2, 3, 5, 8, 13, 21]
-                    for i, wait in enumerate(delays, start=1):
-                        st.cache_data.clear()
-                        try:
-                            hits = utils.search_docs_by_blobname(st.session_state["last_blob_name"], top=10, nonce=i)
-                        except TypeError:
-                            hits = utils.search_docs_by_blobname(st.session_state["last_blob_name"], top=10)
-
-                        if hits:
-                            break
-
-                        if i in (2, 3) and config.SEARCH_INDEXER:
-                            try:
-                                run_url = f"{config.SEARCH_ENDPOINT}/indexers/{config.SEARCH_INDEXER}/run?api-version={config.SEARCH_API_VER}"
-                                requests.post(run_url, headers={"api-key": config.SEARCH_KEY}, timeout=10)
-                            except Exception:
-                                pass
-
-                        time.sleep(wait)
-
-                if hits:
-                    st.session_state["doc_hits"] = hits
-                    st.success(f"✅ 인덱싱 반영 완료! 문서 조각 {len(hits)}건")
-                    st.toast(f"{len(hits)}건 로드됨")
-                else:
-                    st.session_state["doc_hits"] = []
-                    st.warning("⚠️ 아직 인덱싱 대기 중입니다. 잠시 후 다시 시도하세요.")
-
-        except Exception as e:
-            st.error(f"업로드 오류: {e}")
+        blob_name = f"{uuid.uuid4()}_{upload_file.name}"
+        data = upload_file.getvalue()
+        st.session_state["last_blob_name"] = blob_name
+        st.session_state["upload_job_id"] = jobs.submit("upload", jobs.upload_and_index, data, blob_name, auto_fetch)
+        if auto_fetch:
+            # 인덱서를 기다리는 동안 로컬 추출본으로 먼저 요약 (인덱싱 완료 시 자동 교체)
+            with st.spinner("📄 로컬 텍스트 추출 중..."):
+                local_hits = local_docs.build_local_hits(data, blob_name)
+            if local_hits:
+                st.session_state["doc_hits"] = local_hits
+                st.session_state["doc_hits_query"] = ""    # 업로드 추출본은 검색어 없이 요약
+                retrieval.index_documents(blob_name, local_hits)
+
+def _render_upload_job():
+    """작업 상태만 조회해 표시. 끝나면 doc_hits 반영 후 전체 rerun."""
+    job_id = st.session_state.get("upload_job_id")
+    job = jobs.get(job_id) if job_id else None
+    if not job:
+        return
+    if job["status"] in ("queued", "running"):
+        st.progress(job["progress"], text=f"📄 {job['message'] or '작업 대기 중...'}")
+        return
+    st.session_state.pop("upload_job_id", None)
+    if job["status"] == "failed":
+        st.session_state["upload_job_outcome"] = ("error", f"업로드 오류: {job['error']}")
+    else:
+        hits = job["result"].get("hits")
+        if hits is None:
+            st.session_state["upload_job_outcome"] = ("success", f"✅ 업로드 완료: {job['result'].get('blob_name')}")
+        elif hits:
+            st.session_state["doc_hits"] = hits
+            st.session_state["doc_hits_query"] = ""
+            retrieval.index_documents(job["result"].get("blob_name") or "", hits)
+            st.session_state["upload_job_outcome"] = ("success", f"✅ 인덱싱 반영 완료! 문서 조각 {len(hits)}건")
+        elif local_docs.is_local_hits(st.session_state.get("doc_hits")):
+            # 인덱스는 아직이지만 로컬 추출본은 유지
+            st.session_state["upload_job_outcome"] = ("info", "ℹ️ 인덱싱 대기 중 — 로컬 추출본으로 표시합니다. 잠시 후 다시 조회하세요.")
+        else:
+            st.session_state["doc_hits"] = []
+            st.session_state["doc_hits_query"] = ""
+            st.session_state["upload_job_outcome"] = ("warning", "⚠️ 아직 인덱싱 대기 중입니다. 잠시 후 다시 시도하세요.")
+    _rerun()
+
+if hasattr(st, "fragment"):
+    # 작업이 있을 때만 fragment 단위로 주기 조회 (페이지 전체는 다시 그리지 않음)
+    st.fragment(run_every=2 if st.session_state.get("upload_job_id") else None)(_render_upload_job)()
+else:
+    _render_upload_job()
+    if st.session_state.get("upload_job_id"):
+        st.button("🔄 작업 상태 새로고침", key="btn_job_refresh")
+
+outcome = st.session_state.pop("upload_job_outcome", None)
+if outcome:
+    level, msg = outcome
+    getattr(st, level)(msg)
 
 # -------------------------------------------------------------------
 # ⛔ 강제 재시작(Reset → Run) 후 내 파일 재조회  + 세션 초기화는 고급으로 이동
@@ -123,8 +138,10 @@ with st.expander("⚙️ 고급: 디버그/복구 도구", expanded=False):
 
     with c1:
         if st.button("🧹 세션 초기화 (앱 다시 시작)", use_container_width=True, key="btn_reset_pdf_here"):
-            _clear_analysis_state()
+            st.session_state["last_cache_evicted"] = _clear_analysis_state()
             _rerun()
+        if st.session_state.get("last_cache_evicted") is not None:
+            st.caption(f"최근 세션 초기화: 캐시 {st.session_state['last_cache_evicted']}건 제거")
 
     with c2:
         if st.button("⛔ 강제 재시작(Reset→Run) 후 재조회", use_container_width=True, key="btn_force_reset_run"):
@@ -134,63 +151,50 @@ with st.expander("⚙️ 고급: 디버그/복구 도구", expanded=False):
             elif not (config.SEARCH_ENDPOINT and config.SEARCH_INDEXER and config.SEARCH_KEY and config.SEARCH_API_VER):
                 st.error("Azure Search 설정(ENDPOINT/INDEXER/KEY/API_VER)이 누락되었습니다.")
             else:
-                import time, requests
-                try:
-                    headers = {"api-key": config.SEARCH_KEY}
-                    base = f"{config.SEARCH_ENDPOINT}/indexers/{config.SEARCH_INDEXER}"
-
-                    # Reset → Run
-                    r_reset = requests.post(f"{base}/reset?api-version={config.SEARCH_API_VER}", headers=headers, timeout=20)
-                    if r_reset.status_code not in (204, 202):
-                        st.warning(f"Reset 응답: {r_reset.status_code} {r_reset.text}")
-
-                    r_run = requests.post(f"{base}/run?api-version={config.SEARCH_API_VER}", headers=headers, timeout=20)
-                    if r_run.status_code not in (202, 204):
-                        st.warning(f"Run 응답: {r_run.status_code} {r_run.text}")
-
-                    with st.spinner("📄 인덱싱 반영 대기 중..."):
-                        found = []
-                        for i in range(12):   # 최대 ~36초
-                            st.cache_data.clear()
-                            try:
-                                found = utils.search_docs_by_blobname(last, top=10, nonce=i)
-                            except TypeError:
-                                found = utils.search_docs_by_blobname(last, top=10)
-                            if found:
-                                break
-                            time.sleep(3)
-
-                    if found:
-                        st.session_state["doc_hits"] = found
-                        st.success(f"✅ 인덱싱 반영됨: 조각 {len(found)}건")
-                        st.toast("요약 영역을 아래에서 확인하세요.")
-                    else:
-                        st.info("아직 반영되지 않았습니다. 잠시 후 다시 눌러보세요.")
-                except Exception as e:
-                    st.error(f"강제 재시작 실패: {e}")
+                # Reset → Run 및 반영 대기는 백그라운드 작업으로 (상태는 상단 진행 표시줄)
+                st.session_state["upload_job_id"] = jobs.submit("reindex", jobs.reindex_and_fetch, last)
+                _rerun()
 
     st.markdown("---")
-    if st.button("🏃 인덱서 수동 실행", use_container_width=True, disabled=not config.SEARCH_INDEXER):
-        try:
-            run_url = f"{config.SEARCH_ENDPOINT}/indexers/{config.SEARCH_INDEXER}/run?api-version={config.SEARCH_API_VER}"
-            r = requests.post(run_url, headers={"api-key": config.SEARCH_KEY}, timeout=20)
-            if r.status_code == 202:
-                st.success("✅ 실행 트리거 성공")
-            elif r.status_code == 409:
-                st.warning("⚠️ 이미 실행 중(409). 잠시 후 상태 확인하세요.")
-            else:
-                st.error(f"❌ 실패: {r.status_code} {r.text}")
-        except Exception as e:
-            st.error(f"실행 오류: {e}")
-
-    if st.button("🔎 인덱서 상태 확인", use_container_width=True, disabled=not config.SEARCH_INDEXER):
+    monitor_ready = indexer_monitor.get_monitor() is not None
+    if st.button("🏃 인덱서 수동 실행", use_container_width=True, disabled=not monitor_ready):
+        outcome = indexer_monitor.get_monitor().request_run()
+        if outcome == "started":
+            st.success("✅ 실행 트리거 성공")
+        elif outcome in ("coalesced", "conflict"):
+            st.warning("⚠️ 이미 실행 중입니다. 진행 중인 실행이 끝나면 필요 시 1회 재실행됩니다.")
+        else:
+            st.error(f"❌ 실패: {outcome}")
+
+    if st.button("🔎 인덱서 상태 확인", use_container_width=True, disabled=not monitor_ready):
         s = _get_indexer_status()
         top = (s.get("status") or "").lower()
         last = s.get("lastResult") or {}
         st.info(f"service={top} · last={ (last.get('status') or '').lower() }")
+        st.caption(f"공용 감시자: {indexer_monitor.get_monitor().snapshot()}")
         with st.expander("원본 상태 JSON 보기"):
             st.json(s)
 
+    st.markdown("---")
+    st.caption("HTTP 호스트별 요청/오류/재시도/평균 지연")
+    st.json(http_client.host_stats(), expanded=False)
+    st.caption("검색 후보 전략별 호출/적중/승리/취소 건수와 평균 지연")
+    st.json(utils.search_strategy_stats(), expanded=False)
+    st.caption(f"검색 백엔드: {retrieval.get_backend().name} · 로컬 BM25 색인")
+    st.json(retrieval.get_local_index().stats(), expanded=False)
+    st.caption("Azure OpenAI 속도 제한 (동시 한도/대기/429/남은 RPM·TPM)")
+    st.json(rate_limit.stats(), expanded=False)
+    st.caption("백그라운드 작업 풀")
+    st.json(jobs.pool_stats(), expanded=False)
+    st.caption("동시 동일 요청 합치기 (네임스페이스별 실제 호출/합쳐진 호출/진행 중)")
+    st.json(singleflight.stats(), expanded=False)
+    st.caption("단계별 지표 — 이 세션 최근 동작(last_metrics) · 프로세스 누적")
+    st.json(st.session_state.get("last_metrics") or {}, expanded=False)
+    st.json(metrics.snapshot(), expanded=False)
+    st.caption("캐시 상태 (네임스페이스별 hit/miss/제거 건수 · 최근 무효화 이력)")
+    st.json(cache.store.stats(), expanded=False)
+    st.json([{"scope": scope, "evicted": n} for _, scope, n in list(cache.store.history)[-10:]], expanded=False)
+
 st.divider()
 
 # -------------------------------------------------------------------
@@ -205,8 +209,11 @@ if st.button("⬆️ 키워드 검색", use_container_width=True, key="btn_fetch
     if not query:
         st.warning("검색어를 입력하세요.")
     else:
-        hits = utils.search_docs_by_keyword(query, top=8)
+        with metrics.collect("doc_search") as mc, metrics.stage("doc_search", backend=retrieval.get_backend().name):
+            hits = retrieval.search(query, top=8)
+        runtime.save_metrics(mc)
         st.session_state["doc_hits"] = hits
+        st.session_state["doc_hits_query"] = query    # 요약 캐시 키는 입력창이 아니라 검색에 쓴 질의로
         st.success(f"키워드 검색 결과 {len(hits)}건")
 
 st.divider()
@@ -219,13 +226,21 @@ H3("📚 내부 문서 검색 결과 (통합 요약 1건)")
 if not doc_hits:
     st.caption("아직 검색된 문서가 없습니다. 업로드 후 자동 조회 또는 '키워드 검색'을 실행하세요.")
 else:
+    if local_docs.is_local_hits(doc_hits):
+        st.caption("⚡ 업로드 파일에서 바로 추출한 내용입니다. 인덱싱이 끝나면 검색 결과로 자동 교체됩니다.")
     top_titles = [(h.get("title") or "(제목 없음)") for h in doc_hits[:3] if isinstance(h, dict)]
     if top_titles:
         st.caption("대표: " + " | ".join(top_titles))
 
     safe_hits = [h for h in doc_hits if isinstance(h, dict)]
     try:
-        summary = utils.summarize_docs_combined(safe_hits, max_chars=20000)
+        with metrics.collect("doc_summary") as mc, metrics.stage("summarize", chunks=len(safe_hits)):
+            summary = utils.summarize_docs_combined(
+                safe_hits, max_chars=20000, query=st.session_state.get("doc_hits_query", "")
+            )
+        runtime.save_metrics(mc)
+        # 통합 인사이트가 문서 원문 대신 쓰는 압축 근거 (어떤 doc_hits로 만든 요약인지 함께 보관)
+        st.session_state["doc_summary"] = {"sig": utils.hits_signature(safe_hits), "text": str(summary).strip()}
         st.write(_clean_citations(str(summary).strip()))
     except Exception as e:
         st.warning(f"요약 실패 → 일부만 표시 ({e})")
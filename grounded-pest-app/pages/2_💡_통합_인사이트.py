@@ -6,7 +6,12 @@ import re
 from datetime import datetime
 import config  # config.py 임포트
 import utils   # utils.py 임포트
+import context_pack
+import metrics
+import runtime
+import structured
 from ui import H2, H3, _take2, _html_list  # ui.py 임포트
+from json_stream import IncrementalJSONParser
 
 from ui import inject_css  # ⬅ 추가
 inject_css()              # ⬅ 추가(초기화 직후면 어디든 OK)
@@ -35,6 +40,38 @@ def _dedup_strip_refs_list(items):
             out.append(cleaned)
     return out
 
+# ---------------------- 헬퍼: 스트리밍 중 부분 결과 렌더 ----------------------
+def _render_combined_partial(part, ph_sum, ph_sw, ph_prop):
+    """닫힌 필드만으로 탭 3개를 미리 채움 (완료 후 최종 렌더로 교체)"""
+    inner, outer = _take2(part.get("internal_summary")), _take2(part.get("external_insights"))
+    with ph_sum.container():
+        if inner:
+            st.markdown(f'<div class="card-accent"><div class="box-title">내부 문서 요약</div>{_html_list(inner)}</div>',
+                        unsafe_allow_html=True)
+        if outer:
+            st.markdown(f'<div class="card-accent"><div class="box-title">외부(뉴스) 요약</div>{_html_list(outer)}</div>',
+                        unsafe_allow_html=True)
+        if not (inner or outer):
+            st.caption("⏳ 생성 중… 완료된 항목부터 표시됩니다.")
+    if "strengths" in part or "weaknesses" in part:
+        ph_sw.markdown(
+            '<div class="grid-2-equal">'
+            f'<div class="quad"><h4>S (강점)</h4>{_html_list(_dedup_strip_refs_list(_take2(part.get("strengths"))) or [""])}</div>'
+            f'<div class="quad"><h4>W (약점)</h4>{_html_list(_dedup_strip_refs_list(_take2(part.get("weaknesses"))) or [""])}</div>'
+            '</div>',
+            unsafe_allow_html=True
+        )
+    props = part.get("proposals") or {}
+    if props:
+        label_map = {"benchmarking": "벤치마킹", "cooperation": "협력안", "differentiation": "차별화"}
+        with ph_prop.container():
+            for key, label in label_map.items():
+                got = _dedup_strip_refs_list(_take2(props.get(key)))
+                if got:
+                    joined = "<br>".join(html.escape(l) for l in got)
+                    st.markdown(f'<div class="card-accent"><div class="box-title">{label}</div>{joined}</div>',
+                                unsafe_allow_html=True)
+
 # ---------------------- 통합 인사이트 생성 버튼 ----------------------
 col_ci1, col_ci2 = st.columns([1, 2])
 with col_ci1:
@@ -42,6 +79,8 @@ with col_ci1:
 with col_ci2:
     st.caption("뉴스 검색 결과와 내부 문서 검색 결과가 모두 필요합니다.")
 
+pending_messages = None
+combined_status = st.empty()
 if run_combined:
     news_items = st.session_state.get("news_results", [])
     hits = st.session_state.get("doc_hits", [])
@@ -58,14 +97,21 @@ if run_combined:
     elif not hits:
         st.warning("먼저 '📄 내부 문서 분석' 페이지에서 문서를 조회해 근거를 준비하세요.")
     else:
-        try:
-            combined_json_text = utils.run_aoai(
-                utils.build_messages_combined(news_items, hits, company, techs, domains)
-            )
-            st.session_state["combined_json"] = combined_json_text
-            st.success("통합 인사이트 완료 ✅ (아래 결과 확인)")
-        except Exception as e:
-            st.error(f"생성 오류: {e}")
+        # 이미 만든 PEST·SWOT / 문서 요약이 있으면 원문 대신 압축 근거로 사용 (없는 쪽만 원문)
+        doc_summary = st.session_state.get("doc_summary") or {}
+        if doc_summary.get("sig") != utils.hits_signature([h for h in hits if isinstance(h, dict)]):
+            doc_summary = {}
+        pest_swot = st.session_state.get("pest_swot_json")
+        if st.session_state.get("pest_swot_sig") != utils.selection_signature(company, techs, domains, news_items):
+            pest_swot = None    # 회사/기술/도메인 선택이나 뉴스가 바뀐 뒤의 이전 PEST·SWOT은 쓰지 않음
+        if config.COMBINED_COMPACT_CONTEXT and (pest_swot or doc_summary):
+            used = [name for name, v in (("PEST·SWOT", pest_swot), ("문서 요약", doc_summary)) if v]
+            st.caption(f"⚡ 압축 근거 사용: {' · '.join(used)} (없는 쪽은 원문)")
+        # 스트리밍 생성은 아래 탭 영역에서 진행 (탭이 점진적으로 채워짐)
+        pending_messages = utils.build_messages_combined(
+            news_items, hits, company, techs, domains,
+            pest_swot=pest_swot, doc_summary=doc_summary.get("text"),
+        )
 
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
@@ -85,9 +131,40 @@ with st.expander("디버그: 통합 인사이트 원본 보기", expanded=False)
     else:
         st.json(raw)
     st.write("parsed keys:", list(combined_data.keys()))
+    st.write("컨텍스트 패킹 (원본/사용/절감 토큰):", context_pack.stats())
+    st.write("뉴스 근사 중복 제거 (누적):", utils.news_dedupe_stats())
+    st.write("JSON 검증/보완 (누적, 전체 재생성 비율·추가 토큰):", structured.stats())
+    st.write("최근 통합 인사이트 단계별 지표:", (st.session_state.get("last_metrics") or {}).get("combined_insight") or {})
 
 tab_sum, tab_sw, tab_prop = st.tabs(["📝 문서 요약", "💪 강점·약점", "🎯 우선 제안"])
 
+if pending_messages:
+    with tab_sum:
+        ph_sum = st.empty()
+    with tab_sw:
+        ph_sw = st.empty()
+    with tab_prop:
+        ph_prop = st.empty()
+    try:
+        parser = IncrementalJSONParser(max_depth=2)
+        _render_combined_partial({}, ph_sum, ph_sw, ph_prop)
+        with metrics.collect("combined_insight") as mc, metrics.stage("combined_insight"):
+            for delta in utils.run_aoai_stream(pending_messages, response_format=structured.response_format("combined")):
+                if parser.feed(delta):
+                    _render_combined_partial(parser.result, ph_sum, ph_sw, ph_prop)
+            # 비었거나 틀린 필드만 재요청 (대부분 틀렸을 때만 전체 재생성)
+            with st.spinner("누락된 항목 보완 중..."):
+                _, combined_text = utils.complete_json("combined", pending_messages, parser.text)
+        runtime.save_metrics(mc)
+        st.session_state["combined_json"] = combined_text
+        combined_status.success("통합 인사이트 완료 ✅ (아래 결과 확인)")
+    except Exception as e:
+        combined_status.error(f"생성 오류: {e}")
+    for ph in (ph_sum, ph_sw, ph_prop):
+        ph.empty()
+    combined_data = utils.parse_json_from_session("combined_json") or {}
+    has_combined = bool(st.session_state.get("combined_json"))
+
 # ── 탭1: 문서 요약 ───────────────────────────────────────────
 with tab_sum:
     H3("문서 요약")
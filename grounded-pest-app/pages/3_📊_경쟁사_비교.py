@@ -0,0 +1,66 @@
+# pages/3_📊_경쟁사_비교.py
+import streamlit as st
+import config  # config.py 임포트
+import batch
+from ui import inject_css, H1, H2
+
+inject_css()
+
+# 세션 상태가 초기화되었는지 확인 (app.py를 먼저 실행해야 함)
+if "news_results" not in st.session_state:
+    config.initialize_session_state()
+
+H1("📊 경쟁사 PEST·SWOT 일괄 비교")
+st.caption("선택한 회사 × 기술 × 도메인 조합을 동시에 분석해 완료되는 순서대로 비교 표에 채웁니다. "
+           "같은 조합은 캐시된 결과를 재사용합니다.")
+
+# ---------------------- 입력 UI ----------------------
+colA, colB, colC = st.columns(3)
+with colA:
+    companies = st.multiselect("회사", config.COMPANY_PRESETS, default=config.COMPANY_PRESETS[:4], key="batch_companies")
+with colB:
+    techs = st.multiselect("관심 기술", config.TECH_CHOICES, default=["AI"], key="batch_techs")
+with colC:
+    domains = st.multiselect("도메인", config.DOMAIN_CHOICES, default=["금융"], key="batch_domains")
+
+opt = st.columns([1, 1, 1])
+with opt[0]:
+    freshness = st.selectbox("신선도", ["Day", "Week", "Month"], index=1, key="batch_freshness")
+with opt[1]:
+    cnt = st.slider("뉴스 개수", 1, 3, 2, key="batch_news_count", help="셀·공급자별 개수")
+with opt[2]:
+    split = st.checkbox("기술·도메인 조합별로 나누기", value=False, key="batch_split",
+        help="끄면 회사별 1셀, 켜면 회사 × 기술 × 도메인마다 1셀")
+
+cells = batch.expand_grid(companies, techs, domains, split=split)
+if len(cells) > config.BATCH_MAX_CELLS:
+    st.warning(f"셀 {len(cells)}개 중 앞의 {config.BATCH_MAX_CELLS}개만 실행합니다 (BATCH_MAX_CELLS).")
+run = st.button(f"📊 일괄 생성 ({min(len(cells), config.BATCH_MAX_CELLS)}셀)", use_container_width=True,
+                disabled=not cells, key="btn_batch_run")
+
+# ---------------------- 비교 표 ----------------------
+H2("비교 표")
+rows = st.session_state.setdefault("batch_rows", {})
+matrix = st.empty()
+
+def _draw():
+    if rows:
+        matrix.dataframe(list(rows.values()), use_container_width=True, hide_index=True)
+    else:
+        matrix.caption("아직 결과가 없습니다. 조합을 고른 뒤 '일괄 생성'을 눌러주세요.")
+
+_draw()
+
+if run and cells:
+    rows.clear()
+    progress = st.progress(0.0, text="분석 중...")
+    total = min(len(cells), config.BATCH_MAX_CELLS)
+    failed = cached = 0
+    for i, cell in enumerate(batch.run_batch(cells, cnt=cnt, freshness=freshness), 1):
+        rows[cell.key] = batch.matrix_row(cell)
+        failed += cell.status != "done"
+        cached += cell.cached
+        progress.progress(i / total, text=f"{i}/{total} 완료 · {cell.label} ({cell.elapsed:.1f}s)")
+        _draw()
+    progress.empty()
+    st.success(f"{total}셀 완료 (캐시 {cached} · 실패 {failed})")
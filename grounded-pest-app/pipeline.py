@@ -0,0 +1,223 @@
+# pipeline.py
+"""
+뉴스 → PEST·SWOT → 통합 인사이트 파이프라인 (Streamlit 없이 실행 가능).
+페이지/일괄 비교(batch.py)/cron 모두 이 함수들을 호출합니다.
+
+  python pipeline.py run --company 삼성SDS --tech AI --domain 금융 [--combined]
+  python pipeline.py precompute          # 프리셋 그리드 → result_store (야간 cron)
+"""
+import argparse
+import itertools
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+
+import config
+import llm_cache
+import metrics
+import result_store
+import retrieval
+import structured
+import utils
+
+log = logging.getLogger(__name__)
+
+# 프로세스 전체 동시 실행 상한 (일괄 비교/사전 계산 공용)
+_pool = ThreadPoolExecutor(max_workers=config.BATCH_CONCURRENCY, thread_name_prefix="pipeline")
+
+
+@dataclass
+class PestSwotResult:
+    company: str
+    techs: list = field(default_factory=list)
+    domains: list = field(default_factory=list)
+    freshness: str = "Week"
+    cnt: int = 2
+    news: list = field(default_factory=list)
+    text: str = ""                  # LLM 응답 원문 (JSON 문자열)
+    data: dict = field(default_factory=dict)
+    source: str = "live"            # live | llm_cache | store
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    elapsed: float = 0.0
+
+    @property
+    def query(self) -> str:
+        return " ".join(s for s in [self.company or "", " ".join(self.techs), " ".join(self.domains)] if s).strip()
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.data) and not self.error
+
+    def to_payload(self) -> dict:
+        return {"news": self.news, "text": self.text}
+
+
+def is_llm_cached(messages, response_format=None) -> bool:
+    """run_aoai 기본 인자(+ response_format) 기준으로 메모리/디스크 캐시에 결과가 있는지"""
+    found, _ = utils.run_aoai.peek(messages, response_format=response_format)
+    if found:
+        return True
+    disk = llm_cache.get_cache()
+    if not disk:
+        return False
+    key = llm_cache.make_key(messages, deployment=config.AOAI_DEPLOY, temperature=0.2, max_tokens=800,
+                             response_format=response_format)
+    return disk.get(key) is not None
+
+
+def run_pest_swot(company, techs, domains, *, cnt: int = 2, freshness: str = "Week",
+                  use_store: bool = True, save: bool = False) -> PestSwotResult:
+    """
+    뉴스 수집 → PEST·SWOT JSON 생성.
+    use_store=True면 사전 계산 결과(result_store)가 있을 때 그대로 반환, save=True면 결과를 저장소에 기록.
+    """
+    t0 = time.perf_counter()
+    res = PestSwotResult(company or "", list(techs or []), list(domains or []), freshness, cnt)
+    if use_store:
+        hit = result_store.lookup(res.company, res.techs, res.domains, freshness, cnt)
+        if hit:
+            payload, res.created = hit
+            res.news, res.text = payload.get("news") or [], payload.get("text") or ""
+            res.data, res.source = utils.safe_json_loads(res.text) or {}, "store"
+            res.elapsed = time.perf_counter() - t0
+            return res
+
+    res.news, _ = utils.fetch_news_all(res.query, cnt, freshness)
+    if not res.news:
+        res.error = "뉴스 없음"
+    else:
+        messages = utils.build_messages_news(res.company, res.techs, res.domains, res.news)
+        rf = structured.response_format("pest_swot")
+        if is_llm_cached(messages, rf):
+            res.source = "llm_cache"
+        text = utils.run_aoai(messages, response_format=rf) or ""
+        res.data, res.text = utils.complete_json("pest_swot", messages, text)
+        if not res.data:
+            res.error = "JSON 파싱 실패"
+    if save and res.ok:
+        result_store.save(res.company, res.techs, res.domains, freshness, cnt, res.to_payload())
+    res.elapsed = time.perf_counter() - t0
+    return res
+
+
+def run_combined(news, hits, company, techs, domains, *, pest_swot=None, doc_summary=None) -> dict:
+    """
+    뉴스 + 내부 문서 조각 → 통합 인사이트 JSON (dict, 스키마 검증/부분 재요청 포함).
+    pest_swot(PEST·SWOT JSON 텍스트)/doc_summary(문서 통합 요약)를 주면 원문 대신 압축 근거로 사용.
+    """
+    messages = utils.build_messages_combined(news, hits, company, techs, domains,
+                                             pest_swot=pest_swot, doc_summary=doc_summary)
+    text = utils.run_aoai(messages, response_format=structured.response_format("combined")) or ""
+    return utils.complete_json("combined", messages, text)[0]
+
+
+def _run_safe(company, techs, domains, **kw) -> PestSwotResult:
+    try:
+        with metrics.stage("pest_swot", company=company):
+            return run_pest_swot(company, techs, domains, **kw)
+    except Exception as e:
+        log.warning("pipeline %s %s %s failed: %s", company, techs, domains, e)
+        return PestSwotResult(company or "", list(techs or []), list(domains or []),
+                              kw.get("freshness", "Week"), kw.get("cnt", 2), error=str(e))
+
+
+def run_grid(combos, *, cnt: int = 2, freshness: str = "Week", use_store: bool = True, save: bool = False):
+    """
+    (company, techs, domains) 조합들을 공용 풀에서 동시에 실행, 완료 순서대로 PestSwotResult를 yield.
+    셀 단위 예외는 result.error로 돌려주고 나머지 셀은 계속 진행.
+    """
+    futures = [
+        metrics.submit(_pool, _run_safe, c, t, d, cnt=cnt, freshness=freshness, use_store=use_store, save=save)
+        for c, t, d in combos
+    ]
+    for fut in as_completed(futures):
+        yield fut.result()
+
+
+def preset_grid(companies=None, techs=None, domains=None) -> list:
+    """사전 계산 대상: 회사 × 기술 1개 × 도메인 1개 (메인 페이지 기본 선택 형태)"""
+    companies = companies or config.COMPANY_PRESETS
+    techs = techs or config.PRECOMPUTE_TECHS
+    domains = domains or config.PRECOMPUTE_DOMAINS
+    return [(c, [t], [d]) for c, t, d in itertools.product(companies, techs, domains)]
+
+
+def precompute(combos=None, *, cnt: int = None, freshness: str = None) -> dict:
+    """프리셋 그리드를 새로 계산해 result_store에 기록 (저장소는 읽지 않음)"""
+    combos = preset_grid() if combos is None else combos
+    cnt = config.PRECOMPUTE_NEWS_COUNT if cnt is None else cnt
+    freshness = freshness or config.PRECOMPUTE_FRESHNESS
+    t0 = time.perf_counter()
+    summary = {"cells": len(combos), "saved": 0, "failed": 0, "errors": {}}
+    for res in run_grid(combos, cnt=cnt, freshness=freshness, use_store=False, save=True):
+        if res.ok:
+            summary["saved"] += 1
+        else:
+            summary["failed"] += 1
+            summary["errors"][res.query] = res.error
+        log.info("precompute %s → %s (%.1fs)", res.query, "ok" if res.ok else res.error, res.elapsed)
+    if result_store.get_store():
+        result_store.get_store().prune()
+    summary["elapsed_sec"] = round(time.perf_counter() - t0, 2)
+    return summary
+
+
+# ===================== CLI =====================
+def _csv(s: str) -> list:
+    return [x.strip() for x in (s or "").split(",") if x.strip()]
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="뉴스 → PEST·SWOT → 통합 인사이트 파이프라인")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="조합 1개 실행 후 JSON 출력")
+    p_run.add_argument("--company", default="")
+    p_run.add_argument("--tech", action="append", default=[], help="여러 번 지정 가능")
+    p_run.add_argument("--domain", action="append", default=[], help="여러 번 지정 가능")
+    p_run.add_argument("--count", type=int, default=2, help="공급자별 뉴스 개수")
+    p_run.add_argument("--freshness", default="Week", choices=["Day", "Week", "Month"])
+    p_run.add_argument("--combined", action="store_true", help="내부 문서 검색 후 통합 인사이트까지 생성")
+    p_run.add_argument("--no-store", action="store_true", help="사전 계산 결과를 읽지 않음")
+    p_run.add_argument("--save", action="store_true", help="결과를 사전 계산 저장소에 기록")
+
+    p_pre = sub.add_parser("precompute", help="프리셋 그리드 사전 계산 → 결과 저장소")
+    p_pre.add_argument("--companies", default="", help="쉼표 구분 (기본: COMPANY_PRESETS)")
+    p_pre.add_argument("--techs", default="", help="쉼표 구분 (기본: PRECOMPUTE_TECHS)")
+    p_pre.add_argument("--domains", default="", help="쉼표 구분 (기본: PRECOMPUTE_DOMAINS)")
+    for p in (p_run, p_pre):
+        p.add_argument("--metrics", metavar="PATH", help="끝난 뒤 Prometheus 텍스트 지표를 파일로 저장 (- 는 stderr)")
+
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.cmd == "precompute":
+        combos = preset_grid(_csv(args.companies), _csv(args.techs), _csv(args.domains))
+        summary = precompute(combos)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        rc = 0 if not summary["failed"] else 1
+    else:
+        with metrics.stage("pest_swot", company=args.company):
+            res = run_pest_swot(args.company, args.tech, args.domain, cnt=args.count, freshness=args.freshness,
+                                use_store=not args.no_store, save=args.save)
+        out = asdict(res)
+        if args.combined and res.ok:
+            with metrics.stage("combined_insight", company=res.company):
+                out["combined"] = run_combined(res.news, retrieval.search(res.query), res.company, res.techs,
+                                               res.domains, pest_swot=res.text)
+        print(json.dumps(out, ensure_ascii=False, indent=2, default=str))
+        rc = 0 if res.ok else 1
+
+    if args.metrics == "-":
+        sys.stderr.write(metrics.prometheus_text())
+    elif args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(metrics.prometheus_text())
+    return rc
+
+if __name__ == "__main__":
+    sys.exit(main())
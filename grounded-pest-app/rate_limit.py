@@ -0,0 +1,253 @@
+# rate_limit.py
+"""
+Azure OpenAI 프로세스 공용 속도 제한 + 적응형 동시성.
+- RPM/TPM 토큰 버킷: 요청 전에 예상 토큰만큼 예약, 응답 후 실제 사용량으로 정산
+- 동시 실행 한도는 AIMD: 429면 절반으로, 지연이 목표 이내인 성공이 한도만큼 쌓이면 +1
+- 429/503의 retry-after(-ms) 헤더만큼 전체 호출을 잠시 멈춤
+- 한도를 넘는 호출은 실패시키지 않고 FIFO 대기열에서 기다림 (AOAI_QUEUE_TIMEOUT_SEC 초과 시에만 오류)
+레플리카 간 공유는 하지 않으므로 RPM/TPM은 레플리카 수로 나눈 값으로 설정하세요.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import config
+import metrics
+
+log = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 503)
+
+
+class QueueTimeout(RuntimeError):
+    pass
+
+
+class _Bucket:
+    """분당 용량 버킷 (연속 충전). per_minute ≤ 0 이면 제한 없음."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute or 0)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._t = time.monotonic()
+
+    def _refill(self, now):
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + (now - self._t) * self.rate)
+        self._t = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        need = min(n, self.capacity)   # 용량보다 큰 요청도 가득 차면 통과 (빚으로 처리)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, n: float):
+        if self.capacity > 0:
+            self.level -= n
+
+    def give(self, n: float):
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + n)
+
+
+@dataclass
+class Ticket:
+    est_tokens: int
+    started: float
+    waited: float
+
+
+class AdaptiveLimiter:
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int, *, min_concurrency: int = 1,
+                 latency_target: float = 20.0, queue_timeout: float = 120.0):
+        self._cond = threading.Condition()
+        self._rpm = _Bucket(rpm)
+        self._tpm = _Bucket(tpm)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.latency_target = latency_target
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._next = 0              # 다음에 발급할 대기 번호
+        self._serving = 0           # 지금 입장 차례인 번호
+        self._abandoned = set()     # 대기 중 시간 초과로 빠진 번호
+        self._pause_until = 0.0
+        self._ok_streak = 0
+        self.counters = {"admitted": 0, "queued": 0, "throttled": 0, "timeouts": 0, "wait_sec": 0.0, "max_wait_sec": 0.0}
+
+    # ---- 입장 ----
+    def _advance_locked(self):
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+
+    def acquire(self, est_tokens: int = 0, timeout: float = None) -> Ticket:
+        """차례 + 동시 실행 슬롯 + RPM/TPM 예산을 얻을 때까지 대기"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        with self._cond:
+            me = self._next
+            self._next += 1
+            queued = False
+            while True:
+                now = time.monotonic()
+                wait = None
+                if me == self._serving and self.active < int(self.limit):
+                    wait = max(self._pause_until - now, self._rpm.wait_time(1, now),
+                               self._tpm.wait_time(est_tokens, now))
+                    if wait <= 0:
+                        break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    if me == self._serving:
+                        self._advance_locked()
+                    else:
+                        self._abandoned.add(me)
+                    self._cond.notify_all()
+                    raise QueueTimeout(f"Azure OpenAI 요청이 혼잡해 {timeout:.0f}초 안에 처리되지 못했습니다. 잠시 후 다시 시도하세요.")
+                if not queued:
+                    queued = True
+                    self.counters["queued"] += 1
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+
+            self._advance_locked()
+            self.active += 1
+            self._rpm.take(1)
+            self._tpm.take(est_tokens)
+            waited = time.monotonic() - t0
+            self.counters["admitted"] += 1
+            self.counters["wait_sec"] += waited
+            self.counters["max_wait_sec"] = max(self.counters["max_wait_sec"], waited)
+            self._cond.notify_all()
+        return Ticket(est_tokens, time.monotonic(), waited)
+
+    # ---- 퇴장/조정 ----
+    def release(self, ticket: Ticket, *, used_tokens: int = None, retry_after: float = None, failed: bool = False):
+        """
+        슬롯 반환. retry_after가 있으면(429/503) 한도 절반 + 전체 일시정지,
+        failed면(그 외 오류) 한도는 그대로, 나머지는 성공으로 보고 지연 기준으로 한도 조정.
+        TPM은 실제 사용량(없으면 예상치)으로 정산.
+        """
+        latency = time.monotonic() - ticket.started
+        with self._cond:
+            self.active -= 1
+            if failed:
+                pass
+            elif retry_after is not None:
+                self.counters["throttled"] += 1
+                self._ok_streak = 0
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._pause_until = max(self._pause_until, time.monotonic() + retry_after)
+                self._tpm.give(ticket.est_tokens)       # 처리되지 않은 요청의 예약분 환불
+            else:
+                if used_tokens is not None:
+                    diff = ticket.est_tokens - used_tokens
+                    if diff > 0:
+                        self._tpm.give(diff)
+                    else:
+                        self._tpm.take(-diff)
+                if self.latency_target and latency > self.latency_target:
+                    self._ok_streak = 0
+                    self.limit = max(self.min_concurrency, self.limit - 1)
+                else:
+                    self._ok_streak += 1
+                    if self._ok_streak >= int(self.limit):
+                        self._ok_streak = 0
+                        self.limit = min(self.max_concurrency, self.limit + 1)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self.counters)
+            out.update({
+                "limit": int(self.limit),
+                "active": self.active,
+                "waiting": self._next - self._serving - len(self._abandoned),
+                "paused_sec": round(max(0.0, self._pause_until - time.monotonic()), 1),
+                "rpm_available": round(self._rpm.level, 1) if self._rpm.capacity else None,
+                "tpm_available": round(self._tpm.level) if self._tpm.capacity else None,
+            })
+        out["wait_sec"] = round(out["wait_sec"], 2)
+        out["max_wait_sec"] = round(out["max_wait_sec"], 2)
+        return out
+
+
+def retryable(exc) -> bool:
+    """429/503 예외인지"""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status in RETRY_STATUSES
+
+
+def retry_after(exc) -> float:
+    """retry-after(-ms) 헤더 초. 헤더가 없거나 깨졌으면 None (0은 '바로 재시도'라는 유효한 값)"""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> AdaptiveLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveLimiter(
+                    config.AOAI_RPM, config.AOAI_TPM, config.AOAI_MAX_CONCURRENCY,
+                    latency_target=config.AOAI_LATENCY_TARGET_SEC,
+                    queue_timeout=config.AOAI_QUEUE_TIMEOUT_SEC,
+                )
+    return _limiter
+
+
+def admit(create_fn, *, est_tokens: int = 0):
+    """
+    create_fn()을 제한기 아래에서 실행하고 (결과, ticket)을 반환 — 슬롯은 쥔 채로.
+    스트리밍처럼 응답을 다 읽은 뒤 get_limiter().release(ticket, ...)를 직접 호출하는 용도.
+    429/503이면 retry-after(헤더가 없으면 지수 백오프)만큼 전체를 멈췄다가 AOAI_MAX_RETRIES회까지 재시도.
+    """
+    lim = get_limiter()
+    for attempt in range(config.AOAI_MAX_RETRIES + 1):
+        ticket = lim.acquire(est_tokens)
+        try:
+            return create_fn(), ticket
+        except Exception as e:
+            if not retryable(e):
+                lim.release(ticket, failed=True)
+                raise
+            wait = retry_after(e)
+            if wait is None:
+                wait = min(2 ** attempt, 30)
+            lim.release(ticket, retry_after=wait)
+            metrics.add(retries=1)
+            if attempt >= config.AOAI_MAX_RETRIES:
+                raise
+            log.info("AOAI %s — %.1fs 후 재시도 (%d/%d)", getattr(e, "status_code", "throttled"),
+                     wait, attempt + 1, config.AOAI_MAX_RETRIES)
+
+
+def call(fn, *, est_tokens: int = 0, usage=None):
+    """admit + 즉시 release. usage(result) → 실제 사용 토큰 (없으면 예상치로 정산)."""
+    result, ticket = admit(fn, est_tokens=est_tokens)
+    get_limiter().release(ticket, used_tokens=usage(result) if usage else None)
+    return result
+
+
+def stats() -> dict:
+    return get_limiter().stats() if _limiter is not None else {}
@@ -0,0 +1,124 @@
+# result_store.py
+"""
+사전 계산 결과 저장소 (SQLite).
+야간 배치(pipeline.py precompute)가 프리셋 회사/기술/도메인 조합의 뉴스 + PEST·SWOT 결과를 써 두면
+UI는 같은 조합을 조회할 때 LLM/뉴스 호출 없이 바로 읽어 갑니다.
+- 키: 회사 + 정렬된 기술/도메인 + 신선도 + 뉴스 개수
+- 만료: RESULT_STORE_MAX_AGE_SEC 보다 오래된 결과는 조회되지 않음 (다음 배치가 덮어씀)
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+log = logging.getLogger(__name__)
+
+
+def make_key(company, techs, domains, freshness: str = "Week", cnt: int = 2) -> str:
+    parts = [
+        (company or "").strip(),
+        ",".join(sorted(t.strip() for t in techs or [] if t)),
+        ",".join(sorted(d.strip() for d in domains or [] if d)),
+        freshness or "",
+        str(int(cnt)),
+    ]
+    return "|".join(parts)
+
+
+class ResultStore:
+    """스레드 안전 SQLite 결과 저장소 (WAL 모드, 배치 프로세스와 앱 프로세스가 공유)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " company TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+
+    def put(self, key: str, company: str, payload: dict):
+        raw = json.dumps(payload, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results(key, company, payload, created) VALUES (?,?,?,?)",
+                (key, company or "", raw, time.time()),
+            )
+            self.writes += 1
+
+    def get(self, key: str, max_age: float = None):
+        """(payload dict, created) 또는 None"""
+        max_age = config.RESULT_STORE_MAX_AGE_SEC if max_age is None else max_age
+        with self._lock:
+            row = self._conn.execute("SELECT payload, created FROM results WHERE key=?", (key,)).fetchone()
+            if row is None or (max_age and time.time() - row[1] > max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            return json.loads(row[0]), row[1]
+        except ValueError:
+            return None
+
+    def prune(self, max_age: float = None) -> int:
+        max_age = config.RESULT_STORE_MAX_AGE_SEC if max_age is None else max_age
+        with self._lock:
+            return self._conn.execute("DELETE FROM results WHERE created < ?", (time.time() - max_age,)).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, newest = self._conn.execute("SELECT COUNT(*), MAX(created) FROM results").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "entries": count, "newest": newest}
+
+
+_store = None
+_store_lock = threading.Lock()
+_store_failed = False
+
+
+def get_store():
+    """프로세스 공용 저장소. 비활성화/열기 실패 시 None (저장소 없이 동작)."""
+    global _store, _store_failed
+    if not config.RESULT_STORE_ENABLED or _store_failed:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                try:
+                    _store = ResultStore(config.RESULT_STORE_PATH)
+                except Exception as e:
+                    log.warning("결과 저장소 열기 실패(저장소 없이 진행): %s", e)
+                    _store_failed = True
+    return _store
+
+
+def lookup(company, techs, domains, freshness: str = "Week", cnt: int = 2):
+    """사전 계산 결과 조회 → (payload, created) 또는 None"""
+    s = get_store()
+    return s.get(make_key(company, techs, domains, freshness, cnt)) if s else None
+
+
+def save(company, techs, domains, freshness: str, cnt: int, payload: dict):
+    s = get_store()
+    if s:
+        s.put(make_key(company, techs, domains, freshness, cnt), company, payload)
+
+
+def stats() -> dict:
+    s = get_store()
+    return s.stats() if s else {}
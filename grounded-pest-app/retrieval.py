@@ -0,0 +1,488 @@
+# retrieval.py
+"""
+검색 백엔드 인터페이스.
+- AzureSearchBackend: 기존 Azure AI Search REST (utils.search_docs_by_keyword)
+- BM25Index: 로컬 역색인(BM25). 증분 추가/삭제, 메모리맵 파일로 영속화, 서비스 없이 동작
+  업로드마다는 증분 로그(<path>.delta)에 한 줄만 추가하고, 증분이 BM25_COMPACT_CHUNKS를 넘으면
+  백그라운드에서 기본 파일로 압축(save) — 새 파일은 잠금 밖에서 만들고 교체만 잠금 안에서
+모든 백엔드는 기존과 같은 hit dict({title, content, source}) 리스트를 반환합니다.
+"""
+import abc
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import Counter, defaultdict
+
+import config
+from textproc import tokenize
+
+log = logging.getLogger(__name__)
+
+
+class RetrievalBackend(abc.ABC):
+    """검색 백엔드 공통 인터페이스"""
+    name = "base"
+
+    @abc.abstractmethod
+    def search(self, query: str, top: int = 8) -> list:
+        """hit dict({title, content, source}) 리스트"""
+
+    def add_documents(self, doc_id: str, hits: list):
+        """doc_id(예: blob 이름) 단위로 청크 추가. 같은 doc_id가 있으면 교체."""
+
+    def delete_document(self, doc_id: str):
+        """doc_id의 모든 청크 제거"""
+
+    def available(self) -> bool:
+        return True
+
+
+class AzureSearchBackend(RetrievalBackend):
+    name = "azure"
+
+    def search(self, query, top=8):
+        import utils  # utils ↔ retrieval 순환 import 방지
+        return utils.search_docs_by_keyword(query, top=top)
+
+    def available(self):
+        return bool(config.SEARCH_ENDPOINT and config.SEARCH_KEY and config.SEARCH_INDEX)
+
+
+# ===================== 로컬 BM25 =====================
+# 파일 형식 (리틀엔디언)
+#   header   : magic(8) + <IIQQQQQQ> n_chunks, n_terms, docs_off, texts_off, texts_len, vocab_off, vocab_len, post_off
+#   docs     : 청크당 <IQI> doc_len, text_off(texts 기준), text_len
+#   texts    : 청크당 JSON {doc_id, title, content, source}
+#   vocab    : JSON {"terms": {term: [posting_start(쌍 단위), count]}, "doc_ids": [...],
+#                    "delta_gen": 로그 세대, "delta_off": 이 파일에 이미 반영된 로그 바이트 위치}
+#   postings : <II> (chunk_idx, tf) 쌍 배열 — mmap 에서 필요한 term 구간만 읽음
+# 증분 로그 <path>.delta : 첫 줄 {"gen": N}, 이후 줄마다 JSON {doc_id, hits} (hits가 null이면 삭제)
+#   여러 레플리카가 같은 로그에 추가할 수 있으므로 압축해도 로그를 지우지 않음.
+#   기본 파일에 (세대, 위치)를 기록해 그 뒤부터 재생하고, 압축 이후 추가가 없을 때만 새 세대(빈 로그)로 교체.
+_MAGIC = b"BM25IDX1"
+_HEADER = struct.Struct("<IIQQQQQQ")
+_DOC = struct.Struct("<IQI")
+
+
+class BM25Index(RetrievalBackend):
+    name = "bm25"
+
+    def __init__(self, path: str = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1, self.b = k1, b
+        self._lock = threading.RLock()
+        self._mm = None
+        self._fh = None
+        self._base_n = 0
+        self._base_vocab = {}
+        self._base_doc_ids = []
+        self._base_lens = []
+        # 증분(메모리) 세그먼트
+        self._delta_docs = []                     # [{doc_id,title,content,source}]
+        self._delta_lens = []
+        self._delta_post = defaultdict(dict)      # term -> {delta_idx: tf}
+        self._dead = set()                        # 전역 청크 번호(base: 0..n-1, delta: n..)
+        self._base_delta = (0, 0)                 # 기본 파일에 반영된 로그 (세대, 바이트 위치)
+        self._log_gen, self._log_off = 0, 0       # 이 인스턴스가 재생한 로그 (세대, 바이트 위치)
+        self._save_lock = threading.Lock()        # 압축은 인스턴스당 1개 (기존 mmap을 잠금 밖에서 읽는 동안 유지)
+        if path and os.path.exists(path):
+            self._open(path)
+        if path:
+            self._catch_up()
+
+    # ---------- 파일 ----------
+    def _open(self, path):
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != _MAGIC:
+            raise ValueError(f"BM25 색인 형식이 아닙니다: {path}")
+        n, _, docs_off, texts_off, _, vocab_off, vocab_len, post_off = _HEADER.unpack_from(self._mm, 8)
+        self._base_n = n
+        self._docs_off, self._texts_off, self._post_off = docs_off, texts_off, post_off
+        meta = json.loads(self._mm[vocab_off:vocab_off + vocab_len].decode("utf-8"))
+        self._base_vocab = meta["terms"]
+        self._base_doc_ids = meta["doc_ids"]
+        self._base_lens = [_DOC.unpack_from(self._mm, docs_off + i * _DOC.size)[0] for i in range(n)]
+        self._base_delta = (meta.get("delta_gen", 0), meta.get("delta_off", 0))
+        self._log_gen, self._log_off = self._base_delta
+
+    def _reset_delta(self):
+        self._delta_docs, self._delta_lens = [], []
+        self._delta_post = defaultdict(dict)
+        self._dead = set()
+
+    def _catch_up(self):
+        """
+        증분 로그에서 아직 재생하지 않은 줄을 메모리 세그먼트로 재생.
+        다른 인스턴스가 압축 후 로그 세대를 바꿨으면 기본 파일부터 다시 열고 그 파일이 반영한 위치 뒤부터.
+        끝에 쓰다 만 줄(줄바꿈 없음)은 다음에 다시 읽고, 깨진 줄은 건너뜀.
+        """
+        delta = f"{self.path}.delta"
+        if not os.path.exists(delta):
+            return
+        with self._lock, open(delta, "rb") as f:
+            first = f.readline()
+            gen, body = _log_header(first)
+            if gen != self._log_gen:
+                self._close()
+                self._reset_delta()
+                self._base_n, self._base_vocab, self._base_doc_ids, self._base_lens = 0, {}, [], []
+                self._base_delta = (0, 0)
+                if os.path.exists(self.path):
+                    self._open(self.path)
+                start = self._base_delta[1] if gen == self._base_delta[0] else body
+            else:
+                start = self._log_off
+            f.seek(max(start, body))
+            pos = f.tell()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                pos += len(line)
+                try:
+                    ent = json.loads(line)
+                except ValueError:
+                    log.warning("BM25 증분 로그의 깨진 줄을 건너뜀: %s", delta)
+                    continue
+                if not isinstance(ent, dict) or "doc_id" not in ent:
+                    continue
+                if ent.get("hits") is None:
+                    self.delete_document(ent["doc_id"])
+                else:
+                    self.add_documents(ent["doc_id"], ent["hits"])
+            self._log_gen, self._log_off = gen, pos
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._fh.close()
+        self._mm = self._fh = None
+
+    def _base_record(self, i):
+        _, off, ln = _DOC.unpack_from(self._mm, self._docs_off + i * _DOC.size)
+        start = self._texts_off + off
+        return json.loads(self._mm[start:start + ln].decode("utf-8"))
+
+    def _base_postings(self, term):
+        ent = self._base_vocab.get(term)
+        if not ent or self._mm is None:
+            return ()
+        start, count = ent
+        off = self._post_off + start * 8
+        return struct.iter_unpack("<II", self._mm[off:off + count * 8])
+
+    # ---------- 조회 헬퍼 ----------
+    def _record(self, gid):
+        if gid < self._base_n:
+            return self._base_record(gid)
+        return self._delta_docs[gid - self._base_n]
+
+    def _doc_id(self, gid):
+        if gid < self._base_n:
+            return self._base_doc_ids[gid]
+        return self._delta_docs[gid - self._base_n]["doc_id"]
+
+    def _live_ids(self):
+        total = self._base_n + len(self._delta_docs)
+        return [g for g in range(total) if g not in self._dead]
+
+    def __len__(self):
+        with self._lock:
+            return self._base_n + len(self._delta_docs) - len(self._dead)
+
+    # ---------- 변경 ----------
+    def add_documents(self, doc_id, hits):
+        with self._lock:
+            self.delete_document(doc_id)
+            for h in hits or []:
+                if not isinstance(h, dict):
+                    continue
+                content = str(h.get("content") or "")
+                title = str(h.get("title") or "")
+                toks = tokenize(f"{title}\n{content}")
+                idx = len(self._delta_docs)
+                self._delta_docs.append({
+                    "doc_id": doc_id, "title": title, "content": content, "source": str(h.get("source") or ""),
+                })
+                self._delta_lens.append(len(toks))
+                for term, tf in Counter(toks).items():
+                    self._delta_post[term][idx] = tf
+
+    def delete_document(self, doc_id):
+        with self._lock:
+            total = self._base_n + len(self._delta_docs)
+            for g in range(total):
+                if g not in self._dead and self._doc_id(g) == doc_id:
+                    self._dead.add(g)
+
+    def append_delta(self, doc_id, hits=None):
+        """doc_id 변경(hits=None이면 삭제)을 증분 로그에 한 줄 추가 — 기본 파일은 다시 쓰지 않음"""
+        if not self.path:
+            raise ValueError("저장 경로가 없습니다.")
+        if hits is not None:
+            hits = [{k: str(h.get(k) or "") for k in ("title", "content", "source")}
+                    for h in hits if isinstance(h, dict)]
+        line = (json.dumps({"doc_id": doc_id, "hits": hits}, ensure_ascii=False) + "\n").encode("utf-8")
+        delta = f"{self.path}.delta"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(delta, "ab") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size == 0:
+                    line = _log_header_line(self._log_gen) + line
+                elif _last_byte(delta) != b"\n":
+                    line = b"\n" + line        # 앞서 쓰다 끊긴 줄과 붙지 않게
+                f.write(line)               # 한 번에 기록 (다른 레플리카의 추가와 섞이지 않게)
+
+    def needs_compaction(self) -> bool:
+        """증분 청크 + 삭제 표시가 BM25_COMPACT_CHUNKS 이상이면 압축(save) 시점"""
+        with self._lock:
+            return len(self._delta_docs) + len(self._dead) >= config.BM25_COMPACT_CHUNKS
+
+    # ---------- 검색 ----------
+    def search(self, query, top=8):
+        q_terms = list(dict.fromkeys(tokenize(query)))
+        if not q_terms:
+            return []
+        with self._lock:
+            n_live = len(self)
+            if n_live == 0:
+                return []
+            lens = self._base_lens + self._delta_lens
+            live_lens = [lens[g] for g in self._live_ids()]
+            avgdl = (sum(live_lens) / len(live_lens)) or 1.0
+            scores = defaultdict(float)
+            for term in q_terms:
+                plist = [(g, tf) for g, tf in self._base_postings(term) if g not in self._dead]
+                plist += [(self._base_n + i, tf) for i, tf in self._delta_post.get(term, {}).items()
+                          if self._base_n + i not in self._dead]
+                if not plist:
+                    continue
+                df = len(plist)
+                idf = math.log(1 + (n_live - df + 0.5) / (df + 0.5))
+                for g, tf in plist:
+                    dl = lens[g]
+                    scores[g] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl))
+            best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[: int(top)]
+            out = []
+            for g, _ in best:
+                r = self._record(g)
+                out.append({"title": r["title"] or "(제목 없음)", "content": r["content"], "source": r["source"]})
+            return out
+
+    # ---------- 영속화 ----------
+    def save(self, path: str = None):
+        """
+        살아있는 청크만 모아 새 파일로 압축 저장(원자적 교체) 후 mmap으로 다시 연다.
+        스냅샷·교체만 잠금 안에서 하고 토큰화·파일 쓰기는 잠금 밖에서 — 그동안 검색/추가는 막히지 않음.
+        스냅샷 뒤 추가/삭제된 청크는 새 파일 위의 증분 세그먼트로 옮겨 둠.
+        증분 로그는 이 파일에 반영된 위치까지만 버림 (그 뒤에 다른 레플리카가 추가한 줄은 유지).
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("저장 경로가 없습니다.")
+        same = self.path is not None and os.path.abspath(path) == os.path.abspath(self.path)
+        with self._save_lock:
+            if same:
+                self._catch_up()
+            with self._lock:
+                live = self._live_ids()
+                n_base, n_delta = self._base_n, len(self._delta_docs)
+                delta_docs = list(self._delta_docs)
+                lens_all = self._base_lens + self._delta_lens
+                dead_before = set(self._dead)
+                log_gen, log_off = (self._log_gen, self._log_off) if same else (0, 0)
+
+            # 기존 mmap은 _save_lock을 쥔 동안 닫히지 않으므로 잠금 밖에서 읽어도 안전
+            records = [self._base_record(g) if g < n_base else delta_docs[g - n_base] for g in live]
+            tmp = self._write(path, records, [lens_all[g] for g in live], log_gen, log_off)
+
+            with self._lock:
+                new_pos = {g: i for i, g in enumerate(live)}
+                later_dead = self._dead - dead_before
+                later = self._delta_docs[n_delta:]
+                later_lens = self._delta_lens[n_delta:]
+                later_post = {t: {i - n_delta: tf for i, tf in d.items() if i >= n_delta}
+                              for t, d in self._delta_post.items()}
+                self._close()
+                os.replace(tmp, path)
+                self.path = path
+                self._open(path)
+                self._delta_docs, self._delta_lens = later, later_lens
+                self._delta_post = defaultdict(dict, {t: d for t, d in later_post.items() if d})
+                self._dead = {new_pos[g] for g in later_dead if g in new_pos}
+                self._dead |= {self._base_n + g - n_base - n_delta for g in later_dead if g >= n_base + n_delta}
+                if same:                    # _open이 (log_gen, log_off)부터 이어 읽도록 맞춰 둠
+                    self._trim_log(log_gen, log_off)
+
+    def _write(self, path, records, lens, log_gen, log_off) -> str:
+        """records로 새 색인 파일을 <path>.tmp에 쓰고 그 경로를 반환 (잠금 없이 호출)"""
+        post = defaultdict(list)
+        for i, r in enumerate(records):
+            for term, tf in Counter(tokenize(f"{r['title']}\n{r['content']}")).items():
+                post[term].append((i, tf))
+
+        texts, docs, off = [], [], 0
+        for ln, r in zip(lens, records):
+            raw = json.dumps(r, ensure_ascii=False).encode("utf-8")
+            docs.append(_DOC.pack(ln, off, len(raw)))
+            texts.append(raw)
+            off += len(raw)
+        vocab, post_bytes, start = {}, [], 0
+        for term in sorted(post):
+            pl = post[term]
+            vocab[term] = [start, len(pl)]
+            post_bytes.append(b"".join(struct.pack("<II", i, tf) for i, tf in pl))
+            start += len(pl)
+        texts_b = b"".join(texts)
+        vocab_b = json.dumps({"terms": vocab, "doc_ids": [r["doc_id"] for r in records],
+                              "delta_gen": log_gen, "delta_off": log_off}, ensure_ascii=False).encode("utf-8")
+
+        docs_off = 8 + _HEADER.size
+        texts_off = docs_off + len(docs) * _DOC.size
+        vocab_off = texts_off + len(texts_b)
+        post_off = vocab_off + len(vocab_b)
+        header = _MAGIC + _HEADER.pack(len(records), len(vocab), docs_off, texts_off, len(texts_b),
+                                       vocab_off, len(vocab_b), post_off)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(b"".join(docs))
+            f.write(texts_b)
+            f.write(vocab_b)
+            f.write(b"".join(post_bytes))
+        return tmp
+
+    def _trim_log(self, log_gen, log_off):
+        """
+        압축에 반영된 위치 이후로 추가된 줄이 없으면 로그를 다음 세대의 빈 로그로 교체.
+        추가된 줄이 있으면(이 인스턴스나 다른 레플리카) 그대로 둠 — 기본 파일의 delta_off 뒤부터 재생되므로
+        중복 없이 이어지고, 다음 압축 때 다시 시도. (호출부에서 _lock 보유)
+        """
+        delta = f"{self.path}.delta"
+        try:
+            if not os.path.exists(delta) or os.path.getsize(delta) != log_off:
+                return
+            tmp = f"{delta}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_log_header_line(log_gen + 1))
+            if os.path.getsize(delta) != log_off:      # 그 사이 다른 레플리카가 추가
+                os.remove(tmp)
+                return
+            os.replace(tmp, delta)
+            self._log_gen, self._log_off = log_gen + 1, os.path.getsize(delta)
+        except OSError as e:
+            log.warning("BM25 증분 로그 정리 실패(다음 압축 때 재시도): %s", e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "chunks": len(self),
+                "base_chunks": self._base_n,
+                "delta_chunks": len(self._delta_docs),
+                "deleted": len(self._dead),
+                "compact_at": config.BM25_COMPACT_CHUNKS,
+                "base_terms": len(self._base_vocab),
+                "path": self.path,
+            }
+
+
+def _log_header_line(gen: int) -> bytes:
+    return (json.dumps({"gen": gen}) + "\n").encode("utf-8")
+
+
+def _log_header(first: bytes):
+    """로그 첫 줄 → (세대, 본문 시작 바이트). 헤더가 없는 예전 로그는 (0, 0)."""
+    try:
+        ent = json.loads(first) if first.endswith(b"\n") else None
+    except ValueError:
+        ent = None
+    if isinstance(ent, dict) and "gen" in ent and "doc_id" not in ent:
+        return int(ent["gen"]), len(first)
+    return 0, 0
+
+
+def _last_byte(path: str) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1)
+
+
+# ===================== 백엔드 선택 =====================
+_local = None
+_local_lock = threading.Lock()
+_compact_lock = threading.Lock()     # 백그라운드 압축은 동시에 1개만
+
+
+def get_local_index() -> BM25Index:
+    """프로세스 공용 로컬 BM25 색인 (BM25_INDEX_PATH에서 로드)"""
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                try:
+                    _local = BM25Index(config.BM25_INDEX_PATH)
+                except Exception as e:
+                    log.warning("BM25 색인 로드 실패(빈 색인으로 시작): %s", e)
+                    _local = BM25Index()
+                    _local.path = config.BM25_INDEX_PATH
+    return _local
+
+
+def get_backend(name: str = None) -> RetrievalBackend:
+    name = (name or config.RETRIEVAL_BACKEND or "auto").lower()
+    if name == "bm25":
+        return get_local_index()
+    if name == "azure":
+        return AzureSearchBackend()
+    azure = AzureSearchBackend()
+    return azure if azure.available() else get_local_index()
+
+
+def search(query: str, top: int = 8) -> list:
+    """
+    설정된 백엔드로 검색. auto 모드에서 Azure 결과가 비면(장애/미반영 포함) 로컬 BM25로 보완.
+    """
+    backend = get_backend()
+    hits = backend.search(query, top=top)
+    if not hits and backend.name != "bm25" and (config.RETRIEVAL_BACKEND or "auto").lower() == "auto":
+        hits = get_local_index().search(query, top=top)
+    return hits
+
+
+def _compact_async(idx: BM25Index):
+    if not _compact_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            idx.save()
+        except Exception as e:
+            log.warning("BM25 색인 압축 실패: %s", e)
+        finally:
+            _compact_lock.release()
+
+    threading.Thread(target=run, name="bm25-compact", daemon=True).start()
+
+
+def index_documents(doc_id: str, hits: list, persist: bool = True):
+    """
+    로컬 색인에 문서 청크 추가/교체 (업로드 직후 로컬 추출본, 인덱싱 결과 등).
+    persist=True면 증분 로그에만 추가 — 전체 재작성(save)은 임계치를 넘을 때 백그라운드에서.
+    """
+    if not hits:
+        return
+    idx = get_local_index()
+    idx.add_documents(doc_id, hits)
+    if persist:
+        try:
+            idx.append_delta(doc_id, hits)
+        except Exception as e:
+            log.warning("BM25 증분 로그 기록 실패: %s", e)
+        if idx.needs_compaction():
+            _compact_async(idx)
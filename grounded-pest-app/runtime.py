@@ -0,0 +1,68 @@
+# runtime.py
+"""
+Streamlit 실행 컨텍스트 헬퍼.
+워커 스레드처럼 ScriptRunContext가 없는 곳에서 st.* 를 부르면 경고/오류가 나므로
+세션 ID 조회, 스피너, 오류 표시를 여기서 안전하게 감쌉니다.
+streamlit이 없는 환경(cron/CLI, pipeline.py)에서도 import 가능 — 이때는 전부 no-op/로그.
+"""
+import contextlib
+import logging
+
+try:
+    import streamlit as st
+except ImportError:     # 헤드리스 실행
+    st = None
+
+log = logging.getLogger(__name__)
+
+
+def get_ctx():
+    """현재 스레드의 ScriptRunContext (없으면 None)"""
+    if st is None:
+        return None
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except Exception:
+        return None
+    try:
+        return get_script_run_ctx(suppress_warning=True)
+    except TypeError:
+        return get_script_run_ctx()
+    except Exception:
+        return None
+
+
+def in_script_thread() -> bool:
+    return get_ctx() is not None
+
+
+def session_id():
+    """현재 브라우저 세션 ID (스크립트 스레드가 아니면 None)"""
+    ctx = get_ctx()
+    return getattr(ctx, "session_id", None) if ctx else None
+
+
+def spinner(text):
+    """스크립트 스레드에서만 st.spinner, 그 외에는 no-op"""
+    if text and in_script_thread():
+        return st.spinner(text)
+    return contextlib.nullcontext()
+
+
+def notify_error(msg: str):
+    """스크립트 스레드면 st.error, 아니면 로그로만 남김"""
+    if in_script_thread():
+        st.error(msg)
+    else:
+        log.warning(msg)
+
+
+def save_metrics(collector):
+    """metrics.collect() 결과를 세션 last_metrics[동작명]에 저장 (스크립트 스레드에서만)"""
+    if in_script_thread():
+        st.session_state.setdefault("last_metrics", {})[collector.action] = collector.summary()
+
+
+def session_state():
+    """스크립트 스레드면 st.session_state, 아니면 빈 dict (읽기 전용 용도)"""
+    return st.session_state if in_script_thread() else {}
@@ -0,0 +1,96 @@
+# singleflight.py
+"""
+같은 키의 동시 호출 합치기 (single-flight).
+캐시는 호출이 끝난 뒤에만 도움이 되므로, 진행 중인 호출이 있으면 새로 보내지 않고
+그 결과(또는 예외)를 함께 받습니다. cache.cached의 miss 경로와 run_aoai_stream에서 사용.
+대기자에게는 Exception만 그대로 전달 — 리더 세션의 중단 신호(Streamlit 재실행 등 BaseException)는
+RuntimeError로 바꿔 다른 세션으로 번지지 않게 하고, 대기는 SINGLEFLIGHT_WAIT_SEC로 제한합니다.
+"""
+import threading
+from collections import defaultdict
+
+import config
+
+
+class _Call:
+    __slots__ = ("event", "value", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key):
+        """(call, leader) — leader면 직접 실행 후 finish(), 아니면 wait(call)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def finish(self, key, call, value=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        if error is not None and not isinstance(error, Exception):
+            error = RuntimeError("동일 요청이 중단되었습니다. 다시 시도하세요.")
+        call.value, call.error = value, error
+        call.event.set()
+
+    @staticmethod
+    def wait(call, timeout: float = None):
+        if not call.event.wait(config.SINGLEFLIGHT_WAIT_SEC if timeout is None else timeout):
+            raise TimeoutError("동일 요청 대기 시간 초과")
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def do(self, key, fn):
+        """진행 중인 같은 키 호출이 있으면 그 결과를, 없으면 fn()을 실행 → (value, shared)"""
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call), True
+        try:
+            value = fn()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, value=value)
+        return value, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            inflight = len(self._calls)
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "inflight": inflight}
+
+
+_groups = defaultdict(Group)
+_groups_lock = threading.Lock()
+
+
+def get_group(name: str) -> Group:
+    with _groups_lock:
+        g = _groups[name]
+        g.name = name
+        return g
+
+
+def stats() -> dict:
+    """그룹(=캐시 네임스페이스)별 리더/합쳐진 호출/진행 중 건수"""
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: g.stats() for name, g in groups.items() if g.leaders}
@@ -0,0 +1,120 @@
+# startup.py
+"""
+콜드 스타트 측정.
+- install(): 이후 처음 로드되는 최상위 모듈의 import 시간을 기록 (누적 = 하위 import 포함, self = 제외)
+- record()/timed(): 클라이언트 생성처럼 지연 초기화 비용 기록
+- report(budget): 페이지/CLI에서 보여줄 요약 (예산 초과 여부 포함)
+다른 앱 모듈을 import하지 않으므로 가장 먼저 import해도 안전합니다.
+"""
+import contextlib
+import importlib.abc
+import sys
+import threading
+import time
+
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_imports = {}       # name -> {"cumulative": s, "self": s}
+_clients = {}       # name -> s (첫 생성)
+_local = threading.local()
+_installed = False
+
+
+class _TimedLoader:
+    """원래 로더에 위임하면서 exec_module 시간만 잰다 (실행 전에 모듈의 로더는 원래 것으로 되돌림)"""
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        spec = getattr(module, "__spec__", None)
+        if spec is not None:
+            spec.loader = self._loader
+        module.__loader__ = self._loader
+        stack = _local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - t0
+            child = stack.pop()
+            if stack:
+                stack[-1] += total
+            with _lock:
+                _imports[self._name] = {"cumulative": total, "self": total - child}
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path=None, target=None):
+        if "." in name or getattr(_local, "finding", False):
+            return None
+        _local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            _local.finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, name)
+        return spec
+
+
+def install():
+    """import 시간 측정 시작 (프로세스당 1회, 이미 로드된 모듈은 대상 아님)"""
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        sys.meta_path.insert(0, _TimingFinder())
+        _installed = True
+
+
+def record(name: str, seconds: float):
+    with _lock:
+        _clients.setdefault(name, seconds)
+
+
+@contextlib.contextmanager
+def timed(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+
+
+def report(budget_sec: float = None, top: int = 10) -> dict:
+    """{"imports": [...상위 top], "clients": {...}, "import_total_sec", "uptime_sec", "over_budget"}"""
+    with _lock:
+        imports = dict(_imports)
+        clients = dict(_clients)
+    # 최상위(다른 측정 대상 안에서 로드되지 않은) 모듈의 self 합 = 전체 import 시간
+    total = sum(v["self"] for v in imports.values())
+    rows = sorted(imports.items(), key=lambda kv: kv[1]["cumulative"], reverse=True)[:top]
+    out = {
+        "imports": [
+            {"module": k, "cumulative_ms": round(v["cumulative"] * 1000, 1), "self_ms": round(v["self"] * 1000, 1)}
+            for k, v in rows
+        ],
+        "clients": {k: round(v * 1000, 1) for k, v in clients.items()},
+        "import_total_sec": round(total, 3),
+        "uptime_sec": round(time.perf_counter() - _T0, 1),
+    }
+    if budget_sec:
+        out["budget_sec"] = budget_sec
+        out["over_budget"] = total > budget_sec
+    return out
@@ -0,0 +1,224 @@
+# structured.py
+"""
+스키마 기반 JSON 생성 (PEST·SWOT / 통합 인사이트).
+- JSON 스키마를 response_format(json_schema, strict)로 배포에 전달 → 형식이 깨진 응답 자체를 줄임
+- validate(): 스키마 부분집합(object/array/string, 필수 키, 빈 값)만 보는 빠른 검증 → 문제 필드 경로 목록
+- 일부 필드만 문제면 그 필드만 요청하는 짧은 후속 프롬프트(repair_messages)를 만들고 merge()로 병합
+- 결과(ok/partial/regenerated/failed)별 횟수와 추가 토큰을 집계 → 전체 재생성 비율 확인
+호출 흐름(검증 → 부분 재요청 → 전체 재생성)은 utils.complete_json이 담당합니다.
+"""
+import copy
+import json
+import logging
+import threading
+from collections import defaultdict
+
+import config
+import metrics
+
+log = logging.getLogger(__name__)
+
+
+def _sentences():
+    # strict 모드는 minItems/maxItems를 지원하지 않으므로 개수 제약은 프롬프트와 validate()가 담당
+    return {"type": "array", "items": {"type": "string"}}
+
+
+def _obj(props: dict) -> dict:
+    return {"type": "object", "properties": props, "required": list(props), "additionalProperties": False}
+
+
+# ===================== 스키마 =====================
+PEST_SWOT_SCHEMA = _obj({
+    "PEST": _obj({k: _sentences() for k in ("P", "E", "S", "T")}),
+    "SWOT": _obj({k: _sentences() for k in ("S", "W", "O", "T")}),
+    "one_liner": {"type": "string"},
+})
+
+COMBINED_SCHEMA = _obj({
+    "internal_summary": _sentences(),
+    "strengths": _sentences(),
+    "weaknesses": _sentences(),
+    "external_insights": _sentences(),
+    "proposals": _obj({k: _sentences() for k in ("benchmarking", "cooperation", "differentiation", "execution_kpis")}),
+})
+
+SCHEMAS = {"pest_swot": PEST_SWOT_SCHEMA, "combined": COMBINED_SCHEMA}
+
+_unsupported = threading.Event()    # 배포/API 버전이 json_schema를 거부하면 프로세스 전체에서 끔
+
+
+def response_format(kind: str, schema: dict = None):
+    """Chat Completions response_format 값 (모드가 꺼져 있으면 None → 파라미터 생략)"""
+    if not config.AOAI_STRUCTURED_OUTPUT or _unsupported.is_set():
+        return None
+    return {"type": "json_schema",
+            "json_schema": {"name": kind, "strict": True, "schema": schema or SCHEMAS[kind]}}
+
+
+class SchemaUnsupported(RuntimeError):
+    """배포가 response_format=json_schema를 거부 — 호출부는 스키마 없이 새 요청으로 다시 보냄"""
+
+
+def is_unsupported_error(exc) -> bool:
+    """
+    400 중 response_format/json_schema 자체를 거부한 경우만 True.
+    콘텐츠 필터·컨텍스트 길이 초과 등 다른 400은 스키마와 무관하므로 False (그대로 오류 처리).
+    """
+    if getattr(exc, "status_code", None) != 400:
+        return False
+    body = getattr(exc, "body", None)
+    err = body.get("error", body) if isinstance(body, dict) else {}
+    param = str(getattr(exc, "param", None) or (err.get("param") if isinstance(err, dict) else "") or "")
+    code = str(getattr(exc, "code", None) or (err.get("code") if isinstance(err, dict) else "") or "")
+    if code == "content_filter" or "context_length" in code:
+        return False
+    if param.startswith("response_format"):
+        return True
+    msg = str(getattr(exc, "message", None) or exc).lower()
+    return ("response_format" in msg or "json_schema" in msg) and (
+        "not supported" in msg or "unsupported" in msg or "invalid" in msg or "unrecognized" in msg)
+
+
+def disable(reason: str):
+    if not _unsupported.is_set():
+        _unsupported.set()
+        log.warning("구조화 출력(json_schema) 미지원 — 프롬프트 방식으로 전환: %s", reason)
+
+
+# ===================== 검증 =====================
+def validate(data, schema: dict, path: tuple = ()) -> list:
+    """
+    스키마와 맞지 않는 필드 경로 목록 (비어 있으면 통과).
+    문자열/문자열 배열 필드는 비어 있어도 문제로 봄 — 빈 칸은 화면에서 누락과 같음.
+    배열은 항목이 하나라도 틀리면 배열 경로 전체가 문제.
+    """
+    t = schema.get("type")
+    if t == "object":
+        if not isinstance(data, dict):
+            return [path]
+        bad = []
+        for key, sub in schema["properties"].items():
+            bad += validate(data.get(key), sub, path + (key,))
+        return bad
+    if t == "array":
+        if not isinstance(data, list) or not data:
+            return [path]
+        if any(validate(x, schema["items"]) for x in data):
+            return [path]
+        return []
+    if t == "string":
+        return [] if isinstance(data, str) and data.strip() else [path]
+    return []
+
+
+def leaf_count(schema: dict) -> int:
+    if schema.get("type") == "object":
+        return sum(leaf_count(s) for s in schema["properties"].values())
+    return 1
+
+
+def needs_full_regen(bad: list, schema: dict) -> bool:
+    """최상위가 깨졌거나 문제 필드 비율이 JSON_REASK_MAX_RATIO를 넘으면 부분 재요청보다 전체 재생성이 나음"""
+    if () in bad:
+        return True
+    n = 0
+    for p in bad:
+        node = schema
+        for key in p:
+            node = node["properties"][key]
+        n += leaf_count(node)       # 통째로 빠진 object는 그 안의 필드 수만큼
+    return n > leaf_count(schema) * config.JSON_REASK_MAX_RATIO
+
+
+def subschema(schema: dict, paths: list) -> dict:
+    """문제 필드만 남긴 스키마 (상위 object 구조는 유지)"""
+    out = _obj({})
+    for p in paths:
+        node, src = out, schema
+        for key in p[:-1]:
+            src = src["properties"][key]
+            node = node["properties"].setdefault(key, _obj({}))
+        node["properties"][p[-1]] = src["properties"][p[-1]]
+    _fill_required(out)
+    return out
+
+
+def _fill_required(node: dict):
+    # strict 모드는 required가 properties 키 전체와 같아야 함
+    if node.get("type") == "object":
+        node["required"] = list(node["properties"])
+        for sub in node["properties"].values():
+            _fill_required(sub)
+
+
+def _example(schema: dict):
+    """프롬프트에 넣을 짧은 형태 예시 (스키마 원문보다 토큰이 적음)"""
+    t = schema.get("type")
+    if t == "object":
+        return {k: _example(s) for k, s in schema["properties"].items()}
+    return ["문장"] if t == "array" else "문장"
+
+
+# ===================== 부분 재요청 =====================
+def repair_messages(messages: list, text: str, bad: list, schema: dict) -> list:
+    """
+    원래 대화 + 직전 응답 뒤에 '문제 필드만 다시' 요청을 붙인 메시지.
+    앞부분이 원 요청과 같아 근거/규칙을 다시 설명할 필요가 없고 완료 토큰은 해당 필드분만 듦.
+    """
+    fields = ", ".join(".".join(p) for p in bad)
+    shape = json.dumps(_example(subschema(schema, bad)), ensure_ascii=False)
+    user = (
+        f"직전 JSON에서 다음 필드가 비었거나 형식이 맞지 않습니다: {fields}\n"
+        "같은 근거와 규칙으로 이 필드만 채운 JSON을 출력하세요. 다른 필드는 출력 금지, JSON 외 텍스트 금지.\n"
+        f"형식: {shape}"
+    )
+    return [*messages, {"role": "assistant", "content": text or ""}, {"role": "user", "content": user}]
+
+
+def merge(data, patch, paths: list) -> dict:
+    """data의 paths 위치를 patch의 같은 경로 값으로 교체 (patch에 없는 경로는 그대로)"""
+    out = copy.deepcopy(data) if isinstance(data, dict) else {}
+    if not isinstance(patch, dict):
+        return out
+    for p in paths:
+        src = patch
+        for key in p:
+            src = src.get(key) if isinstance(src, dict) else None
+        if src is None:
+            continue
+        node = out
+        for key in p[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node[p[-1]] = src
+    return out
+
+
+# ===================== 집계 =====================
+OUTCOMES = ("ok", "partial", "regenerated", "failed")
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: dict(dict.fromkeys(OUTCOMES, 0), full_regens=0, reasked_fields=0, extra_tokens=0))
+
+
+def record(kind: str, outcome: str, *, full_regen: bool = False, reasked_fields: int = 0, extra_tokens: int = 0):
+    """full_regen은 결과와 별도 — 재생성 후에도 실패(failed)한 경우까지 재생성 비율에 포함"""
+    with _stats_lock:
+        s = _stats[kind]
+        s[outcome] += 1
+        s["full_regens"] += int(full_regen)
+        s["reasked_fields"] += reasked_fields
+        s["extra_tokens"] += extra_tokens
+    metrics.json_result(kind, outcome, full_regen=full_regen, reasked=bool(reasked_fields), extra_tokens=extra_tokens)
+
+
+def stats() -> dict:
+    """종류별 결과 횟수 + 전체 재생성 비율 + 추가 토큰"""
+    with _stats_lock:
+        out = {k: dict(v) for k, v in _stats.items()}
+    for s in out.values():
+        total = sum(s[o] for o in OUTCOMES)
+        s["full_regen_rate"] = round(s["full_regens"] / total, 3) if total else 0.0
+    return out
@@ -0,0 +1,6 @@
+# tests/conftest.py
+"""앱 모듈은 grounded-pest-app 최상위에 평평하게 있으므로 그 디렉터리를 import 경로에 추가."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
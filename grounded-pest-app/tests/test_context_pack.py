@@ -0,0 +1,54 @@
+# tests/test_context_pack.py
+import context_pack
+from context_pack import count_tokens, pack, pack_docs, truncate_tokens
+
+
+def test_truncate_tokens_keeps_head_within_budget():
+    text = "가나다라마바사 " * 100
+    out = truncate_tokens(text, 50)
+    assert text.startswith(out)
+    assert count_tokens(out) <= 50
+    assert truncate_tokens("짧은 글", 50) == "짧은 글"
+
+
+def test_split_passages_respects_max_tokens():
+    text = "문장입니다. " * 200 + "\n\n짧은 문단"
+    parts = context_pack.split_passages(text, max_tokens=50)
+    assert parts[-1] == "짧은 문단"
+    assert all(count_tokens(p) <= 50 for p in parts)
+
+
+def test_pack_prefers_relevant_passages_and_keeps_numbering():
+    docs = [
+        {"title": "잡담", "content": "점심 메뉴와 회의 일정 안내입니다. " * 30},
+        {"title": "보안", "content": "보안 요구사항과 암호화 정책입니다."},
+    ]
+    res = pack_docs(docs, "보안 암호화", budget_tokens=40)
+    assert "[D2] 보안" in res.text
+    assert "[D1]" not in res.text
+    assert res.used_tokens <= 40
+    assert res.kept == {2: 1}
+
+
+def test_pack_drops_near_duplicates():
+    dup = "클라우드 전환 계획과 데이터 이전 일정에 대한 설명입니다."
+    res = pack([{"title": "a", "content": dup}, {"title": "b", "content": dup}], "클라우드", 500, label="D")
+    assert res.dropped_duplicates == 1
+    assert list(res.kept) == [1]
+
+
+def test_oversized_passage_is_truncated_not_skipped():
+    blob = "x" * 4000                                   # 문장 구분이 없어 더 쪼갤 수 없는 본문
+    res = pack([{"title": "원문", "content": blob}], "", budget_tokens=100, label="D", kind="test_oversized")
+    assert res.truncated == 1
+    assert res.kept == {1: 1}
+    assert "[D1] 원문\nxxxx" in res.text
+    assert res.text.rstrip().endswith("…")
+    assert res.used_tokens <= 100
+    assert context_pack.stats()["test_oversized"]["truncated"] == 1
+
+
+def test_tiny_remaining_budget_is_not_filled_with_fragment():
+    res = pack([{"title": "원문", "content": "x" * 4000}], "", budget_tokens=20, label="D")
+    assert res.truncated == 0
+    assert res.text == ""
@@ -0,0 +1,81 @@
+# tests/test_http_client.py
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+import config
+import http_client
+
+
+class _Resp:
+    def __init__(self, status_code):
+        self.status_code, self.headers, self.content = status_code, {}, b""
+
+    def close(self):
+        pass
+
+
+class _Session:
+    def __init__(self, *outcomes):
+        self.outcomes, self.calls = list(outcomes), 0
+
+    def request(self, method, url, **kw):
+        self.calls += 1
+        out = self.outcomes.pop(0)
+        if isinstance(out, BaseException):
+            raise out
+        return _Resp(out)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 2)
+    monkeypatch.setattr(http_client, "backoff_delay", lambda attempt: 0)
+
+    def use(*outcomes):
+        sess = _Session(*outcomes)
+        monkeypatch.setattr(http_client, "get_session", lambda url: sess)
+        return sess
+    return use
+
+
+def _connect_refused():
+    return requests.exceptions.ConnectionError(MaxRetryError(None, "u", NewConnectionError(None, "refused")))
+
+
+def test_get_retries_read_timeout(session):
+    sess = session(requests.exceptions.Timeout("read"), 200)
+    assert http_client.get("https://h/x").status_code == 200
+    assert sess.calls == 2
+
+
+def test_post_does_not_retry_after_request_was_sent(session):
+    sess = session(requests.exceptions.Timeout("read"), 200)
+    with pytest.raises(requests.exceptions.Timeout):
+        http_client.post("https://h/run")
+    assert sess.calls == 1
+
+
+def test_post_retries_connect_failure_and_unprocessed_status(session):
+    sess = session(_connect_refused(), 429, 202)
+    assert http_client.post("https://h/run").status_code == 202
+    assert sess.calls == 3
+
+
+def test_post_does_not_retry_connection_lost_after_send(session):
+    sess = session(requests.exceptions.ConnectionError("Connection aborted."), 202)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_client.post("https://h/run")
+    assert sess.calls == 1
+
+
+def test_post_does_not_retry_gateway_error(session):
+    sess = session(502, 202)
+    assert http_client.post("https://h/run").status_code == 502
+    assert sess.calls == 1
+
+
+def test_idempotent_post_keeps_full_retry(session):
+    sess = session(requests.exceptions.Timeout("read"), 502, 200)
+    assert http_client.post("https://h/search", idempotent=True).status_code == 200
+    assert sess.calls == 3
@@ -0,0 +1,70 @@
+# tests/test_indexer_monitor.py
+import threading
+import time
+from email.utils import formatdate
+
+import http_client
+import indexer_monitor
+
+
+class _Resp:
+    def __init__(self, status_code=202, body=None, server_time=None):
+        self.status_code, self._body, self.text = status_code, body or {}, ""
+        self.headers = {"Date": formatdate(server_time, usegmt=True)} if server_time else {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+def _iso(epoch):
+    return time.strftime("%Y-%m-%dT%H:%M:%S.0000000Z", time.gmtime(epoch))
+
+
+def test_run_post_does_not_hold_lock(monkeypatch):
+    mon = indexer_monitor.IndexerMonitor("idx")
+    monkeypatch.setattr(mon, "_ensure_thread", lambda: None)
+    entered, release, got_status = threading.Event(), threading.Event(), []
+
+    def slow_post(url, **kw):
+        entered.set()
+        release.wait(5)
+        return _Resp(202)
+
+    monkeypatch.setattr(http_client, "post", slow_post)
+    t = threading.Thread(target=lambda: got_status.append(mon.request_run()))
+    t.start()
+    assert entered.wait(5)
+    snap = {}
+    reader = threading.Thread(target=lambda: snap.update(mon.snapshot()))
+    reader.start()
+    reader.join(1)
+    assert not reader.is_alive()            # POST 중에도 상태 조회가 막히지 않음
+    assert snap["in_progress"]
+    assert mon.request_run() == "coalesced"  # 동시 요청은 합쳐짐
+    release.set()
+    t.join(5)
+    assert got_status == ["started"]
+    assert mon.counters["runs_triggered"] == 1
+
+
+def test_failed_post_is_not_treated_as_running(monkeypatch):
+    mon = indexer_monitor.IndexerMonitor("idx")
+    monkeypatch.setattr(mon, "_ensure_thread", lambda: None)
+    monkeypatch.setattr(http_client, "post", lambda url, **kw: _Resp(500))
+    assert mon.request_run().startswith("error")
+    assert not mon.snapshot()["in_progress"]
+
+
+def test_covered_corrects_server_clock_skew(monkeypatch):
+    mon = indexer_monitor.IndexerMonitor("idx")
+    now = time.time()
+    server_now = now - 300                  # 서버 시계가 5분 늦음
+    finished = {"lastResult": {"status": "success", "startTime": _iso(server_now + 5)}}
+    monkeypatch.setattr(http_client, "get", lambda url, **kw: _Resp(200, finished, server_time=server_now))
+    mon.refresh()
+    with mon._cond:
+        assert mon._covered(now)            # 업로드 뒤 시작된 실행 → 반영됨
+        assert not mon._covered(now + 60)   # 그보다 늦은 업로드는 아직
@@ -0,0 +1,62 @@
+# tests/test_json_stream.py
+import json
+
+from json_stream import IncrementalJSONParser, iter_fields
+
+DOC = {
+    "PEST": {"P": ["규제 \"강화\", 심사."], "E": ["금리 {하락}."]},
+    "SWOT": {"S": ["보안 역량."]},
+    "one_liner": "금융 AI 확대.",
+}
+
+
+def _feed_all(text, size):
+    p, events = IncrementalJSONParser(), []
+    for i in range(0, len(text), size):
+        events += p.feed(text[i:i + size])
+    return p, events
+
+
+def test_fields_are_emitted_as_they_close_regardless_of_chunking():
+    text = "```json\n" + json.dumps(DOC, ensure_ascii=False, indent=1) + "\n```"
+    for size in (1, 3, 17, len(text)):
+        p, events = _feed_all(text, size)
+        paths = [path for path, _ in events]
+        assert paths.index(("PEST", "P")) < paths.index(("PEST", "E")) < paths.index(("one_liner",))
+        assert dict(events)[("PEST", "E")] == ["금리 {하락}."]      # 문자열 안의 괄호/따옴표는 구조로 보지 않음
+        assert p.done and p.result == DOC
+
+
+def test_partial_result_before_close():
+    text = json.dumps(DOC, ensure_ascii=False)
+    p = IncrementalJSONParser()
+    p.feed(text[: text.index('"SWOT"')])
+    assert not p.done
+    assert p.result == {"PEST": DOC["PEST"]}
+
+
+def test_max_depth_limits_emitted_paths():
+    events = IncrementalJSONParser(max_depth=1).feed(json.dumps(DOC, ensure_ascii=False))
+    assert [path for path, _ in events] == [("PEST",), ("SWOT",), ("one_liner",)]
+
+
+def test_scalars_and_trailing_commas():
+    p = IncrementalJSONParser()
+    events = p.feed('{"n": 3, "ok": true, "items": ["a", "b",], "x": null}')
+    got = dict(events)
+    assert got[("n",)] == 3 and got[("ok",)] is True and got[("x",)] is None
+    assert got[("items",)] == ["a", "b"]
+
+
+def test_text_after_close_is_kept_but_ignored():
+    p = IncrementalJSONParser()
+    p.feed('{"a": "b"}')
+    assert p.feed(" 끝") == []
+    assert p.text.endswith(" 끝") and p.result == {"a": "b"}
+
+
+def test_iter_fields_yields_per_chunk():
+    chunks = ['{"a": "x"', ', "b": ["y"]', "}"]
+    steps = list(iter_fields(chunks))
+    assert [fields for _, fields in steps] == [[(("a",), "x")], [(("b",), ["y"])], []]   # 문자열은 닫는 따옴표에서
+    assert steps[-1][0].done
@@ -0,0 +1,87 @@
+# tests/test_rate_limit.py
+import pytest
+
+import config
+import rate_limit
+from rate_limit import AdaptiveLimiter, QueueTimeout
+
+
+class _Throttled(Exception):
+    def __init__(self, headers=None, status_code=429):
+        super().__init__("throttled")
+        self.status_code = status_code
+        self.response = type("R", (), {"headers": headers or {}, "status_code": status_code})()
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    lim = AdaptiveLimiter(0, 0, 4, latency_target=0, queue_timeout=0.05)
+    monkeypatch.setattr(rate_limit, "_limiter", lim)
+    monkeypatch.setattr(config, "AOAI_MAX_RETRIES", 2)
+    return lim
+
+
+def test_retry_after_header_parsing():
+    assert rate_limit.retry_after(_Throttled({"retry-after": "0"})) == 0.0
+    assert rate_limit.retry_after(_Throttled({"retry-after-ms": "1500"})) == 1.5
+    assert rate_limit.retry_after(_Throttled()) is None
+    assert rate_limit.retryable(_Throttled(status_code=503))
+    assert not rate_limit.retryable(_Throttled(status_code=400))
+
+
+def test_retry_after_zero_is_not_turned_into_backoff(limiter):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _Throttled({"retry-after": "0"})
+        return "ok"
+
+    assert rate_limit.call(fn) == "ok"
+    assert len(calls) == 2
+    assert limiter.stats()["paused_sec"] == 0.0       # 헤더 0 → 멈추지 않음
+    assert limiter.counters["throttled"] == 1
+
+
+def test_missing_header_falls_back_to_backoff(limiter, monkeypatch):
+    monkeypatch.setattr(config, "AOAI_MAX_RETRIES", 0)
+
+    def fn():
+        raise _Throttled()
+
+    with pytest.raises(_Throttled):
+        rate_limit.admit(fn)
+    assert limiter.stats()["paused_sec"] > 0           # 2**attempt 초 일시정지
+
+
+def test_non_retryable_error_is_not_retried(limiter):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        rate_limit.call(fn)
+    assert calls == [1]
+    assert limiter.active == 0
+
+
+def test_throttle_halves_limit_and_success_grows_it():
+    lim = AdaptiveLimiter(0, 0, 4, latency_target=0)
+    lim.release(lim.acquire(), retry_after=0.0)
+    assert lim.limit == 2
+    for _ in range(2):
+        lim.release(lim.acquire())
+    assert lim.limit == 3
+
+
+def test_rpm_bucket_queues_then_times_out():
+    lim = AdaptiveLimiter(1, 0, 4, queue_timeout=0.05)
+    lim.release(lim.acquire())
+    with pytest.raises(QueueTimeout):
+        lim.acquire()
+    assert lim.counters["timeouts"] == 1
+    assert lim.stats()["waiting"] == 0
+
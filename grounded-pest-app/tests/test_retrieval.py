@@ -0,0 +1,134 @@
+# tests/test_retrieval.py
+import threading
+
+import pytest
+
+import config
+import retrieval
+from retrieval import BM25Index
+
+
+def _hits(*contents):
+    return [{"title": f"t{i}", "content": c, "source": "s"} for i, c in enumerate(contents)]
+
+
+def test_base_backend_is_abstract():
+    with pytest.raises(TypeError):
+        retrieval.RetrievalBackend()
+
+
+def test_search_ranks_by_relevance_and_replaces_doc():
+    idx = BM25Index()
+    idx.add_documents("a", _hits("보안 암호화 보안 정책", "점심 메뉴 안내"))
+    idx.add_documents("b", _hits("클라우드 전환 계획"))
+    assert idx.search("보안")[0]["content"] == "보안 암호화 보안 정책"
+    idx.add_documents("a", _hits("물류 자동화"))          # 같은 doc_id → 교체
+    assert idx.search("보안") == []
+    assert len(idx) == 2
+    idx.delete_document("b")
+    assert idx.search("클라우드") == []
+
+
+def test_save_and_reopen_keeps_live_chunks(tmp_path):
+    path = str(tmp_path / "bm25.idx")
+    idx = BM25Index(path)
+    idx.add_documents("a", _hits("보안 정책"))
+    idx.add_documents("b", _hits("클라우드 전환"))
+    idx.delete_document("a")
+    idx.save()
+    reopened = BM25Index(path)
+    assert reopened.stats()["base_chunks"] == 1
+    assert reopened.search("클라우드")[0]["content"] == "클라우드 전환"
+    assert reopened.search("보안") == []
+
+
+def test_delta_log_is_replayed_without_rewriting_base(tmp_path):
+    path = str(tmp_path / "bm25.idx")
+    idx = BM25Index(path)
+    idx.add_documents("a", _hits("보안 정책"))
+    idx.save()
+    idx.add_documents("b", _hits("클라우드 전환"))
+    idx.append_delta("b", _hits("클라우드 전환"))
+    idx.delete_document("a")
+    idx.append_delta("a")
+    with open(f"{path}.delta", "a", encoding="utf-8") as f:
+        f.write('{"doc_id": "c", "hi')                    # 쓰다 끊긴 줄
+
+    reopened = BM25Index(path)
+    assert reopened.stats()["base_chunks"] == 1           # 기본 파일은 그대로
+    assert reopened.search("클라우드")[0]["content"] == "클라우드 전환"
+    assert reopened.search("보안") == []
+    reopened.save()
+    assert (tmp_path / "bm25.idx.delta").exists()         # 끝의 미완성 줄이 있으면 로그는 유지
+    again = BM25Index(path)
+    assert again.stats()["delta_chunks"] == 0             # 압축된 줄은 다시 재생하지 않음
+    assert again.search("클라우드")[0]["content"] == "클라우드 전환"
+
+
+def test_compaction_resets_log_only_when_nothing_was_appended(tmp_path):
+    path = str(tmp_path / "bm25.idx")
+    idx = BM25Index(path)
+    idx.add_documents("a", _hits("보안 정책"))
+    idx.append_delta("a", _hits("보안 정책"))
+    idx.save()
+    delta = tmp_path / "bm25.idx.delta"
+    assert delta.read_text(encoding="utf-8") == '{"gen": 1}\n'     # 새 세대의 빈 로그
+
+    idx.add_documents("b", _hits("클라우드 전환"))
+    idx.append_delta("b", _hits("클라우드 전환"))
+    other = BM25Index(path)                               # 같은 파일을 쓰는 다른 레플리카
+    other.add_documents("c", _hits("물류 자동화"))
+    other.append_delta("c", _hits("물류 자동화"))
+    idx.save()                                            # c는 압축 전에 따라잡아 반영
+    assert idx.search("물류")[0]["content"] == "물류 자동화"
+    other.add_documents("d", _hits("반도체 투자"))
+    other.append_delta("d", _hits("반도체 투자"))          # 압축 이후 추가 — 로그에 남아야 함
+
+    fresh = BM25Index(path)
+    assert {fresh.search(q)[0]["content"] for q in ("보안", "클라우드", "물류", "반도체")} == {
+        "보안 정책", "클라우드 전환", "물류 자동화", "반도체 투자"}
+    assert fresh.stats()["delta_chunks"] == 1
+
+
+def test_save_does_not_block_search_and_keeps_concurrent_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "bm25.idx")
+    idx = BM25Index(path)
+    idx.add_documents("a", _hits("보안 정책"))
+    idx.add_documents("b", _hits("클라우드 전환"))
+    writing, release = threading.Event(), threading.Event()
+    real_write = BM25Index._write
+
+    def slow_write(self, *a, **kw):
+        writing.set()
+        release.wait(5)
+        return real_write(self, *a, **kw)
+
+    monkeypatch.setattr(BM25Index, "_write", slow_write)
+    t = threading.Thread(target=idx.save)
+    t.start()
+    assert writing.wait(5)
+    assert idx.search("보안")[0]["content"] == "보안 정책"   # 압축 중에도 검색 가능
+    idx.add_documents("c", _hits("물류 자동화"))
+    idx.delete_document("b")
+    release.set()
+    t.join(5)
+    assert idx.stats()["base_chunks"] == 2 and idx.stats()["delta_chunks"] == 1
+    assert idx.search("물류")[0]["content"] == "물류 자동화"
+    assert idx.search("클라우드") == []
+    assert len(idx) == 2
+
+
+def test_index_documents_appends_and_compacts_at_threshold(tmp_path, monkeypatch):
+    path = str(tmp_path / "bm25.idx")
+    idx = BM25Index(path)
+    monkeypatch.setattr(retrieval, "_local", idx)
+    monkeypatch.setattr(config, "BM25_COMPACT_CHUNKS", 3)
+    compacted = []
+    monkeypatch.setattr(retrieval, "_compact_async", compacted.append)
+
+    retrieval.index_documents("a", _hits("보안 정책"))
+    assert not (tmp_path / "bm25.idx").exists()           # 업로드마다 전체 재작성하지 않음
+    assert (tmp_path / "bm25.idx.delta").exists()
+    assert compacted == []
+    retrieval.index_documents("b", _hits("클라우드", "물류"))
+    assert compacted == [idx]
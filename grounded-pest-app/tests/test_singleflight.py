@@ -0,0 +1,91 @@
+# tests/test_singleflight.py
+import threading
+import time
+
+import pytest
+
+import config
+import singleflight
+
+
+class _Rerun(BaseException):
+    """Streamlit RerunException처럼 Exception이 아닌 중단 신호"""
+
+
+def _start_waiter(group, key, out):
+    def run():
+        try:
+            out.append(group.do(key, lambda: "waiter-ran"))
+        except BaseException as e:
+            out.append(e)
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def _leader(group, key, fn, started, release):
+    def body():
+        started.set()
+        release.wait(5)
+        return fn()
+    return group.do(key, body)
+
+
+def _run_with_waiter(group, fn):
+    started, release, out = threading.Event(), threading.Event(), []
+    leader_out = []
+
+    def lead():
+        try:
+            leader_out.append(_leader(group, "k", fn, started, release))
+        except BaseException as e:
+            leader_out.append(e)
+
+    lt = threading.Thread(target=lead)
+    lt.start()
+    assert started.wait(5)
+    wt = _start_waiter(group, "k", out)
+    while group.coalesced == 0:
+        time.sleep(0.001)
+    release.set()
+    lt.join(5)
+    wt.join(5)
+    return leader_out[0], out[0]
+
+
+def test_waiters_share_leader_value():
+    g = singleflight.Group()
+    leader, waiter = _run_with_waiter(g, lambda: 42)
+    assert leader == (42, False)
+    assert waiter == (42, True)
+    assert g.stats() == {"leaders": 1, "coalesced": 1, "inflight": 0}
+
+
+def test_leader_exception_reaches_waiters():
+    g = singleflight.Group()
+
+    def boom():
+        raise ValueError("x")
+
+    leader, waiter = _run_with_waiter(g, boom)
+    assert isinstance(leader, ValueError)
+    assert waiter is leader
+
+
+def test_leader_base_exception_is_not_propagated_to_waiters():
+    g = singleflight.Group()
+
+    def rerun():
+        raise _Rerun()
+
+    leader, waiter = _run_with_waiter(g, rerun)
+    assert isinstance(leader, _Rerun)           # 리더 세션은 원래 신호를 그대로 받음
+    assert type(waiter) is RuntimeError         # 다른 세션에는 일반 오류로만 전달
+
+
+def test_wait_uses_configured_timeout(monkeypatch):
+    monkeypatch.setattr(config, "SINGLEFLIGHT_WAIT_SEC", 0.05)
+    g = singleflight.Group()
+    g.begin("k")                                # 끝나지 않는 리더
+    with pytest.raises(TimeoutError):
+        g.do("k", lambda: "never")
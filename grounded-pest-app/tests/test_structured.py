@@ -0,0 +1,86 @@
+# tests/test_structured.py
+import copy
+
+import structured
+from structured import PEST_SWOT_SCHEMA, COMBINED_SCHEMA
+
+FULL = {
+    "PEST": {"P": ["p."], "E": ["e."], "S": ["s."], "T": ["t."]},
+    "SWOT": {"S": ["a."], "W": ["b."], "O": ["c."], "T": ["d."]},
+    "one_liner": "전략.",
+}
+
+
+class _Err(Exception):
+    def __init__(self, msg, status=400, param=None, code=None):
+        super().__init__(msg)
+        self.status_code, self.param, self.code, self.message = status, param, code, msg
+
+
+def test_validate_complete_passes():
+    assert structured.validate(FULL, PEST_SWOT_SCHEMA) == []
+
+
+def test_validate_reports_missing_and_empty_fields():
+    data = copy.deepcopy(FULL)
+    data["SWOT"]["W"] = []
+    del data["one_liner"]
+    assert structured.validate(data, PEST_SWOT_SCHEMA) == [("SWOT", "W"), ("one_liner",)]
+
+
+def test_validate_array_with_any_invalid_item_is_bad():
+    data = copy.deepcopy(FULL)
+    data["PEST"]["P"] = ["", 3, {}, "ok"]
+    assert structured.validate(data, PEST_SWOT_SCHEMA) == [("PEST", "P")]
+
+
+def test_validate_non_object_root():
+    assert structured.validate(["x"], PEST_SWOT_SCHEMA) == [()]
+
+
+def test_needs_full_regen_weighs_missing_objects_by_leaf_count():
+    # PEST(4) + SWOT(4) 통째로 빠짐 → 8/9 > 0.5
+    assert structured.needs_full_regen([("PEST",), ("SWOT",)], PEST_SWOT_SCHEMA)
+    assert not structured.needs_full_regen([("PEST", "P"), ("one_liner",)], PEST_SWOT_SCHEMA)
+    assert structured.needs_full_regen([()], PEST_SWOT_SCHEMA)
+
+
+def test_subschema_keeps_parents_and_required():
+    sub = structured.subschema(COMBINED_SCHEMA, [("proposals", "cooperation"), ("strengths",)])
+    assert sub["required"] == ["proposals", "strengths"]
+    props = sub["properties"]["proposals"]
+    assert list(props["properties"]) == ["cooperation"]
+    assert props["required"] == ["cooperation"]
+    assert props["additionalProperties"] is False
+
+
+def test_merge_replaces_only_given_paths():
+    data = copy.deepcopy(FULL)
+    data["SWOT"]["W"] = []
+    patch = {"SWOT": {"W": ["w."], "S": ["바뀌면 안 됨"]}, "one_liner": "무시"}
+    out = structured.merge(data, patch, [("SWOT", "W")])
+    assert out["SWOT"] == {"S": ["a."], "W": ["w."], "O": ["c."], "T": ["d."]}
+    assert out["one_liner"] == "전략."
+    assert data["SWOT"]["W"] == []          # 원본 보존
+
+
+def test_merge_creates_missing_parent_and_skips_absent_patch_paths():
+    out = structured.merge({}, {"PEST": {"P": ["p."]}}, [("PEST", "P"), ("one_liner",)])
+    assert out == {"PEST": {"P": ["p."]}}
+
+
+def test_repair_messages_appends_previous_answer_and_field_list():
+    msgs = [{"role": "user", "content": "원 요청"}]
+    out = structured.repair_messages(msgs, '{"x":1}', [("SWOT", "W")], PEST_SWOT_SCHEMA)
+    assert out[:1] == msgs
+    assert out[1] == {"role": "assistant", "content": '{"x":1}'}
+    assert "SWOT.W" in out[2]["content"]
+
+
+def test_is_unsupported_error_only_for_response_format_rejections():
+    assert structured.is_unsupported_error(_Err("bad", param="response_format"))
+    assert structured.is_unsupported_error(_Err("response_format json_schema is not supported with this model"))
+    assert not structured.is_unsupported_error(_Err("maximum context length exceeded", code="context_length_exceeded"))
+    assert not structured.is_unsupported_error(_Err("filtered", code="content_filter"))
+    assert not structured.is_unsupported_error(_Err("temperature must be <= 2", param="temperature"))
+    assert not structured.is_unsupported_error(_Err("response_format not supported", status=500))
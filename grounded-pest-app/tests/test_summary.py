@@ -0,0 +1,41 @@
+# tests/test_summary.py
+import config
+import utils
+
+
+def _hits():
+    filler = "회의 일정 공지 사항 점심 메뉴 안내. " * 40
+    return [{"title": f"문서{i}", "content": filler + f" 번호 {i}"} for i in range(6)] + [
+        {"title": "핵심", "content": "보안 요구사항 암호화 접근통제 보안 요구사항 감사 로그. " * 10},
+    ]
+
+
+def test_mapreduce_keeps_relevant_chunks_when_capped(monkeypatch):
+    seen, reduce_input = [], []
+    monkeypatch.setattr(config, "SUMMARY_MAX_CHUNKS", 2)
+    monkeypatch.setattr(config, "SUMMARY_CHUNK_TOKENS", 400)
+    monkeypatch.setattr(utils, "summarize_chunk", lambda text: seen.append(text) or "부분 요약")
+    monkeypatch.setattr(utils, "run_aoai", lambda messages, **kw: reduce_input.append(messages[-1]["content"]) or "요약 [D7]")
+
+    out = utils.summarize_docs_mapreduce(_hits(), query="보안 요구사항")
+
+    assert out == "요약 [D7]"
+    assert len(seen) == 2
+    assert any("보안 요구사항" in t for t in seen)      # 맨 뒤 문서가 잘리지 않음
+    assert "[D7]" in reduce_input[0]
+
+
+def test_auto_mode_packs_by_default(monkeypatch):
+    monkeypatch.setattr(config, "SUMMARY_MODE", "single")
+    monkeypatch.setattr(config, "AOAI_ENDPOINT", "x")
+    monkeypatch.setattr(config, "AOAI_KEY", "k")
+    monkeypatch.setattr(config, "AOAI_DEPLOY", "d")
+    monkeypatch.setattr(utils, "summarize_docs_mapreduce", lambda *a, **k: (_ for _ in ()).throw(AssertionError("map-reduce 호출됨")))
+    calls = []
+    monkeypatch.setattr(utils, "run_aoai", lambda messages, **kw: calls.append(messages) or "요약")
+
+    out = utils.summarize_docs_combined.__wrapped__(_hits(), query="보안 요구사항", token_budget=300)
+
+    assert out == "요약"
+    assert len(calls) == 1
+    assert "보안 요구사항" in calls[0][-1]["content"]
@@ -0,0 +1,56 @@
+# tests/test_textproc.py
+import utils
+from textproc import jaccard, minhash, minhash_similarity, near_duplicate_clusters, shingles, tokenize
+
+
+def test_tokenize_strips_josa_and_adds_bigrams():
+    toks = tokenize("삼성SDS의 클라우드에서 AI and 보안")
+    assert "클라우드" in toks and "클라" in toks      # 조사 제거 + bigram
+    assert "ai" in toks and "sds" in toks
+    assert "and" not in toks and "의" not in toks
+
+
+def test_minhash_approximates_jaccard():
+    a = shingles("금융권 생성형 AI 도입 확대, 내부 통제 강화 방안 발표", 3)
+    b = shingles("금융권 생성형 AI 도입 확대… 내부 통제 강화 방안 발표", 3)
+    c = shingles("반도체 수출 회복세에 설비 투자 재개", 3)
+    assert minhash_similarity(minhash(a), minhash(b)) >= 0.8
+    assert minhash_similarity(minhash(a), minhash(c)) <= 0.2
+    assert abs(minhash_similarity(minhash(a, 128), minhash(b, 128)) - jaccard(a, b)) < 0.2
+
+
+def test_minhash_edge_cases():
+    assert minhash(set(), 8) == minhash(set(), 8)
+    assert minhash_similarity((), ()) == 0.0
+    assert minhash_similarity((1, 2), (1,)) == 0.0
+
+
+def test_near_duplicate_clusters_groups_rewrites_and_keeps_order():
+    texts = [
+        "삼성SDS, 금융권 생성형 AI 플랫폼 출시 — 보안 강화",
+        "반도체 수출 회복세에 설비 투자 재개",
+        "[속보] 삼성SDS, 금융권 생성형 AI 플랫폼 출시…보안 강화",
+        "",
+    ]
+    clusters = near_duplicate_clusters(texts)
+    assert [0, 2] in clusters
+    assert [1] in clusters and [3] in clusters
+    assert clusters == sorted(clusters, key=lambda c: c[0])
+
+
+def test_near_duplicate_clusters_handles_tiny_inputs():
+    assert near_duplicate_clusters([]) == []
+    assert near_duplicate_clusters(["하나"]) == [[0]]
+
+
+def test_collapse_near_duplicates_keeps_first_as_representative():
+    news = [
+        {"title": "삼성SDS 금융 AI 플랫폼 출시", "snippet": "보안 강화한 생성형 AI", "provider": "A", "url": "https://a/1"},
+        {"title": "삼성SDS 금융 AI 플랫폼 출시", "snippet": "보안 강화한 생성형 AI", "provider": "B", "url": "https://b/1"},
+        {"title": "반도체 수출 회복", "snippet": "설비 투자 재개", "provider": "A", "url": "https://a/2"},
+    ]
+    out, report = utils.collapse_near_duplicates(news, threshold=0.6)
+    assert [n["url"] for n in out] == ["https://a/1", "https://a/2"]
+    assert out[0]["source_count"] == 2 and out[0]["sources"] == ["A", "B"]
+    assert "source_count" not in news[0]                 # 원본은 그대로
+    assert report["dropped"] == 1 and report["tokens_saved"] > 0
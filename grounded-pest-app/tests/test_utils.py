@@ -0,0 +1,52 @@
+# tests/test_utils.py
+import utils
+
+
+def test_canonical_url_strips_only_tracking_params():
+    a = utils.canonical_url("https://www.news.com/a/?utm_source=x&id=3&fbclid=1&ref=tw&ref_src=twsrc")
+    assert a == "//news.com/a?id=3"
+    assert a == utils.canonical_url("http://m.news.com/a?id=3#top")
+
+
+def test_canonical_url_keeps_params_that_only_share_a_prefix():
+    url = "https://news.com/view?referer=main&reference=7&from=2024-01-01&fromDate=1"
+    assert utils.canonical_url(url) == "//news.com/view?from=2024-01-01&fromDate=1&reference=7&referer=main"
+
+
+def test_selection_signature_changes_with_selection_and_news():
+    news = [{"url": "https://a/1"}, {"url": "https://a/2"}]
+    base = utils.selection_signature("삼성SDS", ["AI"], ["금융"], news)
+    assert base == utils.selection_signature("삼성SDS", ["AI"], ["금융"], list(news))
+    assert base != utils.selection_signature("LG CNS", ["AI"], ["금융"], news)
+    assert base != utils.selection_signature("삼성SDS", ["AI", "클라우드"], ["금융"], news)
+    assert base != utils.selection_signature("삼성SDS", ["AI"], ["금융"], news[:1])
+
+
+def test_scan_json_strips_fence_and_prose():
+    js, data = utils._scan_json('설명입니다.\n```json\n{"a": [1, 2], "b": "x}"}\n```')
+    assert data == {"a": [1, 2], "b": "x}"}
+    assert js == '{"a": [1, 2], "b": "x}"}'
+    assert utils._scan_json('결과: {"a": 1} 이상입니다.')[1] == {"a": 1}
+
+
+def test_scan_json_removes_trailing_commas():
+    assert utils._scan_json('{"a": [1, 2,], "b": {"c": 3,},}')[1] == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_scan_json_skips_broken_candidate():
+    assert utils._scan_json('{예시 형식} 실제: {"ok": true}')[1] == {"ok": True}
+
+
+def test_scan_json_top_level_array_and_failures():
+    assert utils._scan_json('[{"a": 1}]')[1] == [{"a": 1}]
+    assert utils._scan_json("") == (None, None)
+    assert utils._scan_json("JSON 없음") == (None, None)
+    assert utils._scan_json('{"a": 1') == (None, None)
+
+
+def test_extract_and_safe_json_loads():
+    assert utils.extract_json_str('앞 {"a": 1} 뒤') == '{"a": 1}'
+    assert utils.safe_json_loads('```\n{"a": 1}\n```') == {"a": 1}
+    assert utils.safe_json_loads({"a": 1}) == {"a": 1}
+    assert utils.safe_json_loads(None) == {}
+    assert utils.safe_json_loads("깨진 {") == {}
@@ -0,0 +1,123 @@
+# textproc.py
+"""
+텍스트 처리 공용 함수 — 한국어 인지 토크나이저.
+- 영문/숫자: 소문자 단어
+- 한글: 조사/어미 꼬리 제거한 어간 + 문자 bigram (띄어쓰기·복합어 차이에 강하게)
+"""
+import hashlib
+import random
+import re
+
+_TOKEN_RE = re.compile(r"[0-9A-Za-z]+|[가-힣]+")
+
+# 길이 긴 것부터 매칭해야 '에서'가 '서'보다 먼저 잘림
+_JOSA = sorted([
+    "은", "는", "이", "가", "을", "를", "에", "의", "도", "만", "와", "과", "로", "으로",
+    "에서", "에게", "한테", "까지", "부터", "보다", "처럼", "이나", "나", "랑", "이랑",
+    "이다", "입니다", "했다", "한다", "하는", "하여", "및",
+], key=len, reverse=True)
+
+_STOP = {"the", "a", "an", "of", "and", "or", "to", "in", "for", "on", "is", "are", "및", "등"}
+
+
+def strip_josa(word: str) -> str:
+    for j in _JOSA:
+        if len(word) > len(j) + 1 and word.endswith(j):
+            return word[: -len(j)]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """색인/질의 공용 토큰 리스트 (중복 포함 — tf 계산용)"""
+    out = []
+    for m in _TOKEN_RE.finditer(text or ""):
+        w = m.group(0)
+        if w[0] >= "가":
+            stem = strip_josa(w)
+            if stem in _STOP or stem in _JOSA:   # 'DS의'처럼 영문 뒤에 떨어진 조사
+                continue
+            out.append(stem)
+            if len(stem) > 2:
+                out.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+        else:
+            w = w.lower()
+            if w not in _STOP:
+                out.append(w)
+    return out
+
+
+# ===================== 유사도 =====================
+def normalize_for_match(text: str) -> str:
+    """비교용 정규화 — 공백/기호 제거, 소문자"""
+    return re.sub(r"[^0-9a-z가-힣]", "", (text or "").lower())
+
+
+def shingles(text: str, k: int = 5) -> set:
+    """정규화 문자열의 문자 k-gram 집합 (짧으면 문자열 자체)"""
+    s = normalize_for_match(text)
+    if len(s) <= k:
+        return {s} if s else set()
+    return {s[i:i + k] for i in range(len(s) - k + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# ===================== MinHash (근사 중복 탐지) =====================
+_MERSENNE = (1 << 61) - 1
+_PERMS = [
+    (random.Random(i).randrange(1, _MERSENNE), random.Random(10_000 + i).randrange(0, _MERSENNE))
+    for i in range(128)
+]
+
+
+def _h64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(shingle_set: set, num_perm: int = 64) -> tuple:
+    """shingle 집합의 MinHash 서명 (num_perm ≤ 128)"""
+    if not shingle_set:
+        return tuple([_MERSENNE] * num_perm)
+    hv = [_h64(x) for x in shingle_set]
+    return tuple(min((a * h + b) % _MERSENNE for h in hv) for a, b in _PERMS[:num_perm])
+
+
+def minhash_similarity(sig_a: tuple, sig_b: tuple) -> float:
+    """서명 일치 비율 ≈ Jaccard 유사도"""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def near_duplicate_clusters(texts, threshold: float = 0.6, k: int = 3, num_perm: int = 64, bands: int = 16):
+    """
+    MinHash + LSH 밴딩으로 근사 중복 묶기.
+    반환: 클러스터 리스트 [[idx, ...], ...] (각 클러스터는 입력 순서 유지, 첫 원소가 대표)
+    """
+    sigs = [minhash(shingles(t, k), num_perm) for t in texts]
+    rows = max(1, num_perm // bands)
+    parent = list(range(len(texts)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    buckets = {}
+    for i, sig in enumerate(sigs):
+        for b in range(bands):
+            key = (b, sig[b * rows:(b + 1) * rows])
+            for j in buckets.setdefault(key, []):
+                if find(i) != find(j) and minhash_similarity(sigs[i], sigs[j]) >= threshold:
+                    parent[max(find(i), find(j))] = min(find(i), find(j))
+            buckets[key].append(i)
+
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda c: c[0])
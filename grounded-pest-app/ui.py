@@ -5,6 +5,7 @@ import re
 import json
 from datetime import datetime
 from utils import extract_json_str  # utils.py (아래 생성)에 의존
+from json_stream import IncrementalJSONParser
 
 # ---------------------- CSS ----------------------
 def inject_css():
@@ -213,3 +214,28 @@ def render_pest_swot_quadrants(text: str):
     st.download_button("⬇️ PEST·SWOT JSON 저장", data=js,
         file_name=f"pest_swot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", mime="application/json")
     return data
+
+# ---------------------- 스트리밍 렌더러 ----------------------
+def render_pest_swot_stream(deltas, ph_pest, ph_swot, ph_action):
+    """
+    run_aoai_stream 델타를 받아 PEST/SWOT 사분면·한 줄 전략을 닫히는 즉시 placeholder에 채움.
+    반환: 최종 원문 텍스트 (세션 저장/캐시용)
+    """
+    parser = IncrementalJSONParser(max_depth=2)
+    for placeholder in (ph_pest, ph_swot, ph_action):
+        placeholder.caption("⏳ 생성 중… 완료된 항목부터 표시됩니다.")
+    for delta in deltas:
+        for path, _ in parser.feed(delta):
+            part = parser.result
+            if path[0] == "PEST":
+                with ph_pest.container():
+                    render_pest_only(part.get("PEST") or {})
+            elif path[0] == "SWOT":
+                with ph_swot.container():
+                    render_swot_only(part.get("SWOT") or {})
+            elif path[0] == "one_liner" and part.get("one_liner"):
+                ph_action.markdown(
+                    f'<div class="card-accent">{html.escape(_clean_citations(str(part["one_liner"]).strip()))}</div>',
+                    unsafe_allow_html=True
+                )
+    return parser.text
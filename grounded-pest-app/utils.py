@@ -1,12 +1,32 @@
 # utils.py
 import os
+import hashlib
 import json
+import logging
 import re
 import requests
-import streamlit as st
-from datetime import datetime, timedelta
-from openai import AzureOpenAI
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import config  # config.py
+import aoai_client
+import runtime
+import context_pack
+import textproc
+import llm_cache
+import metrics
+import rate_limit
+import structured
+import http_client
+from cache import cached
+
+log = logging.getLogger(__name__)
+
+http_client.add_timing_hook(metrics.on_http)   # 단계별 HTTP 바이트/재시도 집계
 
 # [추가 — 자사 판별 헬퍼 블록]
 SELF_COMPANY = "KT DS"
@@ -29,34 +49,73 @@ def is_self_company(company: str) -> bool:
 
 
 # ===================== 공용 유틸 (JSON) =====================
-def extract_json_str(text: str):
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE)
+_JSON_TOKEN_RE = re.compile(r'["\\{}\[\],]')     # 스캐너가 멈추는 문자 (그 외는 C 레벨에서 건너뜀)
+_WS_RE = re.compile(r"\s*")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+def _balanced_json(s: str, start: int):
+    """
+    s[start]('{' 또는 '[')부터 짝이 맞는 닫는 괄호까지 한 번 훑으며 문자열 밖의 끝 쉼표(",}" ",]")를 제거.
+    반환: (정리된 후보 문자열, 닫는 괄호 위치) — 닫히지 않으면(잘린 응답) (None, -1)
+    """
+    parts, last, depth, in_str, skip = [], start, 0, False, -1
+    for m in _JSON_TOKEN_RE.finditer(s, start):
+        j = m.start()
+        if j < skip:                # 이스케이프된 문자
+            continue
+        c = s[j]
+        if in_str:
+            if c == "\\":
+                skip = j + 2
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                parts.append(s[last:j + 1])
+                return "".join(parts), j
+        else:   # ','
+            k = _WS_RE.match(s, j + 1).end()
+            if k < len(s) and s[k] in "}]":
+                parts.append(s[last:j])
+                last = j + 1
+    return None, -1
+
+def _scan_json(text):
+    """
+    LLM 응답에서 JSON 찾기 — (정리된 JSON 문자열, 파싱 결과) 또는 (None, None).
+    코드펜스를 벗긴 뒤 앞에서부터 짝이 맞는 객체 후보를 찾고 후보마다 json.loads는 1회만,
+    실패한 후보는 통째로 건너뛰므로 같은 구간을 다시 훑지 않음.
+    """
     if not text:
-        return None
+        return None, None
     s = str(text).strip()
-    m = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE).match(s)
+    m = _FENCE_RE.match(s)
     if m:
         s = m.group(1).strip()
-    if "{" in s and "}" in s:
-        start, end = s.find("{"), s.rfind("}")
-        cand = re.sub(r",\s*([}\]])", r"\1", s[start:end + 1].strip())
-        try:
-            json.loads(cand)
-            return cand
-        except Exception:
-            pass
-    for b in re.findall(r"```json\s*(.*?)```", s, flags=re.DOTALL | re.IGNORECASE):
-        b2 = re.sub(r",\s*([}\]])", r"\1", b.strip())
+    i = 0 if s.startswith("[") else s.find("{")
+    while i >= 0:
+        cand, end = _balanced_json(s, i)
+        if cand is None:
+            break
         try:
-            json.loads(b2)
-            return b2
-        except Exception:
-            pass
-    s2 = re.sub(r",\s*([}\]])", r"\1", s)
+            return cand, json.loads(cand)
+        except ValueError:
+            i = s.find("{", end + 1)
+    # 객체를 못 찾은 경우(스칼라 등) 전체를 한 번만 시도
+    s2 = _TRAILING_COMMA_RE.sub(r"\1", s)
     try:
-        json.loads(s2)
-        return s2
-    except Exception:
-        return None
+        return s2, json.loads(s2)
+    except ValueError:
+        return None, None
+
+def extract_json_str(text: str):
+    return _scan_json(text)[0]
 
 # ===== 안전 JSON 파서 (추가) =====
 def safe_json_loads(obj):
@@ -68,40 +127,178 @@ def safe_json_loads(obj):
         return {}
     if isinstance(obj, (dict, list)):
         return obj
-    s = str(obj or "")
-    try:
-        s2 = extract_json_str(s) or s
-    except Exception:
-        s2 = s
     try:
-        return json.loads(s2) if s2 else {}
+        js, data = _scan_json(obj)
     except Exception:
         return {}
+    return data if js is not None else {}
+
+_PARSED_KEY = "_parsed_json"   # 세션: 키 -> (원문 지문, 파싱 결과)
 
 def parse_json_from_session(key):
     """
     기존 호출부와 호환 유지. 세션의 값을 안전하게 dict로 변환.
+    원문 지문별로 파싱 결과를 세션에 보관 → 탭마다/위젯 rerun마다 다시 파싱하지 않음.
+    반환값은 같은 객체가 공유되므로 읽기 전용으로 사용.
     """
-    raw = st.session_state.get(key)
-    return safe_json_loads(raw)
+    state = runtime.session_state()
+    raw = state.get(key)
+    if not isinstance(raw, (str, bytes)):
+        return safe_json_loads(raw)
+    # str 해시는 객체에 캐싱되므로 세션에 그대로 있는 원문이면 O(1)
+    fp = (len(raw), hash(raw))
+    memo = state.get(_PARSED_KEY)
+    if memo is None:
+        memo = state[_PARSED_KEY] = {}
+    hit = memo.get(key)
+    if hit is not None and hit[0] == fp:
+        return hit[1]
+    parsed = safe_json_loads(raw)
+    memo[key] = (fp, parsed)
+    return parsed
 
 # ===================== Azure OpenAI =====================
-@st.cache_data(ttl=3600, show_spinner="Azure OpenAI 호출 중...")
-def run_aoai(messages, *, max_tokens: int = 800, temperature: float = 0.2):
+def _estimate_tokens(messages, max_tokens: int) -> int:
+    """TPM 예약용 예상 토큰 = 프롬프트 토큰 + 최대 출력 토큰"""
+    return sum(context_pack.count_tokens(m.get("content") or "") + 4 for m in messages) + max_tokens
+
+def _chat_create(client, messages, *, max_tokens, temperature, response_format=None, stream=False):
+    """
+    response_format(json_schema)은 지정됐을 때만 전달.
+    배포가 json_schema 자체를 거부하면 모드를 끄고 SchemaUnsupported — 그 외 400은 그대로 raise.
+    """
+    kw = dict(model=config.AOAI_DEPLOY, messages=messages, temperature=temperature, max_tokens=max_tokens)
+    if stream:
+        kw["stream"] = True
+    if not response_format:
+        return client.chat.completions.create(**kw)
+    try:
+        return client.chat.completions.create(response_format=response_format, **kw)
+    except Exception as e:
+        if not structured.is_unsupported_error(e):
+            raise
+        structured.disable(str(e)[:200])
+        raise structured.SchemaUnsupported(str(e)[:200]) from e
+
+def _schema_fallback(send, response_format):
+    """send(rf)가 SchemaUnsupported면 스키마 없이 한 번 더 — 제한기 슬롯/예산도 새 요청으로 따로 받음"""
+    try:
+        return send(response_format)
+    except structured.SchemaUnsupported:
+        return send(None)
+
+@cached(ttl=3600, show_spinner="Azure OpenAI 호출 중...")
+def run_aoai(messages, *, max_tokens: int = 800, temperature: float = 0.2, use_disk_cache: bool = True,
+             response_format: dict = None):
+    """
+    Chat Completions 호출. 메모리(cache.cached) → 디스크(llm_cache) 순으로 캐시 조회.
+    use_disk_cache=False면 디스크 캐시를 읽지도 쓰지도 않음.
+    response_format: structured.response_format(kind) — JSON 스키마 제약 출력 (None이면 생략)
+    """
     if not (config.AOAI_ENDPOINT and config.AOAI_KEY and config.AOAI_DEPLOY):
         raise RuntimeError("Azure OpenAI 환경변수가 설정되지 않았습니다.")
-    client = AzureOpenAI(
-        api_key=config.AOAI_KEY,
-        api_version=config.AOAI_VER,
-        azure_endpoint=config.AOAI_ENDPOINT,
-    )
-    resp = client.chat.completions.create(
-        model=config.AOAI_DEPLOY,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens,
+    cache = llm_cache.get_cache() if use_disk_cache else None
+    cache_key = None
+    if cache:
+        cache_key = llm_cache.make_key(
+            messages, deployment=config.AOAI_DEPLOY, temperature=temperature, max_tokens=max_tokens,
+            response_format=response_format,
+        )
+        hit = cache.get(cache_key)
+        if hit is not None:
+            return hit
+    client = aoai_client.get_client()
+    resp = _schema_fallback(
+        lambda rf: rate_limit.call(
+            lambda: _chat_create(client, messages, max_tokens=max_tokens, temperature=temperature,
+                                 response_format=rf),
+            est_tokens=_estimate_tokens(messages, max_tokens),
+            usage=lambda r: getattr(getattr(r, "usage", None), "total_tokens", None),
+        ),
+        response_format,
     )
-    return resp.choices[0].message.content
+    usage = getattr(resp, "usage", None)
+    metrics.add(aoai_calls=1, prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0)
+    content = resp.choices[0].message.content
+    if cache and content:
+        cache.put(cache_key, content)
+    return content
+
+def run_aoai_stream(messages, *, max_tokens: int = 800, temperature: float = 0.2, use_disk_cache: bool = True,
+                    response_format: dict = None):
+    """
+    run_aoai의 스트리밍 버전 — 텍스트 델타를 yield.
+    캐시(메모리/디스크)에 있으면 전체 텍스트를 한 번에 yield.
+    끝까지 받은 최종 텍스트는 run_aoai와 같은 키로 두 캐시에 저장 → 이후 run_aoai 호출도 hit.
+    """
+    if not (config.AOAI_ENDPOINT and config.AOAI_KEY and config.AOAI_DEPLOY):
+        raise RuntimeError("Azure OpenAI 환경변수가 설정되지 않았습니다.")
+    call_kw = dict(max_tokens=max_tokens, temperature=temperature, use_disk_cache=use_disk_cache,
+                   response_format=response_format)
+    found, text = run_aoai.peek(messages, **call_kw)
+    if found:
+        yield text
+        return
+    cache = llm_cache.get_cache() if use_disk_cache else None
+    cache_key = None
+    if cache:
+        cache_key = llm_cache.make_key(
+            messages, deployment=config.AOAI_DEPLOY, temperature=temperature, max_tokens=max_tokens,
+            response_format=response_format,
+        )
+        hit = cache.get(cache_key)
+        if hit is not None:
+            run_aoai.prime(hit, messages, **call_kw)
+            yield hit
+            return
+
+    # 같은 요청이 진행 중이면(다른 세션의 스트림/run_aoai) 새로 보내지 않고 그 결과를 받음
+    flight_key = run_aoai.cache_key(messages, **call_kw)
+    call, leader = run_aoai.flights.begin(flight_key)
+    if not leader:
+        yield run_aoai.flights.wait(call)
+        return
+
+    client = aoai_client.get_client()
+    est = _estimate_tokens(messages, max_tokens)
+    parts, content = [], None
+    try:
+        # 스트림은 다 읽을 때까지 동시 실행 슬롯을 쥐고 있어야 함 (429 재시도는 연결 시점까지만)
+        stream, ticket = _schema_fallback(
+            lambda rf: rate_limit.admit(
+                lambda: _chat_create(client, messages, max_tokens=max_tokens, temperature=temperature,
+                                     response_format=rf, stream=True),
+                est_tokens=est,
+            ),
+            response_format,
+        )
+        try:
+            for chunk in stream:
+                # Azure는 첫 청크에 choices 없이 필터 결과만 보내기도 함
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content if chunk.choices[0].delta else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            # 스트림 응답에는 usage가 없으므로 프롬프트/완료 토큰을 추정치로 기록
+            completion = context_pack.count_tokens("".join(parts))
+            rate_limit.get_limiter().release(ticket, used_tokens=est - max_tokens + completion)
+            metrics.add(aoai_calls=1, prompt_tokens=est - max_tokens, completion_tokens=completion)
+        content = "".join(parts)
+        if content:
+            run_aoai.prime(content, messages, **call_kw)
+            if cache:
+                cache.put(cache_key, content)
+    except GeneratorExit:
+        run_aoai.flights.finish(flight_key, call, error=RuntimeError("동일 요청의 스트리밍이 중단되었습니다. 다시 시도하세요."))
+        raise
+    except BaseException as e:
+        run_aoai.flights.finish(flight_key, call, error=e)
+        raise
+    run_aoai.flights.finish(flight_key, call, value=content)
 
 # ===================== PEST·SWOT / 통합 인사이트 프롬프트 =====================
 NEWS_PSWOT_SCHEMA = """
@@ -128,11 +325,13 @@ def build_messages_news(company, techs, domains, news):
         info_lines.insert(0, f"회사: {company}")
     info_text = "\n".join(info_lines)
 
-    # ③ 뉴스 블록
+    # ③ 뉴스 블록 (근사 중복은 대표 1건 + 보도 매체 수로 압축)
+    news, _ = collapse_near_duplicates(news)
     news_block = ""
-    for i, n in enumerate(news or [], 1):
+    for i, n in enumerate(news, 1):
         news_block += (
-            f"[{i}] {n.get('title','(제목 없음)')} — {n.get('provider','')} — {n.get('datePublished','')}\n"
+            f"[{i}] {n.get('title','(제목 없음)')} — {n.get('provider','')} — {n.get('datePublished','')}"
+            f"{_news_source_note(n)}\n"
             f"요약: {n.get('snippet','')}\nURL: {n.get('url','')}\n\n"
         )
 
@@ -186,21 +385,88 @@ COMBINED_SCHEMA = """
 }
 """.strip()
 
-def build_messages_combined(news_items, hits, company, techs, domains):
-    """뉴스(N#)와 내부문서(D#)를 합쳐 통합 인사이트 JSON을 요청하는 메시지 구성"""
+# ===================== 통합 인사이트 압축 컨텍스트 =====================
+_SRC_NOTE_RE = re.compile(r"\(출처:\s*([^)]*)\)")
+_NUM_REF_RE = re.compile(r"\[(\d+)\]")
+_REF_RE = re.compile(r"\[([ND])(\d+)\]")
+
+def hits_signature(hits) -> str:
+    """문서 조각 목록 지문 — 세션의 문서 요약(doc_summary)이 지금 doc_hits로 만든 것인지 확인용"""
+    h = hashlib.sha1()
+    for it in hits or []:
+        if isinstance(it, dict):
+            h.update(f"{it.get('title')}\x1f{it.get('source')}\x1f{len(str(it.get('content') or ''))}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+def selection_signature(company, techs, domains, news=None) -> str:
+    """분석 대상(회사/기술/도메인) + 뉴스 목록 지문 — 세션의 PEST·SWOT(pest_swot_json)이 지금 선택으로 만든 것인지 확인용"""
+    h = hashlib.sha1()
+    h.update(f"{company or ''}\x1f{'|'.join(techs or [])}\x1f{'|'.join(domains or [])}\x1e".encode("utf-8"))
+    for n in news or []:
+        if isinstance(n, dict):
+            h.update(f"{n.get('url') or n.get('title')}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+def _cited(text: str, label: str, total: int) -> list:
+    """본문에 인용된 번호 (없으면 전체) — 출처 목록은 이 번호만 싣음"""
+    nums = sorted({int(n) for t, n in _REF_RE.findall(text) if t == label and 1 <= int(n) <= total})
+    return nums or list(range(1, total + 1))
+
+def compact_news_context(news_items, pest_swot):
+    """
+    PEST·SWOT 결과(같은 뉴스로 이미 생성)를 뉴스 원문 대신 쓰는 압축 컨텍스트.
+    (출처:[1]) 인용은 [N1]로 바꾸고, 인용된 기사만 제목 한 줄씩 출처 목록으로 붙임.
+    결과가 없거나 스키마를 통과하지 못하면 None → 호출부가 원문 컨텍스트 사용.
+    """
+    data = safe_json_loads(pest_swot)
+    if not data or structured.validate(data, structured.PEST_SWOT_SCHEMA):
+        return None
+    to_n = lambda t: _NUM_REF_RE.sub(r"[N\1]", _SRC_NOTE_RE.sub(r"\1", str(t))).strip()
+    lines = [f"{sec}-{k}: {to_n(x)}" for sec in ("PEST", "SWOT") for k in data[sec] for x in data[sec][k][:2]]
+    lines.append(f"대응전략: {to_n(data['one_liner'])}")
+    body = "\n".join(lines)
+    news, _ = collapse_near_duplicates(news_items)   # build_messages_news와 같은 번호
+    src = "\n".join(
+        f"[N{i}] {news[i - 1].get('title', '(제목 없음)')} — {news[i - 1].get('provider', '')}"
+        for i in _cited(body, "N", len(news))
+    )
+    return f"(PEST·SWOT 분석 결과)\n{body}\n--- 출처 ---\n{src}\n"
+
+def compact_docs_context(hits, doc_summary):
+    """문서 통합 요약([D#] 포함)을 문서 조각 원문 대신 쓰는 압축 컨텍스트. 요약이 없으면 None."""
+    text = str(doc_summary or "").strip()
+    safe_hits = [h for h in (hits or []) if isinstance(h, dict)]
+    if not text or not safe_hits:
+        return None
+    src = "\n".join(
+        f"[D{i}] {safe_hits[i - 1].get('title') or '(제목 없음)'} - {safe_hits[i - 1].get('source', '')}"
+        for i in _cited(text, "D", len(safe_hits))
+    )
+    return f"(문서 통합 요약)\n{text}\n--- 출처 ---\n{src}\n"
+
+def build_messages_combined(news_items, hits, company, techs, domains, *, pest_swot=None, doc_summary=None):
+    """
+    뉴스(N#)와 내부문서(D#)를 합쳐 통합 인사이트 JSON을 요청하는 메시지 구성.
+    COMBINED_COMPACT_CONTEXT면 이미 만든 중간 결과(pest_swot: PEST·SWOT JSON, doc_summary: 문서 통합 요약)를
+    원문 대신 사용하고, 없는 쪽만 원문(토큰 예산 패킹)으로 채움.
+    """
     tech_text   = ", ".join(techs) if techs else "N/A"
     domain_text = ", ".join(domains) if domains else "N/A"
     A = (company or "자사").strip()
 
-    nb, db = "", ""
-    for i, n in enumerate(news_items, 1):
-        nb += (
-            f"[N{i}] {n.get('title','(제목 없음)')} — {n.get('provider','')} — {n.get('datePublished','')}\n"
-            f"요약:{n.get('snippet','')}\nURL:{n.get('url','')}\n\n"
-        )
-    for i, h in enumerate(hits, 1):
-        title = h.get("title") or "(제목 없음)"
-        db += f"[D{i}] {title} - {h.get('source','')}\n내용:\n{h.get('content','')}\n\n"
+    nb = db = None
+    if config.COMBINED_COMPACT_CONTEXT:
+        nb = compact_news_context(news_items, pest_swot) if pest_swot else None
+        db = compact_docs_context(hits, doc_summary) if doc_summary else None
+
+    # 질의 관련도 순으로 토큰 예산 안에서만 채움 (번호는 원래 순번 유지)
+    query = context_pack.build_query(company, techs, domains)
+    if nb is None:
+        news_items, _ = collapse_near_duplicates(news_items)
+        nb = context_pack.pack_news(news_items, query, config.PACK_COMBINED_NEWS_TOKENS, kind="combined_news").text
+    if db is None:
+        db = context_pack.pack_docs(hits or [], query, config.PACK_COMBINED_DOC_TOKENS, kind="combined_docs",
+                                    with_source=True).text
 
     user = (
         f"아래 외부 뉴스(N#)와 내부 문서(D#)를 바탕으로 자사({A}) 관점의 간결한 인사이트를 JSON으로만 출력.\n\n"
@@ -213,8 +479,84 @@ def build_messages_combined(news_items, hits, company, techs, domains):
         {"role": "user",   "content": user},
     ]
 
+# ===================== 구조화 JSON 검증/보완 =====================
+def _disk_key(messages, *, max_tokens, temperature, response_format=None, **_):
+    return llm_cache.make_key(messages, deployment=config.AOAI_DEPLOY, temperature=temperature,
+                              max_tokens=max_tokens, response_format=response_format)
+
+def _forget(messages, **call_kw):
+    """메모리/디스크 캐시의 응답 제거 — 전체 재생성 때 같은 불량 응답을 다시 받지 않도록"""
+    run_aoai.invalidate(messages, **call_kw)
+    disk = llm_cache.get_cache() if call_kw.get("use_disk_cache", True) else None
+    if disk:
+        disk.delete(_disk_key(messages, **call_kw))
+
+def _remember(text, messages, **call_kw):
+    """보완된 JSON을 원 요청의 캐시 값으로 덮어씀 → 다음 hit부터는 검증만 하고 통과"""
+    run_aoai.prime(text, messages, **call_kw)
+    disk = llm_cache.get_cache() if call_kw.get("use_disk_cache", True) else None
+    if disk:
+        disk.put(_disk_key(messages, **call_kw), text)
+
+def _json_call(messages, **call_kw):
+    """
+    run_aoai + 이번 호출이 실제 완료 요청에 쓴 토큰.
+    run_aoai는 실제 API 호출 때만 토큰을 기록하므로 메모리/디스크 캐시 hit이면 0.
+    """
+    with metrics.stage("json_repair") as rec:
+        text = run_aoai(messages, **call_kw) or ""
+    return text, rec.counts["prompt_tokens"] + rec.counts["completion_tokens"]
+
+def complete_json(kind: str, messages, text, *, max_tokens: int = 800, temperature: float = 0.2,
+                  use_disk_cache: bool = True):
+    """
+    생성된 JSON(text)을 structured 스키마로 검증하고 필요한 만큼만 보완 → (dict, 최종 JSON 텍스트).
+    - 일부 필드만 비거나 틀림: 그 필드만 짧은 후속 프롬프트로 재요청해 병합 (partial)
+    - 파싱 불가/대부분 틀림: 캐시를 지우고 전체 1회 재생성 (regenerated), 남은 필드는 다시 부분 재요청
+    보완에 실패해도 살릴 수 있는 필드는 그대로 돌려줌 (failed). 인자는 원 호출(run_aoai/_stream)과 같게.
+    """
+    schema = structured.SCHEMAS[kind]
+    call_kw = dict(max_tokens=max_tokens, temperature=temperature, use_disk_cache=use_disk_cache,
+                   response_format=structured.response_format(kind))
+    data = safe_json_loads(text)
+    bad = structured.validate(data, schema)
+    if not bad:
+        structured.record(kind, "ok")
+        return data, text
+
+    outcome, extra, reasked, regen = "partial", 0, 0, False
+    try:
+        if structured.needs_full_regen(bad, schema):
+            outcome, regen = "regenerated", True
+            _forget(messages, **call_kw)
+            text, used = _json_call(messages, **call_kw)
+            extra += used
+            data = safe_json_loads(text)
+            bad = structured.validate(data, schema)
+        if bad and not structured.needs_full_regen(bad, schema):
+            reasked = len(bad)
+            patch_text, used = _json_call(
+                structured.repair_messages(messages, text, bad, schema),
+                max_tokens=config.JSON_REASK_MAX_TOKENS, temperature=temperature, use_disk_cache=use_disk_cache,
+                response_format=structured.response_format(f"{kind}_repair", structured.subschema(schema, bad)),
+            )
+            extra += used
+            data = structured.merge(data, safe_json_loads(patch_text), bad)
+            bad = structured.validate(data, schema)
+            if not bad:
+                text = json.dumps(data, ensure_ascii=False)
+                _remember(text, messages, **call_kw)
+    except Exception as e:
+        runtime.notify_error(f"JSON 보완 요청 실패: {e}")
+    if bad:
+        outcome = "failed"
+        if isinstance(data, dict) and data:
+            text = json.dumps(data, ensure_ascii=False)
+    structured.record(kind, outcome, full_regen=regen, reasked_fields=reasked, extra_tokens=extra)
+    return (data if isinstance(data, dict) else {}), text
+
 # ===================== 뉴스 (메인 페이지용) =====================
-@st.cache_data(ttl=3600, show_spinner="NewsAPI에서 뉴스 수집 중...")
+@cached(ttl=3600, show_spinner="NewsAPI에서 뉴스 수집 중...")
 def fetch_news_ko(query: str, cnt: int, freshness: str, use_and: bool = False):
     if not config.NEWS_KEY:
         raise RuntimeError("환경변수 NEWSAPI_KEY가 비어 있습니다.")
@@ -227,8 +569,8 @@ def fetch_news_ko(query: str, cnt: int, freshness: str, use_and: bool = False):
         terms = [t for t in q.split() if t]
         q = " AND ".join(terms) if terms else q
 
-    r = requests.get(
-        "https://newsapi.org/v2/everything",
+    r = http_client.get(
+        config.NEWSAPI_URL,
         params={
             "q": q,
             "from": from_date,
@@ -252,14 +594,14 @@ def fetch_news_ko(query: str, cnt: int, freshness: str, use_and: bool = False):
         })
     return out[:cnt]
 
-@st.cache_data(ttl=3600, show_spinner="Naver News에서 뉴스 수집 중...")
+@cached(ttl=3600, show_spinner="Naver News에서 뉴스 수집 중...")
 def fetch_news_naver(query: str, cnt: int = 5):
     if not (config.NAVER_ID and config.NAVER_SECRET):
         raise RuntimeError("NAVER_CLIENT_ID/SECRET가 없습니다.")
-    url = "https://openapi.naver.com/v1/search/news.json"
+    url = config.NAVER_NEWS_URL
     headers = {"X-Naver-Client-Id": config.NAVER_ID, "X-Naver-Client-Secret": config.NAVER_SECRET}
     params = {"query": (query or "").strip(), "display": cnt, "sort": "date"}
-    r = requests.get(url, headers=headers, params=params, timeout=15)
+    r = http_client.get(url, headers=headers, params=params, timeout=15)
     r.raise_for_status()
     out = []
     for a in r.json().get("items", []) or []:
@@ -274,17 +616,164 @@ def fetch_news_naver(query: str, cnt: int = 5):
         })
     return out[:cnt]
 
+# ===================== 뉴스 통합 (다중 공급자 병렬) =====================
+_news_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news")
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "ref", "ref_src"})   # 정확히 일치하는 이름만 (+ utm_*)
+
+def news_providers(freshness: str = "Week", use_and: bool = False):
+    """설정된 뉴스 공급자 목록 [(이름, fetch(query, cnt))]"""
+    providers = []
+    if config.NAVER_ID and config.NAVER_SECRET:
+        providers.append(("Naver", lambda q, cnt: fetch_news_naver(q, cnt)))
+    if config.NEWS_KEY:
+        providers.append(("NewsAPI", lambda q, cnt: fetch_news_ko(q, cnt, freshness, use_and=use_and)))
+    return providers
+
+def canonical_url(url: str) -> str:
+    """중복 판정용 URL 정규화 — scheme/www/m./추적 파라미터/fragment/끝 슬래시 제거"""
+    if not url:
+        return ""
+    try:
+        p = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+    host = (p.hostname or "").lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if not (k.lower() in _TRACKING_PARAMS or k.lower().startswith("utm_"))
+    ))
+    return urlunsplit(("", host, p.path.rstrip("/"), query, ""))
+
+def _normalize_title(title: str) -> str:
+    t = re.sub(r"\[[^\]]{1,10}\]|\([^)]{1,10}\)", "", title or "")   # [속보], (종합) 등 말머리 제거
+    t = re.sub(r"&[a-z]+;|&#\d+;", "", t)
+    return re.sub(r"[^0-9A-Za-z가-힣]", "", t).lower()
+
+def _published_at(item) -> datetime:
+    s = (item.get("datePublished") or "").strip()
+    if s:
+        try:
+            dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+        try:
+            return parsedate_to_datetime(s)   # Naver: RFC 822
+        except (TypeError, ValueError):
+            pass
+    return datetime.min.replace(tzinfo=timezone.utc)
+
+def merge_news(*result_lists):
+    """여러 공급자 결과를 합쳐 URL/제목 기준 중복 제거 후 최신순 정렬"""
+    seen_urls, seen_titles, out = set(), set(), []
+    for items in result_lists:
+        for n in items or []:
+            cu, nt = canonical_url(n.get("url") or ""), _normalize_title(n.get("title") or "")
+            if (cu and cu in seen_urls) or (nt and nt in seen_titles):
+                continue
+            if cu:
+                seen_urls.add(cu)
+            if nt:
+                seen_titles.add(nt)
+            out.append(n)
+    out.sort(key=_published_at, reverse=True)
+    return out
+
+def _fetch_provider(name, fn, q, cnt):
+    with metrics.stage("news_provider", provider=name):
+        return fn(q, cnt)
+
+def fetch_news_all(query: str, cnt: int, freshness: str = "Week", use_and: bool = False, *, deadline: float = None):
+    """
+    설정된 모든 공급자에 동시 요청 → 공용 마감시간(deadline초) 안에 도착한 결과만 병합.
+    느린 공급자는 부분 결과로 강등(요청은 백그라운드에서 마저 끝나 캐시에 남음).
+    반환: (news_list, {공급자: "ok" | "timeout" | "error: ..."})
+    """
+    providers = news_providers(freshness, use_and)
+    if not providers:
+        raise RuntimeError("NewsAPI 또는 Naver API 키가 설정되지 않았습니다.")
+    q = (query or "").strip()
+    with metrics.stage("news_fetch", providers=len(providers)):
+        futures = {metrics.submit(_news_pool, _fetch_provider, name, fn, q, cnt): name for name, fn in providers}
+        done, _ = wait(futures, timeout=config.NEWS_DEADLINE_SEC if deadline is None else deadline)
+
+    status, results = {}, {}
+    for fut, name in futures.items():
+        if fut not in done:
+            status[name] = "timeout"
+            continue
+        try:
+            results[name] = fut.result()
+            status[name] = "ok"
+        except Exception as e:
+            status[name] = f"error: {e}"
+    if not results and all(v.startswith("error") for v in status.values()):
+        raise RuntimeError("; ".join(f"{k} {v}" for k, v in status.items()))
+    merged = merge_news(*(results[name] for name, _ in providers if name in results))
+    return merged, status
+
+# ===================== 뉴스 근사 중복 묶기 =====================
+_dedupe_lock = threading.Lock()
+_dedupe_stats = {"calls": 0, "input": 0, "dropped": 0, "tokens_saved": 0}
+
+def _news_prompt_text(n) -> str:
+    return f"{n.get('title','')} {n.get('snippet','')}"
+
+def collapse_near_duplicates(news, threshold: float = None):
+    """
+    같은 보도자료를 받아쓴 기사(제목·요약 MinHash 유사도 ≥ threshold)를 대표 1건으로 묶음.
+    대표는 클러스터 첫 기사(= 최신순 병합 결과의 가장 최근 기사)이며
+    source_count/sources 필드로 함께 보도한 매체 수를 남김 (원본 dict는 변경하지 않음).
+    반환: (대표 기사 리스트, {"input", "kept", "dropped", "tokens_saved"})
+    """
+    threshold = config.NEWS_DEDUPE_THRESHOLD if threshold is None else threshold
+    news = list(news or [])
+    if threshold >= 1 or len(news) < 2:
+        return news, {"input": len(news), "kept": len(news), "dropped": 0, "tokens_saved": 0}
+
+    out, saved = [], 0
+    for cluster in textproc.near_duplicate_clusters([_news_prompt_text(n) for n in news], threshold=threshold):
+        rep = dict(news[cluster[0]])
+        if len(cluster) > 1:
+            dups = [news[i] for i in cluster[1:]]
+            rep["source_count"] = len(cluster)
+            rep["sources"] = [s for s in dict.fromkeys(
+                (n.get("provider") or canonical_url(n.get("url") or "").split("/")[0]) for n in [news[cluster[0]], *dups]
+            ) if s]
+            saved += sum(context_pack.count_tokens(_news_prompt_text(n) + " " + (n.get("url") or "")) for n in dups)
+        out.append(rep)
+
+    report = {"input": len(news), "kept": len(out), "dropped": len(news) - len(out), "tokens_saved": saved}
+    with _dedupe_lock:
+        _dedupe_stats["calls"] += 1
+        _dedupe_stats["input"] += report["input"]
+        _dedupe_stats["dropped"] += report["dropped"]
+        _dedupe_stats["tokens_saved"] += report["tokens_saved"]
+    return out, report
+
+def news_dedupe_stats() -> dict:
+    """프로세스 누적 근사 중복 제거 통계"""
+    with _dedupe_lock:
+        return dict(_dedupe_stats)
+
+def _news_source_note(n) -> str:
+    k = n.get("source_count") or 1
+    return f" — 유사 보도 {k}건({', '.join(n.get('sources') or [])})" if k > 1 else ""
+
 # ===================== Azure Search =====================
-@st.cache_data(ttl=3600)
+@cached(ttl=3600)
 def get_index_schema(index_name: str):
     """(선택) 인덱스 점검용 — 없어도 동작함"""
     try:
         url = f"{config.SEARCH_ENDPOINT}/indexes/{index_name}?api-version={config.SEARCH_API_VER}"
-        r = requests.get(url, headers={"api-key": config.SEARCH_KEY}, timeout=20)
+        r = http_client.get(url, headers={"api-key": config.SEARCH_KEY}, timeout=20)
         r.raise_for_status()
         return r.json().get("fields", []) or []
     except Exception as e:
-        st.error(f"인덱스 스키마 조회 실패: {e}")
+        runtime.notify_error(f"인덱스 스키마 조회 실패: {e}")
         return []
 
 def detect_fieldmap(fields):
@@ -312,14 +801,105 @@ def detect_fieldmap(fields):
         "select": select or "title,url",
     }
 
+# ===================== 검색 후보 병렬 실행 =====================
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+_strategy_lock = threading.Lock()
+_strategy_stats = defaultdict(lambda: {"calls": 0, "nonempty": 0, "wins": 0, "errors": 0, "cancelled": 0, "total_ms": 0.0})
+
+def _search_post(url, headers, body):
+    """검색 요청 1건 → (values, elapsed_ms, error_message). 워커 스레드용이라 st.* 호출 없음."""
+    t0 = time.perf_counter()
+    try:
+        r = http_client.post(url, headers=headers, json=body, timeout=20, idempotent=True)   # 조회용 POST
+        r.raise_for_status()
+        j = r.json()
+        vals = (j.get("value") or []) if isinstance(j, dict) else []
+        return vals, (time.perf_counter() - t0) * 1000, None
+    except requests.exceptions.HTTPError as e:
+        try:
+            msg = f"{e} · {e.response.text}"
+        except Exception:
+            msg = str(e)
+        return [], (time.perf_counter() - t0) * 1000, msg
+    except Exception as e:
+        return [], (time.perf_counter() - t0) * 1000, str(e)
+
+def _search_candidate(kind, label, url, headers, body, stop=None):
+    if stop is not None and stop.is_set():
+        # 승자가 확정된 뒤에야 워커가 집어 든 후보 — 보내지 않고 끝냄
+        with _strategy_lock:
+            _strategy_stats[(kind, label)]["cancelled"] += 1
+        return [], 0.0, None
+    with metrics.stage("search_candidate", kind=kind, strategy=label):
+        return _search_post(url, headers, body)
+
+def _run_search_candidates(kind, url, headers, candidates):
+    """
+    후보 [(전략명, body), ...]를 동시에 요청하고, 우선순위가 가장 높은 비어있지 않은 결과를 반환.
+    더 높은 우선순위 후보가 모두 빈 결과로 끝난 시점에 승자가 확정되며, 나머지는 취소/무시.
+    대기열의 후보는 취소되고, 아직 시작 전인 후보는 stop 이벤트를 보고 요청 없이 끝남.
+    이미 전송 중인 HTTP 요청은 중단할 수 없어 끝까지 가고 결과만 버려짐 ("cancelled"에 세지 않음).
+    """
+    stop = threading.Event()
+    futs = [metrics.submit(_search_pool, _search_candidate, kind, label, url, headers, body, stop)
+            for label, body in candidates]
+    index = {f: i for i, f in enumerate(futs)}
+    results = [None] * len(futs)
+    errors, winner = [], None
+    for fut in as_completed(futs):
+        i = index[fut]
+        vals, ms, err = fut.result()
+        results[i] = vals
+        label = candidates[i][0]
+        with _strategy_lock:
+            rec = _strategy_stats[(kind, label)]
+            rec["calls"] += 1
+            rec["total_ms"] += ms
+            rec["nonempty"] += bool(vals)
+            rec["errors"] += bool(err)
+        if err:
+            errors.append(err)
+        # 앞선 후보가 전부 끝났고 비어 있으면, 첫 비어있지 않은 결과가 승자
+        for j, r in enumerate(results):
+            if r is None:
+                break
+            if r:
+                winner = j
+                break
+        if winner is not None:
+            break
+
+    if winner is not None:
+        with _strategy_lock:
+            _strategy_stats[(kind, candidates[winner][0])]["wins"] += 1
+        stop.set()
+        for j, f in enumerate(futs):
+            # 대기 중이면 취소, 이미 전송 중이면 결과를 버림 (취소된 경우만 집계)
+            if results[j] is None and f.cancel():
+                with _strategy_lock:
+                    _strategy_stats[(kind, candidates[j][0])]["cancelled"] += 1
+        return results[winner]
+
+    for err in dict.fromkeys(errors):
+        runtime.notify_error(f"문서 검색 실패: {err}")
+    return []
+
+def search_strategy_stats():
+    """검색 전략별 호출/적중/승리/취소 건수와 평균 지연(ms)"""
+    with _strategy_lock:
+        return {
+            f"{kind}:{label}": dict(v, avg_ms=round(v["total_ms"] / v["calls"], 1) if v["calls"] else 0.0)
+            for (kind, label), v in _strategy_stats.items()
+        }
+
 # ===================== 검색 (blob/키워드) =====================
-@st.cache_data(ttl=600, show_spinner="Blob 이름으로 문서 검색 중...")
+@cached(ttl=600, show_spinner="Blob 이름으로 문서 검색 중...")
 def search_docs_by_blobname(blob_name: str, top: int = 8, *, nonce: int = 0):
     """
     업로드한 blob_name으로 문서 조각 검색 — '정확히 그 파일'만 반환.
     """
     if not (config.SEARCH_ENDPOINT and config.SEARCH_KEY and config.SEARCH_INDEX):
-        st.error("Azure Search 설정이 누락되었습니다. .env의 AZURE_SEARCH_* 값을 확인하세요.")
+        runtime.notify_error("Azure Search 설정이 누락되었습니다. .env의 AZURE_SEARCH_* 값을 확인하세요.")
         return []
     safe_name = (blob_name or "").strip()
     if not safe_name:
@@ -330,34 +910,13 @@ def search_docs_by_blobname(blob_name: str, top: int = 8, *, nonce: int = 0):
     base = os.path.basename(safe_name)
     uuid_part = safe_name.split("_", 1)[0] if "_" in safe_name else ""
 
-    candidates = []
-    candidates.append({"search": f"\"{safe_name}\"", "top": int(top)})
+    candidates = [("full", {"search": f"\"{safe_name}\"", "top": int(top)})]
     if base and base != safe_name:
-        candidates.append({"search": f"\"{base}\"", "top": int(top)})
+        candidates.append(("basename", {"search": f"\"{base}\"", "top": int(top)}))
     if uuid_part and uuid_part != safe_name:
-        candidates.append({"search": f"\"{uuid_part}\"", "top": int(top)})
-
-    def _try(body):
-        try:
-            r = requests.post(url, headers=headers, json=body, timeout=20)
-            r.raise_for_status()
-            j = r.json()
-            return (j.get("value") or []) if isinstance(j, dict) else []
-        except requests.exceptions.HTTPError as e:
-            try:
-                st.error(f"문서 검색 실패: {e} · {e.response.text}")
-            except Exception:
-                st.error(f"문서 검색 실패: {e}")
-            return []
-        except Exception as e:
-            st.error(f"문서 검색 실패: {e}")
-            return []
+        candidates.append(("uuid", {"search": f"\"{uuid_part}\"", "top": int(top)}))
 
-    raw_vals = []
-    for body in candidates:
-        raw_vals = _try(body)
-        if raw_vals:
-            break
+    raw_vals = _run_search_candidates("blob", url, headers, candidates)
     if not raw_vals:
         return []
 
@@ -384,13 +943,13 @@ def search_docs_by_blobname(blob_name: str, top: int = 8, *, nonce: int = 0):
         })
     return items
 
-@st.cache_data(ttl=600, show_spinner="키워드로 문서 검색 중...")
+@cached(ttl=600, show_spinner="키워드로 문서 검색 중...")
 def search_docs_by_keyword(query: str, top: int = 8):
     """
     키워드 검색 — 항상 list[dict] 반환.
     """
     if not (config.SEARCH_ENDPOINT and config.SEARCH_KEY and config.SEARCH_INDEX):
-        st.error("Azure Search 설정이 누락되었습니다. .env의 AZURE_SEARCH_* 값을 확인하세요.")
+        runtime.notify_error("Azure Search 설정이 누락되었습니다. .env의 AZURE_SEARCH_* 값을 확인하세요.")
         return []
 
     q = (query or "").strip()
@@ -401,31 +960,10 @@ def search_docs_by_keyword(query: str, top: int = 8):
     headers = {"Content-Type": "application/json", "api-key": config.SEARCH_KEY}
 
     candidates = [
-        {"search": q,          "top": int(top)},
-        {"search": f"\"{q}\"", "top": int(top)},
+        ("raw",    {"search": q,          "top": int(top)}),
+        ("quoted", {"search": f"\"{q}\"", "top": int(top)}),
     ]
-
-    def _try(body):
-        try:
-            r = requests.post(url, headers=headers, json=body, timeout=20)
-            r.raise_for_status()
-            j = r.json()
-            return (j.get("value") or []) if isinstance(j, dict) else []
-        except requests.exceptions.HTTPError as e:
-            try:
-                st.error(f"문서 검색 실패: {e} · {e.response.text}")
-            except Exception:
-                st.error(f"문서 검색 실패: {e}")
-            return []
-        except Exception as e:
-            st.error(f"문서 검색 실패: {e}")
-            return []
-
-    vals = []
-    for body in candidates:
-        vals = _try(body)
-        if vals:
-            break
+    vals = _run_search_candidates("keyword", url, headers, candidates)
 
     items = []
     for h in vals:
@@ -442,40 +980,114 @@ def search_docs_by_keyword(query: str, top: int = 8):
     return items
 
 # ===================== 문서 요약 =====================
-@st.cache_data(ttl=3600, show_spinner="문서 조각 요약 중...")
-def summarize_docs_combined(hits, max_chars: int = 20000) -> str:
+@cached(ttl=3600, show_spinner="문서 조각 요약 중...")
+def summarize_docs_combined(hits, max_chars: int = 20000, *, query: str = "", token_budget: int = None,
+                            mode: str = "auto") -> str:
+    """
+    문서 조각 통합 요약. 도착 순서대로 자르지 않고, 질의 관련도 순으로
+    token_budget(기본 PACK_SUMMARY_TOKENS) 안에서 채운 뒤 max_chars로 한 번 더 상한 (LLM 호출 1회).
+    map-reduce(청크별 병렬 요약 → 병합)는 선택: mode="mapreduce"이거나,
+    mode="auto"에서 SUMMARY_MODE=mapreduce이고 원문이 예산을 넘을 때만.
+    """
     safe_hits = [h for h in (hits or []) if isinstance(h, dict)]
-    chunks, total = [], 0
-    for i, h in enumerate(safe_hits, 1):
-        title = h.get("title")
-        title = title if isinstance(title, str) and title.strip() else "(제목 없음)"
-        content = h.get("content")
-        if not isinstance(content, str):
-            content = "" if content is None else str(content)
-        piece = f"[D{i}] {title}\n{content}\n\n"
-        if total + len(piece) > max_chars:
-            remain = max_chars - total
-            if remain > 0:
-                chunks.append(piece[:remain])
-            break
-        chunks.append(piece)
-        total += len(piece)
-
-    merged = "".join(chunks) if chunks else ""
-    if not (config.AOAI_ENDPOINT and config.AOAI_KEY and config.AOAI_DEPLOY):
+    budget = token_budget or config.PACK_SUMMARY_TOKENS
+    llm_ready = bool(config.AOAI_ENDPOINT and config.AOAI_KEY and config.AOAI_DEPLOY)
+    if llm_ready and (mode == "mapreduce" or (mode == "auto" and config.SUMMARY_MODE == "mapreduce")):
+        total = sum(context_pack.count_tokens(str(h.get("content") or "")) for h in safe_hits)
+        if mode == "mapreduce" or total > budget:
+            return summarize_docs_mapreduce(safe_hits, query=query, max_chars=max_chars)
+    packed = context_pack.pack_docs(safe_hits, query, budget, kind="summary")
+    merged = packed.text[:max_chars]
+    if not llm_ready:
         return merged[:600] + ("…" if len(merged) > 600 else "")
 
     resp = run_aoai(
         [
             {"role": "system", "content": "한국어로 작성. 중복 제거, 핵심만 간결하게."},
-            {"role": "user", "content": "아래 여러 문서 조각을 3~4줄로 한글 요약하세요. 불필요한 수식어/중복은 제거:\n\n" + merged},
+            {"role": "user", "content": "아래 여러 문서 조각을 3~4줄로 한글 요약하세요. 불필요한 수식어/중복은 제거, "
+                                        "각 줄 끝에 근거 조각 번호([D#]) 유지:\n\n" + merged},
         ],
         max_tokens=1100,
     )
     return (resp or "").strip()
 
+# ===================== 문서 요약 (map-reduce) =====================
+_map_pool = ThreadPoolExecutor(max_workers=config.SUMMARY_MAP_CONCURRENCY, thread_name_prefix="summary-map")
+
+def chunk_hits(hits, chunk_tokens: int = None):
+    """hit들을 문단 경계로 chunk_tokens 이하 청크로 묶음 → [(D번호, 텍스트), ...] (D번호는 원래 순번)"""
+    limit = chunk_tokens or config.SUMMARY_CHUNK_TOKENS
+    out = []
+    for i, h in enumerate(hits or [], 1):
+        buf, used = [], 0
+        for p in context_pack.split_passages(str(h.get("content") or ""), max_tokens=limit):
+            t = context_pack.count_tokens(p)
+            if buf and used + t > limit:
+                out.append((i, "\n\n".join(buf)))
+                buf, used = [], 0
+            buf.append(p)
+            used += t
+        if buf:
+            out.append((i, "\n\n".join(buf)))
+    return out
+
+@cached(namespace="summary_chunk", ttl=86400, max_entries=2048)
+def summarize_chunk(text: str) -> str:
+    """청크 1개 부분 요약. 키 = 청크 내용 해시 (번호/순서와 무관) → 같은 문서 재분석 시 재사용."""
+    resp = run_aoai(
+        [
+            {"role": "system", "content": "한국어로 작성. 사실만, 핵심만 간결하게."},
+            {"role": "user", "content": "아래 문서 조각의 핵심 사실을 2~3문장으로 한글 요약하세요:\n\n" + text},
+        ],
+        max_tokens=300,
+    )
+    return (resp or "").strip()
+
+def _summarize_chunk_staged(num, text):
+    with metrics.stage("summarize_chunk", doc=f"D{num}"):
+        return summarize_chunk(text)
+
+def summarize_docs_mapreduce(hits, *, query: str = "", max_chars: int = 20000) -> str:
+    """
+    청크별 부분 요약을 병렬(SUMMARY_MAP_CONCURRENCY)로 만든 뒤 한 번의 reduce 호출로 병합.
+    청크가 SUMMARY_MAX_CHUNKS를 넘으면 질의 관련도 순으로 골라 상한만큼만 요약 (뒤쪽을 잘라내지 않음),
+    빠진 청크 수는 로그와 summary_chunks_dropped 지표로 남김. reduce 입력은 max_chars로 상한.
+    """
+    chunks = chunk_hits(hits)
+    dropped = len(chunks) - config.SUMMARY_MAX_CHUNKS
+    if dropped > 0:
+        keep = sorted(context_pack.rank([text for _, text in chunks], query)[: config.SUMMARY_MAX_CHUNKS])
+        chunks = [chunks[k] for k in keep]     # 원래 순서 유지
+        log.warning("문서 요약: 청크 %d개 중 관련도 낮은 %d개 제외 (SUMMARY_MAX_CHUNKS=%d)",
+                    len(chunks) + dropped, dropped, config.SUMMARY_MAX_CHUNKS)
+        metrics.add(summary_chunks_dropped=dropped)
+    if not chunks:
+        return ""
+    futures = [(num, metrics.submit(_map_pool, _summarize_chunk_staged, num, text)) for num, text in chunks]
+    partials, errors = [], []
+    for num, fut in futures:
+        try:
+            got = fut.result()
+            if got:
+                partials.append(f"[D{num}] {got}")
+        except Exception as e:
+            errors.append(str(e))
+    if not partials:
+        raise RuntimeError("부분 요약 실패: " + "; ".join(dict.fromkeys(errors)))
+
+    resp = run_aoai(
+        [
+            {"role": "system", "content": "한국어로 작성. 중복 제거, 핵심만 간결하게."},
+            {"role": "user", "content": "아래는 문서 조각별 부분 요약입니다. 전체를 3~4줄로 한글 통합 요약하세요. "
+                                        "불필요한 수식어/중복은 제거, 각 줄 끝에 근거 조각 번호([D#]) 유지:\n\n"
+                                        + "\n".join(partials)[:max_chars]},
+        ],
+        max_tokens=600,
+    )
+    return (resp or "").strip()
+
 # ===================== 우선 제안 선택 =====================
-@st.cache_data(ttl=3600, show_spinner="우선 제안 선택 중...")
+@cached(ttl=3600, show_spinner="우선 제안 선택 중...")
 def choose_single_proposal(proposals: dict, _take2_func):
     """
     proposals = {